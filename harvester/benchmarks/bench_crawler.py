@@ -0,0 +1,263 @@
+"""
+    Offline crawl throughput benchmark. A local HTTP server serves synthetic paginated
+    review pages using the markup `AldiReviewsSpider.parse` selects on, the spider is
+    run against it for every combination of CONCURRENT_REQUESTS and DOWNLOAD_DELAY.
+    Every run happens in a fresh process because the Twisted reactor cannot be restarted.
+    With `--stream-analysis` the reviews are analyzed while crawling, the time to the first
+    analyzed batch and the number of analyzed reviews are reported as well. With `--companies`
+    the `TrustpilotReviewsSpider` crawls that many companies of `--pages` pages each side by side,
+    each with `--concurrency` requests at a time.
+
+    Usage:
+        python -m harvester.benchmarks.bench_crawler --pages 200 --concurrency 1 8 16 --delay 0 0.05
+        python -m harvester.benchmarks.bench_crawler --pages 200 --latency 0.05 --stream-analysis
+        python -m harvester.benchmarks.bench_crawler --pages 50 --latency 0.05 --concurrency 1 --companies 1 4
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+from html import escape
+from typing import Iterable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CRAWLERS_PROJECT = os.path.join(os.path.dirname(__file__), os.pardir, 'services', 'crawlers')
+
+WORDS = ["Aldi", "Brot", "Kasse", "freundlich", "Preis", "Qualität", "staff", "fresh", "checkout", "prices",
+         "Filiale", "sauber", "Angebot", "leider", "immer", "great", "never", "again", "Toilettenpapier", "gut"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def render_reviews_page(reviews: Iterable[tuple[str, str, str]], next_href: str | None = None) -> bytes:
+    """
+        Renders a review page with the CSS classes of the Trustpilot markup
+        from (posting_time, rating, comment) tuples
+    """
+    articles = ''.join(
+        f'<article class="styles_reviewCard__hcAvl">'
+        f'<time datetime="2024">{escape(posting_time)}</time>'
+        f'<div class="star-rating_starRating__4rrcf star-rating_medium__iN6Ty">'
+        f'<img alt="{escape(rating)}" src="/stars.svg"></div>'
+        f'<div class="styles_reviewContent__0Q2Tg">'
+        f'<p class="typography_body-l__KUYFJ typography_appearance-default__AAY17">{escape(comment)}</p></div>'
+        f'</article>'
+        for posting_time, rating, comment in reviews)
+
+    next_link = (f'<a class="link_internal__7XN06 pagination-link_next__SDNU4" href="{next_href}">'
+                 f'Next page</a>') if next_href is not None else ''
+    html = (f'<html><head><title>Aldi reviews</title></head><body>'
+            f'<main><section class="styles_reviewsContainer__3_GQw">{articles}</section>'
+            f'<nav class="pagination_pagination___F1qS">{next_link}</nav></main></body></html>')
+
+    return html.encode('utf-8')
+
+
+def render_page(page: int, pages: int, reviews_per_page: int, path: str = '/review/www.aldi.de') -> bytes:
+    """
+        Renders one deterministic review page, linking to the next page of the same path
+    """
+    generator = random.Random(page)
+    reviews = []
+
+    for _ in range(reviews_per_page):
+        comment = ' '.join(generator.choices(WORDS, k=generator.randint(5, 60))).capitalize() + '.'
+        reviews.append((f'{generator.choice(MONTHS)} {generator.randint(1, 28)}, 2024',
+                        f'Rated {generator.randint(1, 5)} out of 5 stars',
+                        comment))
+
+    return render_reviews_page(reviews, f'{path}?page={page + 1}' if page < pages else None)
+
+
+def start_server(pages: int, reviews_per_page: int, latency: float) -> ThreadingHTTPServer:
+    class ReviewsHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        wbufsize = 1 << 16
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            page = int(parse_qs(url.query).get('page', ['1'])[0])
+            body = render_page(page, pages, reviews_per_page, url.path)
+            if latency:
+                time.sleep(latency)
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ReviewsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+def watch_first_result(path: str, start: float, first_result: list[float]) -> None:
+    """
+        Records the seconds until the analysis output receives its first batch
+    """
+    while not first_result:
+        for candidate in (f"{path}.inprogress", path):
+            if os.path.exists(candidate) and os.path.getsize(candidate) > 0:
+                first_result.append(time.perf_counter() - start)
+                return
+        time.sleep(0.01)
+
+
+def run_crawl(url: str,
+              concurrency: int,
+              delay: float,
+              stream_analysis: bool,
+              companies: int,
+              results: multiprocessing.Queue) -> None:
+    """
+        Runs one crawl in the current (child) process and puts its measurements on the queue.
+        Without companies the Aldi spider crawls `url`, otherwise the generic spider crawls
+        that many companies served next to it.
+    """
+    sys.path.insert(0, os.path.abspath(CRAWLERS_PROJECT))
+
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.settings import Settings
+
+    from crawlers import settings as project_settings
+    from crawlers.spiders.trustpilot_alti_reviews import AldiReviewsSpider
+    from crawlers.spiders.trustpilot_reviews import TrustpilotReviewsSpider
+
+    parse_times = []
+
+    class TimedSpider(TrustpilotReviewsSpider if companies else AldiReviewsSpider):
+        def parse(self, response):
+            start = time.perf_counter()
+            results = list(super().parse(response))
+            parse_times.append(time.perf_counter() - start)
+
+            yield from results
+
+    os.chdir(tempfile.mkdtemp())
+    settings = Settings()
+    settings.setmodule(project_settings)
+    # the concurrency is per company, the global limit leaves room for all of them
+    settings.setdict({'CONCURRENT_REQUESTS': concurrency * max(companies, 1),
+                      'CONCURRENT_REQUESTS_PER_DOMAIN': concurrency,
+                      'DOWNLOAD_DELAY': delay,
+                      'AUTOTHROTTLE_ENABLED': False,
+                      'CRAWLERS_STREAM_ANALYSIS': stream_analysis,
+                      'LOG_LEVEL': 'WARNING',
+                      'TELNETCONSOLE_ENABLED': False},
+                     # above the custom settings of the spiders, as `-s` on the command line
+                     priority='cmdline')
+
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(TimedSpider)
+    first_result = []
+    analysis_path = os.path.abspath(f"{TimedSpider.name}-analyzed.csv" if companies else 'aldi-reviews-analyzed.csv')
+    if stream_analysis:
+        threading.Thread(target=watch_first_result, daemon=True,
+                         args=(analysis_path, time.perf_counter(), first_result)).start()
+
+    if companies:
+        base = url.split('/review/', 1)[0]
+        targets = {f'company-{company}': f'{base}/review/company-{company}?page=1' for company in range(companies)}
+        process.crawl(crawler, targets=targets, directory=os.path.abspath('.'))
+    else:
+        process.crawl(crawler, url=url, filename=os.path.abspath('aldi-reviews.csv'))
+    process.start()
+
+    stats = crawler.stats.get_stats()
+    elapsed = stats['elapsed_time_seconds']
+    pages = stats.get('response_received_count', 0)
+    items = stats.get('item_scraped_count', 0)
+
+    results.put({
+        'companies': companies,
+        'concurrent_requests': concurrency,
+        'download_delay': delay,
+        'pages': pages,
+        'items': items,
+        'elapsed_s': elapsed,
+        'pages_per_s': pages / elapsed,
+        'items_per_s': items / elapsed,
+        'parse_ms_per_page': 1000 * sum(parse_times) / max(len(parse_times), 1),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'first_result_s': first_result[0] if first_result else None,
+        'analyzed': sum(1 for _ in open(analysis_path, encoding='utf-8')) - 1 if stream_analysis else None,
+    })
+
+
+def wait_for_measurement(crawl: multiprocessing.Process, results: multiprocessing.Queue) -> dict:
+    """
+        Waits for the measurements of a crawl, fails instead of blocking when the crawl died without them
+    """
+    while True:
+        try:
+            return results.get(timeout=1.0)
+        except queue.Empty:
+            if crawl.is_alive():
+                continue
+
+        # the measurements may still be in flight when the crawl has just exited
+        try:
+            return results.get(timeout=1.0)
+        except queue.Empty:
+            raise RuntimeError(f"The crawl exited with code {crawl.exitcode} without measurements") from None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--reviews-per-page', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated server latency in seconds')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 16])
+    parser.add_argument('--delay', type=float, nargs='+', default=[0.0])
+    parser.add_argument('--stream-analysis', action='store_true', help='analyzes the reviews while crawling')
+    parser.add_argument('--companies', type=int, nargs='+', default=[0],
+                        help='numbers of companies crawled at once by the generic spider, 0 runs the Aldi spider')
+    parser.add_argument('--json', help='writes the measurements to this file')
+    args = parser.parse_args()
+
+    server = start_server(args.pages, args.reviews_per_page, args.latency)
+    url = f'http://127.0.0.1:{server.server_port}/review/www.aldi.de?page=1'
+    context = multiprocessing.get_context('spawn')
+    measurements = []
+
+    print(f"{'companies':>10}{'concurrency':>12}{'delay [s]':>10}{'pages':>7}{'items':>8}{'pages/s':>9}{'items/s':>9}"
+          f"{'parse [ms]':>11}{'RSS [MB]':>10}" + (f"{'first [s]':>10}{'analyzed':>9}" if args.stream_analysis else ''))
+    for companies, concurrency, delay in itertools.product(args.companies, args.concurrency, args.delay):
+        results = context.Queue()
+        crawl = context.Process(target=run_crawl,
+                                args=(url, concurrency, delay, args.stream_analysis, companies, results))
+        crawl.start()
+        measurement = wait_for_measurement(crawl, results)
+        crawl.join()
+
+        measurements.append(measurement)
+        print(f"{companies:>10}{concurrency:>12}{delay:>10.2f}{measurement['pages']:>7}{measurement['items']:>8}"
+              f"{measurement['pages_per_s']:>9.1f}{measurement['items_per_s']:>9.1f}"
+              f"{measurement['parse_ms_per_page']:>11.2f}{measurement['peak_rss_mb']:>10.1f}"
+              + (f"{measurement['first_result_s'] or float('nan'):>10.2f}{measurement['analyzed']:>9}"
+                 if args.stream_analysis else ''))
+
+    server.shutdown()
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(measurements, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+    Cold import benchmark. Every module is imported in a fresh interpreter, the import
+    time is measured inside the interpreter so the interpreter start-up is excluded,
+    and the heavy third party packages which were loaded by the import are listed.
+
+    Usage:
+        python -m harvester.benchmarks.bench_import --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    'harvester.services.preprocessor.preprocessing_handler',
+    'harvester.services.preprocessor.reviews_preprocessor',
+    'harvester.services.ml_algorithms.ml_appliances',
+]
+HEAVY_PACKAGES = ['nltk', 'gensim', 'textblob', 'scipy']
+
+MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measure(module: str) -> dict:
+    """
+        Imports the module in a fresh interpreter and returns the import time and the loaded heavy packages
+    """
+    completed = subprocess.run([sys.executable, '-c', MEASURE.format(module=module, heavy=HEAVY_PACKAGES)],
+                               capture_output=True, text=True, check=True)
+
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--json', help='writes the measurements to this file')
+    args = parser.parse_args()
+
+    measurements = []
+
+    print(f"{'module':<58}{'median [ms]':>12}{'min [ms]':>10}  heavy packages loaded")
+    for module in args.modules:
+        runs = [measure(module) for _ in range(args.repeat)]
+        seconds = [run['seconds'] for run in runs]
+        measurement = {'module': module,
+                       'median_ms': 1000 * statistics.median(seconds),
+                       'min_ms': 1000 * min(seconds),
+                       'loaded': runs[-1]['loaded']}
+
+        measurements.append(measurement)
+        print(f"{module:<58}{measurement['median_ms']:>12.1f}{measurement['min_ms']:>10.1f}  "
+              f"{', '.join(measurement['loaded']) or '-'}")
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(measurements, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
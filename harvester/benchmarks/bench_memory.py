@@ -0,0 +1,84 @@
+"""
+    Peak memory of loading and preprocessing a crawled CSV with the object data model and with
+    the compact one (Arrow strings, categorical and then small integer ratings, datetime posting
+    times, float32 sentiment). The compact text handlers hold `--partition-size` comments as
+    Python strings at a time. Every mode runs in a fresh process, so the peak resident set
+    sizes do not mix.
+
+    Usage:
+        python -m harvester.benchmarks.bench_memory --rows 1000000 --sentiment
+"""
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from harvester.benchmarks.bench_suite import rss_mb
+from harvester.benchmarks.synthetic_reviews import generate_reviews
+
+
+def run_mode(path: str, compact: bool, sentiment: bool, partition_size: int = 50_000) -> dict:
+    """
+        Loads, preprocesses and optionally scores the reviews in the current (child) process
+    """
+    import numpy as np
+    import pandas as pd
+
+    from harvester.services.ml_algorithms.ml_appliances import CreateSentimentAnalysisStrategy
+    from harvester.services.preprocessor.dtypes import read_reviews
+    from harvester.services.preprocessor.reviews_preprocessor import ReviewsPreprocessor
+
+    start = time.perf_counter()
+    dataset = read_reviews(path) if compact else pd.read_csv(path)
+    loaded_mb = dataset.memory_usage(deep=True).sum() / 2 ** 20
+
+    preprocessor = ReviewsPreprocessor(dataset, vectorized=True, compact=compact, partition_size=partition_size)
+    del dataset
+    preprocessor.execute()
+    result = preprocessor.dataset
+
+    if sentiment:
+        result = CreateSentimentAnalysisStrategy(dtype=np.float32 if compact else np.float64).execute(
+            dataset=result, text_column='comment')
+
+    try:
+        peak_rss = rss_mb('VmHWM')
+    except (OSError, KeyError):
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    return {
+        'mode': 'compact' if compact else 'object',
+        'seconds': time.perf_counter() - start,
+        'loaded_mb': loaded_mb,
+        'result_mb': result.memory_usage(deep=True).sum() / 2 ** 20,
+        'peak_rss_mb': peak_rss,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--sentiment', action='store_true', help='also scores the sentiment of the reviews')
+    parser.add_argument('--partition-size', type=int, default=50_000,
+                        help='rows the compact text handlers hold as Python strings at a time')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'reviews.csv')
+    generate_reviews(args.rows).to_csv(path, index=False)
+
+    print(f"{'mode':<10}{'time [s]':>10}{'loaded [MB]':>13}{'result [MB]':>13}{'peak RSS [MB]':>15}")
+    for compact in (False, True):
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+            result = executor.submit(run_mode, path, compact, args.sentiment, args.partition_size).result()
+
+        print(f"{result['mode']:<10}{result['seconds']:>10.1f}{result['loaded_mb']:>13.1f}"
+              f"{result['result_mb']:>13.1f}{result['peak_rss_mb']:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+    Compares the row-wise and the vectorized mode of the preprocessing handlers.
+
+    Usage:
+        python -m harvester.benchmarks.bench_preprocessing --rows 1000000
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from harvester.benchmarks.synthetic_reviews import generate_reviews
+from harvester.services.preprocessor.preprocessing_handler import (PreprocessingHandler,
+                                                                   ProcessingHandler,
+                                                                   RatingConverterHandler)
+
+
+def time_handler(handler, dataset: pd.DataFrame) -> float:
+    start = time.perf_counter()
+    handler.handle(dataset)
+
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    reviews = generate_reviews(args.rows)
+    # every handler gets the output of the previous one, as in the chain
+    inputs = {
+        PreprocessingHandler: reviews,
+        ProcessingHandler: PreprocessingHandler(vectorized=True).handle(reviews.copy()),
+        RatingConverterHandler: reviews,
+    }
+
+    print(f"{'handler':<24}{'row-wise [s]':>14}{'vectorized [s]':>16}{'speedup':>10}")
+    for handler_class, dataset in inputs.items():
+        row_wise = time_handler(handler_class(), dataset.copy())
+        vectorized = time_handler(handler_class(vectorized=True), dataset.copy())
+        print(f"{handler_class.__name__:<24}{row_wise:>14.2f}{vectorized:>16.2f}{row_wise / vectorized:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
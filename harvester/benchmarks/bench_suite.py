@@ -0,0 +1,290 @@
+"""
+    Scalability benchmark of the preprocessing handlers, the ML strategies and the spider parser
+    on synthetic reviews. Every stage and size is measured in a fresh process: after a warm-up call,
+    timed separately, the stage runs over the reviews in batches and the suite records the throughput,
+    the batch latency percentiles and the peak resident memory of the stage. The results are written
+    as JSON and can be compared with a previous run, throughput drops and memory growth beyond the
+    tolerance are flagged as regressions.
+
+    Usage:
+        python -m harvester.benchmarks.bench_suite --rows 1000 10000 100000 1000000 --json results.json
+        python -m harvester.benchmarks.bench_suite --rows 1000 10000 --baseline results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from harvester.benchmarks.synthetic_reviews import generate_reviews
+
+REVIEWS_PER_PAGE = 20
+WARMUP_ROWS = 20
+
+
+def _preprocessed(reviews: pd.DataFrame) -> pd.DataFrame:
+    from harvester.services.preprocessor.reviews_preprocessor import build_pipeline
+
+    return build_pipeline(vectorized=True).handle(reviews.dropna().copy())
+
+
+def _handler_stage(handler_name: str, preprocess_input: bool = False):
+    def prepare(reviews: pd.DataFrame, vectorized: bool) -> tuple[Callable, pd.DataFrame]:
+        from harvester.services.preprocessor import preprocessing_handler
+
+        handler = getattr(preprocessing_handler, handler_name)(vectorized=vectorized)
+        dataset = _preprocessed(reviews) if preprocess_input else reviews
+
+        return lambda batch: handler.handle(batch.copy()), dataset
+
+    return prepare
+
+
+def _reviews_preprocessor_stage(reviews: pd.DataFrame, vectorized: bool) -> tuple[Callable, pd.DataFrame]:
+    from harvester.services.preprocessor.reviews_preprocessor import ReviewsPreprocessor
+
+    return lambda batch: ReviewsPreprocessor(batch.copy(), vectorized=vectorized).execute(), reviews
+
+
+def _sentiment_stage(reviews: pd.DataFrame, vectorized: bool) -> tuple[Callable, pd.DataFrame]:
+    from harvester.services.ml_algorithms.ml_appliances import CreateSentimentAnalysisStrategy
+
+    strategy = CreateSentimentAnalysisStrategy()
+
+    return lambda batch: strategy.execute(dataset=batch, text_column='comment'), reviews
+
+
+def _aspect_stage(reviews: pd.DataFrame, vectorized: bool) -> tuple[Callable, pd.DataFrame]:
+    from harvester.services.ml_algorithms.ml_appliances import PerformAspectAnalysisStrategy
+
+    strategy = PerformAspectAnalysisStrategy()
+
+    return lambda batch: strategy.execute(dataset=batch.copy(), text_column='comment'), reviews
+
+
+def _topic_stage(reviews: pd.DataFrame, vectorized: bool) -> tuple[Callable, pd.DataFrame]:
+    from harvester.services.ml_algorithms.ml_appliances import ExtractDominantTopicsStrategy
+
+    strategy = ExtractDominantTopicsStrategy()
+
+    return lambda batch: strategy.execute(dataset=batch, text_column='comment', num_topics=10), \
+        _preprocessed(reviews)
+
+
+def _spider_parse_stage(reviews: pd.DataFrame, vectorized: bool) -> tuple[Callable, pd.DataFrame]:
+    from scrapy.http import HtmlResponse
+
+    from harvester.benchmarks.bench_crawler import render_reviews_page
+    from harvester.services.crawlers.crawlers.spiders.trustpilot_alti_reviews import AldiReviewsSpider
+
+    # the spider creates its resource directory relative to the working directory
+    os.chdir(tempfile.mkdtemp())
+    spider = AldiReviewsSpider()
+    url = 'https://www.trustpilot.com/review/www.aldi.de'
+
+    def parse(batch: pd.DataFrame) -> None:
+        for start in range(0, len(batch), REVIEWS_PER_PAGE):
+            page = batch.iloc[start:start + REVIEWS_PER_PAGE].itertuples(index=False)
+            response = HtmlResponse(url=url, body=render_reviews_page(page, '?page=2'), encoding='utf-8')
+            for _ in spider.parse(response):
+                pass
+
+    return parse, reviews
+
+
+# stage name: (prepare, runs over batches), the topic model is trained on the whole corpus at once
+STAGES = {
+    'preprocessing_handler': (_handler_stage('PreprocessingHandler'), True),
+    'processing_handler': (_handler_stage('ProcessingHandler', preprocess_input=True), True),
+    'rating_converter_handler': (_handler_stage('RatingConverterHandler'), True),
+    'reviews_preprocessor': (_reviews_preprocessor_stage, True),
+    'sentiment_strategy': (_sentiment_stage, True),
+    'aspect_strategy': (_aspect_stage, True),
+    'topic_strategy': (_topic_stage, False),
+    'spider_parse': (_spider_parse_stage, True),
+}
+
+
+def reset_peak_rss() -> bool:
+    """
+        Resets the peak resident set size of the process, only supported on Linux
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def rss_mb(field: str) -> float:
+    with open('/proc/self/status') as file:
+        for line in file:
+            if line.startswith(field):
+                return int(line.split()[1]) / 1024
+
+    raise KeyError(field)
+
+
+def measure_stage(stage: str, rows: int, batch_size: int, vectorized: bool, seed: int) -> dict:
+    """
+        Runs one stage over `rows` synthetic reviews in the current process and returns its measurements
+    """
+    prepare, batched = STAGES[stage]
+    work, dataset = prepare(generate_reviews(rows, seed), vectorized)
+    batches = [dataset.iloc[start:start + batch_size] for start in range(0, len(dataset), batch_size)] \
+        if batched else [dataset]
+
+    # the first call loads the lazily imported libraries and models, it is reported apart
+    warmup_start = time.perf_counter()
+    work(dataset.iloc[:WARMUP_ROWS])
+    warmup = time.perf_counter() - warmup_start
+
+    peak_resettable = reset_peak_rss()
+    baseline_rss = rss_mb('VmRSS') if peak_resettable else 0.0
+    latencies = []
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+
+    for batch in batches:
+        batch_start = time.perf_counter()
+        work(batch)
+        latencies.append(time.perf_counter() - batch_start)
+
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    peak_rss = rss_mb('VmHWM') if peak_resettable \
+        else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    latencies_ms = 1000 * np.array(latencies)
+
+    return {
+        'stage': stage,
+        'rows': len(dataset),
+        'batch_size': batch_size if batched else len(dataset),
+        'vectorized': vectorized,
+        'seconds': elapsed,
+        'cpu_seconds': cpu,
+        'warmup_seconds': warmup,
+        'rows_per_s': len(dataset) / elapsed if elapsed else float('inf'),
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'peak_rss_mb': peak_rss,
+        'stage_rss_mb': peak_rss - baseline_rss,
+    }
+
+
+def compare(baseline: list[dict], current: list[dict], tolerance: float) -> list[dict]:
+    """
+        Flags the stages whose throughput dropped or whose memory grew by more than the tolerance.
+        @param baseline: results of a previous run
+        @param current: results of this run
+        @param tolerance: relative change which is still accepted, e.g. 0.1
+
+        @return: one entry per stage, size, batch size and execution path present in both runs
+    """
+    previous = {_comparison_key(result): result for result in baseline}
+    comparisons = []
+
+    for result in current:
+        before = previous.get(_comparison_key(result))
+        if before is None:
+            continue
+
+        throughput_ratio = result['rows_per_s'] / before['rows_per_s']
+        memory_ratio = result['peak_rss_mb'] / before['peak_rss_mb']
+        comparisons.append({
+            'stage': result['stage'],
+            'rows': result['rows'],
+            'batch_size': result.get('batch_size'),
+            'vectorized': result.get('vectorized'),
+            'throughput_ratio': throughput_ratio,
+            'memory_ratio': memory_ratio,
+            'regression': throughput_ratio < 1 - tolerance or memory_ratio > 1 + tolerance,
+        })
+
+    return comparisons
+
+
+def _comparison_key(result: dict) -> tuple:
+    # a row-wise run is not compared against a vectorized one, nor one batch size against another
+    return result['stage'], result['rows'], result.get('batch_size'), result.get('vectorized')
+
+
+def _metadata() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000])
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--batch-size', type=int, default=1_000)
+    parser.add_argument('--row-wise', action='store_true', help='runs the row-wise handlers instead of vectorized')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='writes the results to this file')
+    parser.add_argument('--baseline', help='results of a previous run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args()
+
+    results = []
+
+    print(f"{'stage':<26}{'rows':>9}{'rows/s':>11}{'p50 [ms]':>10}{'p95 [ms]':>10}{'p99 [ms]':>10}"
+          f"{'peak [MB]':>11}{'stage [MB]':>12}")
+    for rows in args.rows:
+        for stage in args.stages:
+            # a fresh process per measurement keeps the peak memory of the stages apart
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                result = executor.submit(measure_stage, stage, rows, args.batch_size, not args.row_wise,
+                                         args.seed).result()
+
+            results.append(result)
+            print(f"{stage:<26}{result['rows']:>9}{result['rows_per_s']:>11.0f}{result['p50_ms']:>10.1f}"
+                  f"{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['peak_rss_mb']:>11.1f}"
+                  f"{result['stage_rss_mb']:>12.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'metadata': _metadata(), 'results': results}, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            comparisons = compare(json.load(file)['results'], results, args.tolerance)
+
+        print(f"\n{'stage':<26}{'rows':>9}{'throughput':>12}{'memory':>9}")
+        for comparison in comparisons:
+            flag = '  REGRESSION' if comparison['regression'] else ''
+            print(f"{comparison['stage']:<26}{comparison['rows']:>9}{comparison['throughput_ratio']:>11.2f}x"
+                  f"{comparison['memory_ratio']:>8.2f}x{flag}")
+
+        if any(comparison['regression'] for comparison in comparisons):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
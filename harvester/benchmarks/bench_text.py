@@ -0,0 +1,63 @@
+"""
+    Per-row latency of the fast text path against the functions it replaces: `contractions.fix`
+    against `fast_text.expand_contractions` on synthetic comments, and `word_tokenize` against
+    `fast_text.tokenize` on the same comments after `PreprocessingHandler`. The fast functions
+    are measured with a cold memo cache, on the distinct comments only, and with a warm one.
+
+    Usage:
+        python -m harvester.benchmarks.bench_text --rows 100000
+"""
+
+import argparse
+import time
+
+from typing import Callable
+
+from harvester.benchmarks.synthetic_reviews import generate_reviews
+
+
+def per_row_us(function: Callable[[str], object], texts: list[str]) -> float:
+    start = time.perf_counter()
+    for text in texts:
+        function(text)
+
+    return 1e6 * (time.perf_counter() - start) / len(texts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    import contractions
+
+    from nltk import word_tokenize
+
+    from harvester.services.nltk_resources import require
+    from harvester.services.preprocessor.fast_text import expand_contractions, tokenize
+    from harvester.services.preprocessor.preprocessing_handler import PreprocessingHandler
+
+    require('punkt_tab')
+    comments = generate_reviews(args.rows, args.seed)['comment'].tolist()
+    preprocessed = [PreprocessingHandler()._preprocess(comment) for comment in comments]
+    # loads the models and compiles the expressions outside of the measurements
+    contractions.fix(comments[0]), word_tokenize(preprocessed[0])
+    expand_contractions(comments[0]), tokenize(preprocessed[0])
+
+    print(f"{'function':<22}{'rows':>9}{'current [us]':>14}{'cold [us]':>11}{'warm [us]':>11}{'speedup':>9}")
+    for name, current, fast, texts in (('contractions', contractions.fix, expand_contractions, comments),
+                                       ('tokenizer', word_tokenize, tokenize, preprocessed)):
+        current_us = per_row_us(current, texts)
+
+        fast.cache_clear()
+        distinct = list(dict.fromkeys(texts))
+        cold_us = per_row_us(fast, distinct)
+        warm_us = per_row_us(fast, texts)
+
+        print(f"{name:<22}{len(texts):>9}{current_us:>14.1f}{cold_us:>11.1f}{warm_us:>11.2f}"
+              f"{current_us / cold_us:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+    Deterministic generator of synthetic Trustpilot reviews with the `posting_time, rating, comment`
+    schema of the crawler output. Comments mix German and English sentences whose tone follows the
+    star rating, contain contractions, digits, emoticons and punctuation, and a share of them are
+    short stock phrases repeated across reviews, as in the crawled data.
+
+    Usage:
+        python -m harvester.benchmarks.synthetic_reviews --rows 100000 --output reviews.csv
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+POSITIVE = {
+    'de': ["Super Preis-Leistung, {product} ist immer frisch.",
+           "Die Mitarbeiter in {city} sind sehr freundlich und hilfsbereit :)",
+           "Ich kaufe seit {years} Jahren bei Aldi und bin sehr zufrieden.",
+           "Der Laden ist sauber und {product} war im Angebot für {price} Euro.",
+           "Schnell an der Kasse, nach {minutes} Minuten war ich fertig!"],
+    'en': ["Great value, the {product} is always fresh.",
+           "The staff in {city} are really friendly, I'd recommend it.",
+           "I've been shopping here for {years} years and it's never let me down.",
+           "Clean store and the {product} was on offer for {price} euros.",
+           "Quick checkout, I was done in {minutes} minutes!"],
+}
+NEGATIVE = {
+    'de': ["Leider war {product} heute nicht frisch.",
+           "Nur eine Kasse offen, ich habe {minutes} Minuten gewartet!!",
+           "Die Filiale in {city} ist schmutzig und der Parkplatz ist zu klein.",
+           "{product} aus dem Prospekt war schon um {hour} Uhr ausverkauft.",
+           "Das Toilettenpapier reißt ständig, die Perforation fehlt teilweise."],
+    'en': ["Unfortunately the {product} wasn't fresh today.",
+           "Only one checkout open, I waited {minutes} minutes!!",
+           "The store in {city} is dirty and the car park's too small.",
+           "The {product} from the weekly flyer was sold out by {hour} o'clock.",
+           "The perforation is partially missing, it suddenly tears over a longer length."],
+}
+NEUTRAL = {
+    'de': ["Ganz normaler Einkauf, {product} gab es wie immer.",
+           "Die Filiale in {city} hat neue Öffnungszeiten bis {hour} Uhr."],
+    'en': ["Regular shopping trip, they had {product} as usual.",
+           "The store in {city} is now open until {hour} o'clock."],
+}
+STOCK_PHRASES = ["Gut", "Top!", "Alles bestens.", "Sehr gut", "Nie wieder!", "Good", "Great store", "Ok", "👍",
+                 "Preis-Leistung stimmt."]
+PRODUCTS = ["Brot", "Kaffee", "Milch", "Käse", "Bananen", "Joghurt", "Wein", "Nudeln", "Butter", "Eier", "Lachs",
+            "bread", "coffee", "cheese", "detergent", "chocolate", "salmon", "pizza", "flowers", "socks", "juice"]
+CITIES = ["Berlin", "Aachen", "Köln", "München", "Essen", "Dortmund", "Bonn", "Hamburg", "Leipzig", "Mainz",
+          "Düsseldorf", "Frankfurt", "Stuttgart", "Bremen", "Dresden", "Hannover", "Nürnberg", "Münster"]
+MONTHS = np.array(["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], dtype=object)
+
+RATING_PROBABILITIES = [0.45, 0.10, 0.08, 0.12, 0.25]
+STOCK_PHRASE_SHARE = 0.05
+ENGLISH_SHARE = 0.4
+FIRST_DAY = np.datetime64('2019-01-01')
+DAYS = 6 * 365
+
+
+def _sentence_pool(rating: int) -> dict[str, list[str]]:
+    if rating <= 2:
+        return NEGATIVE
+    if rating >= 4:
+        return POSITIVE
+
+    return {language: NEUTRAL[language] + POSITIVE[language][:2] + NEGATIVE[language][:2] for language in NEUTRAL}
+
+
+def generate_reviews(rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+        Generates `rows` reviews, the same seed always yields the same reviews.
+    """
+    generator = np.random.default_rng(seed)
+
+    ratings = generator.choice(np.arange(1, 6), size=rows, p=RATING_PROBABILITIES)
+    english = generator.random(rows) < ENGLISH_SHARE
+    stock = generator.random(rows) < STOCK_PHRASE_SHARE
+    lengths = np.minimum(generator.geometric(0.45, size=rows), 8)
+    # one random stream per placeholder, consumed sentence by sentence
+    picks = generator.integers(1 << 30, size=(int(lengths.sum()), 7)).tolist()
+    pools = {rating: _sentence_pool(rating) for rating in range(1, 6)}
+
+    comments = []
+    position = 0
+    for rating, is_english, is_stock, length in zip(ratings.tolist(), english.tolist(), stock.tolist(),
+                                                    lengths.tolist()):
+        if is_stock:
+            comments.append(STOCK_PHRASES[picks[position][0] % len(STOCK_PHRASES)])
+            position += length
+            continue
+
+        sentences = pools[rating]['en' if is_english else 'de']
+        comment = []
+        for template, product, city, years, price, minutes, hour in picks[position:position + length]:
+            comment.append(sentences[template % len(sentences)].format(
+                product=PRODUCTS[product % len(PRODUCTS)],
+                city=CITIES[city % len(CITIES)],
+                years=2 + years % 30,
+                price=f"{1 + price % 20},{price % 100:02d}",
+                minutes=5 + minutes % 40,
+                hour=8 + hour % 13))
+        comments.append(' '.join(comment))
+        position += length
+
+    days = FIRST_DAY + generator.integers(DAYS, size=rows).astype('timedelta64[D]')
+    dates = pd.DatetimeIndex(days)
+    posting_times = MONTHS[dates.month - 1] + ' ' + dates.day.astype(str) + ', ' + dates.year.astype(str)
+
+    return pd.DataFrame({
+        'posting_time': posting_times,
+        'rating': np.array([f"Rated {rating} out of 5 stars" for rating in range(1, 6)], dtype=object)[ratings - 1],
+        'comment': comments,
+    })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', required=True, help='CSV file the reviews are written to')
+    args = parser.parse_args()
+
+    generate_reviews(args.rows, args.seed).to_csv(args.output, index=False)
+
+
+if __name__ == '__main__':
+    main()
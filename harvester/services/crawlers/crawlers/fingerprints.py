@@ -0,0 +1,69 @@
+import hashlib
+import sqlite3
+
+from typing import Iterable
+
+from itemadapter import ItemAdapter
+
+
+class ReviewFingerprintStore:
+    """
+        SQLite backed set of the reviews which were already crawled. A review is
+        identified by a hash of its posting time, rating and comment. New
+        fingerprints become persistent only on `commit`, so an interrupted crawl
+        does not mark its reviews as known.
+    """
+    FIELDS = ('posting_time', 'rating', 'comment')
+    QUERY_BATCH = 500
+
+    def __init__(self, path: str) -> None:
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS fingerprints (fingerprint TEXT PRIMARY KEY)")
+
+    @classmethod
+    def fingerprint(cls, item) -> str:
+        adapter = ItemAdapter(item)
+        content = '\x1f'.join(str(adapter.get(field, '')) for field in cls.FIELDS)
+
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def known(self, fingerprints: Iterable[str]) -> set[str]:
+        """
+            Returns the subset of the given fingerprints which are already stored
+        """
+        fingerprints = list(fingerprints)
+        known = set()
+
+        for start in range(0, len(fingerprints), self.QUERY_BATCH):
+            batch = fingerprints[start:start + self.QUERY_BATCH]
+            rows = self.connection.execute(
+                f"SELECT fingerprint FROM fingerprints WHERE fingerprint IN ({','.join('?' * len(batch))})", batch)
+            known.update(fingerprint for fingerprint, in rows)
+
+        return known
+
+    def new_items(self, items: list) -> list:
+        """
+            Filters out the already known items, and the repeated ones, and records the new ones
+        """
+        fingerprints = [self.fingerprint(item) for item in items]
+        known = self.known(fingerprints)
+
+        new_items = {}
+        for item, fingerprint in zip(items, fingerprints):
+            if fingerprint not in known:
+                new_items.setdefault(fingerprint, item)
+
+        self.add(new_items)
+
+        return list(new_items.values())
+
+    def add(self, fingerprints: Iterable[str]) -> None:
+        self.connection.executemany("INSERT OR IGNORE INTO fingerprints VALUES (?)",
+                                    ((fingerprint,) for fingerprint in fingerprints))
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,84 @@
+import gzip
+import pickle
+
+from pathlib import Path
+from typing import Iterator
+
+from scrapy import Request
+from scrapy.extensions.httpcache import DummyPolicy
+from scrapy.http import Headers, Response
+from scrapy.responsetypes import responsetypes
+from scrapy.settings import BaseSettings
+from w3lib.http import headers_raw_to_dict
+
+CACHE_MODES = ('off', 'record', 'replay')
+GZIP_MAGIC = b'\x1f\x8b'
+
+# rate limited and failed pages are downloaded again instead of being recorded
+RECORD_IGNORE_HTTP_CODES = [429, 500, 502, 503, 504]
+
+
+class RecordPolicy(DummyPolicy):
+    """
+        Downloads every page and stores it, replacing an earlier recording of the same request
+    """
+
+    def is_cached_response_fresh(self, cachedresponse: Response, request: Request) -> bool:
+        return False
+
+    def is_cached_response_valid(self, cachedresponse: Response, response: Response, request: Request) -> bool:
+        return False
+
+
+class CrawlCacheMode:
+    """
+        Add-on switching the HTTP cache by CRAWL_CACHE_MODE, e.g. `scrapy crawl aldi-reviews -s CRAWL_CACHE_MODE=record`.
+
+        `record` downloads every page and stores the raw response gzipped under CRAWL_CACHE_DIR,
+        keyed by the request fingerprint. `replay` serves the crawl from that cache only:
+        recorded requests are answered from disk, requests missing from the cache are dropped,
+        nothing is downloaded. `off` leaves the HTTP cache settings as they are.
+        HTTPCACHE settings set in `settings.py` or on the command line take precedence over the mode.
+    """
+
+    def update_settings(self, settings: BaseSettings) -> None:
+        mode = settings.get('CRAWL_CACHE_MODE', 'off')
+        assert mode in CACHE_MODES, f"Cache mode {mode} is not one of {CACHE_MODES}"
+
+        if mode == 'off':
+            return
+
+        settings.setdict({'HTTPCACHE_ENABLED': True,
+                          'HTTPCACHE_DIR': settings.get('CRAWL_CACHE_DIR', 'httpcache'),
+                          'HTTPCACHE_STORAGE': 'scrapy.extensions.httpcache.FilesystemCacheStorage',
+                          'HTTPCACHE_GZIP': True,
+                          'HTTPCACHE_EXPIRATION_SECS': 0,
+                          'HTTPCACHE_IGNORE_MISSING': mode == 'replay',
+                          'HTTPCACHE_IGNORE_HTTP_CODES': RECORD_IGNORE_HTTP_CODES,
+                          'HTTPCACHE_POLICY': RecordPolicy if mode == 'record' else DummyPolicy},
+                         priority='addon')
+
+
+def cached_responses(directory: str, spider_name: str) -> Iterator[Response]:
+    """
+        Reads the responses a spider recorded, e.g. as fixtures of parser tests. The responses
+        are read as `FilesystemCacheStorage` stores them, gzipped or not, ordered by request fingerprint.
+        @param directory: the resolved HTTPCACHE_DIR, `.scrapy/httpcache` of the crawlers project by default
+        @param spider_name: name of the recording spider
+
+        @return: responses with the request they answered
+    """
+    for metadata_path in sorted(Path(directory, spider_name).glob('*/*/pickled_meta')):
+        entry = metadata_path.parent
+        gzipped = metadata_path.read_bytes()[:2] == GZIP_MAGIC
+        read = (lambda path: gzip.decompress(path.read_bytes())) if gzipped else (lambda path: path.read_bytes())
+
+        metadata = pickle.loads(read(metadata_path))
+        body = read(entry / 'response_body')
+        headers = Headers(headers_raw_to_dict(read(entry / 'response_headers')))
+        url = metadata['response_url']
+
+        response_class = responsetypes.from_args(headers=headers, url=url, body=body)
+        yield response_class(url=url, status=metadata['status'], headers=headers, body=body,
+                             request=Request(metadata['url'], method=metadata['method']))
+
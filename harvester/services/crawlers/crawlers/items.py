@@ -10,3 +10,10 @@ class AldiReviewsItem(scrapy.Item):
     posting_time = scrapy.Field()
     rating = scrapy.Field()
     comment = scrapy.Field()
+
+
+class TrustpilotReviewsItem(scrapy.Item):
+    company = scrapy.Field()
+    posting_time = scrapy.Field()
+    rating = scrapy.Field()
+    comment = scrapy.Field()
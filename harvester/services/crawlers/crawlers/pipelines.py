@@ -3,11 +3,268 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
+import logging
+import os
+
+import pandas as pd
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
+from scrapy.utils.defer import deferred_from_coro
+from twisted.internet import task
+
+
+class CsvPartWriter:
+    """
+        Appends batches of records to one CSV part file, writing the header with the first batch.
+    """
+    extension = 'csv'
+
+    def __init__(self, path: str) -> None:
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.header_written = False
+
+    def write(self, records: list[dict]) -> None:
+        pd.DataFrame(records).to_csv(self.file, header=not self.header_written, index=False)
+        self.header_written = True
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetPartWriter:
+    """
+        Writes every batch of records as a row group of one Parquet part file.
+    """
+    extension = 'parquet'
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.writer = None
+
+    def write(self, records: list[dict]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pylist(records)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+class PartOutput:
+    """
+        Buffered output of one item stream. Buffered records are written to the current
+        part file on `flush`, a part file is written under a temporary `.inprogress` name
+        and atomically renamed once it holds `rows_per_file` rows or the output is closed.
+    """
+
+    def __init__(self, root: str, writer_class: type, flush_items: int = 500, rows_per_file: int = 0) -> None:
+        """
+            @param root: output path without extension
+            @param writer_class: part writer, `CsvPartWriter` or `ParquetPartWriter`
+            @param flush_items: number of buffered records written at once
+            @param rows_per_file: rows per part file, 0 writes one file
+        """
+        self.root = root
+        self.writer_class = writer_class
+        self.flush_items = flush_items
+        self.rows_per_file = rows_per_file
+
+        self.buffer: list[dict] = []
+        self.writer = None
+        self.part_path: str | None = None
+        self.part = 0
+        self.part_rows = 0
+
+        os.makedirs(os.path.dirname(root) or '.', exist_ok=True)
+
+    def add(self, record: dict) -> None:
+        self.buffer.append(record)
+
+        if len(self.buffer) >= self.flush_items:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+            Writes the buffered records to the current part file
+        """
+        if not self.buffer:
+            return
+
+        if self.writer is None:
+            self.part_path = self._part_path(self.part)
+            self.writer = self.writer_class(f"{self.part_path}.inprogress")
+
+        self.writer.write(self.buffer)
+        self.part_rows += len(self.buffer)
+        self.buffer = []
+
+        if self.rows_per_file and self.part_rows >= self.rows_per_file:
+            self._rotate()
+
+    def close(self) -> None:
+        self.flush()
+        self._rotate()
+
+    def _rotate(self) -> None:
+        """
+            Closes the current part file and moves it to its final name
+        """
+        if self.writer is None:
+            return
+
+        self.writer.close()
+        os.replace(f"{self.part_path}.inprogress", self.part_path)
+        logging.info(f"---{self.part_rows} items written to {self.part_path}---")
+
+        self.writer = None
+        self.part += 1
+        self.part_rows = 0
+
+    def _part_path(self, part: int) -> str:
+        extension = self.writer_class.extension
+
+        if not self.rows_per_file:
+            return f"{self.root}.{extension}"
+
+        return f"{self.root}-{part:05d}.{extension}"
 
 
 class CrawlersPipeline:
+    """
+        Buffered item writer. Items are kept in a small buffer which is flushed to the
+        current part file every `CRAWLERS_FLUSH_ITEMS` items or `CRAWLERS_FLUSH_INTERVAL`
+        seconds, so memory stays flat for crawls of any length. A part file is written
+        under a temporary `.inprogress` name and atomically renamed once it holds
+        `CRAWLERS_ROWS_PER_FILE` rows or the spider closes, see `PartOutput`.
+        The output path is taken from the `filename` attribute of the spider. Items with a
+        `company` field are written without it to `spider.output_filename(company)`,
+        one output per company, the streaming analysis below stays one combined output.
+
+        With `CRAWLERS_STREAM_ANALYSIS` every item is also fed to a `StreamingAnalyzer`,
+        which preprocesses and scores micro-batches of reviews while the crawl goes on and
+        appends them to `<filename>-analyzed`. When its queue is full the item is held
+        back, which stalls the scraper and with it the downloads, until the analysis
+        catches up. This requires the asyncio reactor.
+    """
+    writers = {'csv': CsvPartWriter, 'parquet': ParquetPartWriter}
+
+    def __init__(self,
+                 output_format: str = 'csv',
+                 flush_items: int = 500,
+                 flush_interval: float = 30.0,
+                 rows_per_file: int = 0,
+                 stream_analysis: bool = False,
+                 analysis_batch_items: int = 200,
+                 analysis_max_pending: int = 1_000,
+                 analysis_max_delay: float = 5.0) -> None:
+        assert output_format in self.writers, f"Output format {output_format} is not supported"
+
+        self.writer_class = self.writers[output_format]
+        self.flush_items = flush_items
+        self.flush_interval = flush_interval
+        self.rows_per_file = rows_per_file
+        self.stream_analysis = stream_analysis
+        self.analysis_batch_items = analysis_batch_items
+        self.analysis_max_pending = analysis_max_pending
+        self.analysis_max_delay = analysis_max_delay
+
+        self.outputs: dict[str | None, PartOutput] = {}
+        self.spider = None
+        self.flush_loop: task.LoopingCall | None = None
+        self.analyzer = None
+        self.analysis_writer = None
+        self.analysis_path: str | None = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(output_format=settings.get('CRAWLERS_OUTPUT_FORMAT', 'csv'),
+                   flush_items=settings.getint('CRAWLERS_FLUSH_ITEMS', 500),
+                   flush_interval=settings.getfloat('CRAWLERS_FLUSH_INTERVAL', 30.0),
+                   rows_per_file=settings.getint('CRAWLERS_ROWS_PER_FILE', 0),
+                   stream_analysis=settings.getbool('CRAWLERS_STREAM_ANALYSIS', False),
+                   analysis_batch_items=settings.getint('CRAWLERS_ANALYSIS_BATCH_ITEMS', 200),
+                   analysis_max_pending=settings.getint('CRAWLERS_ANALYSIS_MAX_PENDING', 1_000),
+                   analysis_max_delay=settings.getfloat('CRAWLERS_ANALYSIS_MAX_DELAY', 5.0))
+
+    def open_spider(self, spider):
+        self.spider = spider
+        self.output_root, _ = os.path.splitext(spider.filename)
+        os.makedirs(os.path.dirname(self.output_root) or '.', exist_ok=True)
+
+        if self.flush_interval > 0:
+            self.flush_loop = task.LoopingCall(self.flush)
+            self.flush_loop.start(self.flush_interval, now=False)
+
+        if self.stream_analysis:
+            return deferred_from_coro(self._start_analysis())
+
     def process_item(self, item, spider):
+        record = ItemAdapter(item).asdict()
+        # the company names the output, the combined analysis keeps it as a column
+        self._output(record.get('company')).add({key: value for key, value in record.items() if key != 'company'})
+
+        if self.analyzer is not None and not self.analyzer.offer(record):
+            return deferred_from_coro(self._put_analysis(record, item))
+
         return item
+
+    def close_spider(self, spider):
+        if self.flush_loop is not None and self.flush_loop.running:
+            self.flush_loop.stop()
+
+        for output in self.outputs.values():
+            output.close()
+
+        if self.analyzer is not None:
+            return deferred_from_coro(self._close_analysis())
+
+    async def _start_analysis(self) -> None:
+        # the analysis libraries are imported only when streaming is enabled
+        from harvester.services.streaming_analysis import StreamingAnalyzer
+
+        self.analysis_path = f"{self.output_root}-analyzed.{self.writer_class.extension}"
+        self.analysis_writer = self.writer_class(f"{self.analysis_path}.inprogress")
+        self.analyzer = StreamingAnalyzer(lambda analyzed: self.analysis_writer.write(analyzed.to_dict('records')),
+                                          batch_size=self.analysis_batch_items,
+                                          max_pending=self.analysis_max_pending,
+                                          max_delay=self.analysis_max_delay)
+        await self.analyzer.start()
+
+    async def _put_analysis(self, record: dict, item):
+        await self.analyzer.put(record)
+
+        return item
+
+    async def _close_analysis(self) -> None:
+        try:
+            await self.analyzer.close()
+        finally:
+            self.analysis_writer.close()
+            self.analyzer = None
+
+        if os.path.exists(f"{self.analysis_path}.inprogress"):
+            os.replace(f"{self.analysis_path}.inprogress", self.analysis_path)
+
+    def flush(self) -> None:
+        """
+            Writes the buffered items of every output to its current part file
+        """
+        for output in self.outputs.values():
+            output.flush()
+
+    def _output(self, company: str | None) -> PartOutput:
+        if company not in self.outputs:
+            root = self.output_root if company is None else os.path.splitext(self.spider.output_filename(company))[0]
+            self.outputs[company] = PartOutput(root, self.writer_class,
+                                               flush_items=self.flush_items, rows_per_file=self.rows_per_file)
+
+        return self.outputs[company]
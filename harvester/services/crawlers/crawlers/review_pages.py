@@ -0,0 +1,26 @@
+from typing import Optional
+
+from scrapy.http import Response
+
+NEXT_PAGE_SELECTOR = 'nav.pagination_pagination___F1qS a.pagination-link_next__SDNU4::attr(href)'
+REVIEWS_SELECTOR = 'section.styles_reviewsContainer__3_GQw'
+COMMENT_SELECTOR = 'div.styles_reviewContent__0Q2Tg p.typography_body-l__KUYFJ::text'
+RATING_SELECTOR = 'div.star-rating_starRating__4rrcf img::attr(alt)'
+POSTING_TIME_SELECTOR = 'time::text'
+
+
+def extract_reviews(response: Response) -> tuple[list[tuple[str, str, str]], Optional[str]]:
+    """
+        Selects the reviews of a Trustpilot review page.
+        @param response: review page
+
+        @return: (posting_time, rating, comment) of every review and the link to the next page, if any
+    """
+    next_page = response.css(NEXT_PAGE_SELECTOR).get()
+    review_containers = response.css(REVIEWS_SELECTOR)
+
+    comments = review_containers.css(COMMENT_SELECTOR).getall()
+    ratings = review_containers.css(RATING_SELECTOR).getall()
+    posting_times = review_containers.css(POSTING_TIME_SELECTOR).getall()
+
+    return list(zip(posting_times, ratings, comments)), next_page
@@ -62,9 +62,43 @@ ROBOTSTXT_OBEY = False
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "crawlers.pipelines.CrawlersPipeline": 300,
-#}
+ITEM_PIPELINES = {
+   "crawlers.pipelines.CrawlersPipeline": 300,
+}
+
+# Buffered item writer: output format ("csv" or "parquet"), number of items
+# and seconds between two flushes, rows per part file (0 writes one file)
+CRAWLERS_OUTPUT_FORMAT = "csv"
+CRAWLERS_FLUSH_ITEMS = 500
+CRAWLERS_FLUSH_INTERVAL = 30.0
+CRAWLERS_ROWS_PER_FILE = 0
+
+# Streaming analysis: preprocesses and scores the reviews in micro-batches of at
+# most CRAWLERS_ANALYSIS_BATCH_ITEMS items while crawling, an incomplete batch waits
+# at most CRAWLERS_ANALYSIS_MAX_DELAY seconds and the crawl is held back while
+# CRAWLERS_ANALYSIS_MAX_PENDING items wait for the analysis
+CRAWLERS_STREAM_ANALYSIS = False
+CRAWLERS_ANALYSIS_BATCH_ITEMS = 200
+CRAWLERS_ANALYSIS_MAX_PENDING = 1000
+CRAWLERS_ANALYSIS_MAX_DELAY = 5.0
+
+# Target companies of the trustpilot-reviews spider and their review pages,
+# overridden with `-a targets=...`; every company is written to
+# <company>-reviews.csv and crawled alongside the others
+CRAWLERS_TARGETS = {
+    "aldi": "https://www.trustpilot.com/review/www.aldi.de?languages=all",
+}
+
+# Concurrency and AutoThrottle of the trustpilot-reviews spider only, applied as
+# CONCURRENT_REQUESTS, CONCURRENT_REQUESTS_PER_DOMAIN and AUTOTHROTTLE_* while it
+# crawls; every company has its own download slot, so the per company limit and
+# the AutoThrottle delays apply per company, the other spiders keep the defaults
+TRUSTPILOT_CONCURRENT_REQUESTS = 32
+TRUSTPILOT_CONCURRENT_REQUESTS_PER_COMPANY = 4
+TRUSTPILOT_AUTOTHROTTLE_ENABLED = True
+TRUSTPILOT_AUTOTHROTTLE_START_DELAY = 1
+TRUSTPILOT_AUTOTHROTTLE_MAX_DELAY = 30
+TRUSTPILOT_AUTOTHROTTLE_TARGET_CONCURRENCY = 2.0
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -79,6 +113,16 @@ ROBOTSTXT_OBEY = False
 # Enable showing throttling stats for every response received:
 #AUTOTHROTTLE_DEBUG = False
 
+# Record and replay crawls: "record" downloads every page and stores it gzipped
+# under .scrapy/<CRAWL_CACHE_DIR>, keyed by the request fingerprint, "replay" serves
+# the crawl from there without network access, "off" crawls without the cache,
+# e.g. `scrapy crawl aldi-reviews -s CRAWL_CACHE_MODE=replay`
+ADDONS = {
+   "crawlers.http_cache.CrawlCacheMode": 0,
+}
+CRAWL_CACHE_MODE = "off"
+CRAWL_CACHE_DIR = "httpcache"
+
 # Enable and configure HTTP caching (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
 #HTTPCACHE_ENABLED = True
@@ -1,54 +1,76 @@
 import os
 import logging
 
-import pandas as pd
-
 from scrapy import Request, Spider
 from typing import Any, Iterable
 
+from ..fingerprints import ReviewFingerprintStore
 from ..items import AldiReviewsItem
+from ..review_pages import extract_reviews
 
 
 class AldiReviewsSpider(Spider):
     ALDI_REVIEW_FILENAME = '../../resources/crawler/aldi-reviews.csv'
+    ALDI_FINGERPRINTS_FILENAME = '../../resources/crawler/aldi-reviews-fingerprints.sqlite'
     name = "aldi-reviews"
     url = "https://www.trustpilot.com/review/www.aldi.de?languages=all"
     
-    def __init__(self, *args: Any, filename: str = ALDI_REVIEW_FILENAME, **kwargs: Any):
+    def __init__(self,
+                 *args: Any,
+                 filename: str = ALDI_REVIEW_FILENAME,
+                 incremental: bool | str = False,
+                 fingerprints_filename: str = ALDI_FINGERPRINTS_FILENAME,
+                 **kwargs: Any):
+        """
+            @param filename: output file of the scraped reviews
+            @param incremental: emits only unseen reviews and stops paginating at the first page
+                                made up of already known reviews, `-a incremental=1` on the command line
+            @param fingerprints_filename: SQLite file of the already known reviews
+        """
         super().__init__(*args, **kwargs)
         self.filepath = '../../resources/crawler/'
         self.filename = filename
-        self.data = list()
+        self.incremental = str(incremental).lower() in ('1', 'true', 'yes')
 
         if not os.path.exists(self.filepath):
             os.makedirs(self.filepath)
             logging.info("---directory created---")
         else:
             logging.info("---directory already exists---")
-        
+
+        self.fingerprints = ReviewFingerprintStore(fingerprints_filename) if self.incremental else None
+
     def start_requests(self) -> Iterable[Request]:
         yield Request(url=self.url, callback=self.parse)
 
     def parse(self, response):
-        next_page = response.css('nav.pagination_pagination___F1qS a.pagination-link_next__SDNU4::attr(href)').get()
-        review_containers = response.css('section.styles_reviewsContainer__3_GQw')
+        reviews, next_page = extract_reviews(response)
 
-        comments = review_containers.css('div.styles_reviewContent__0Q2Tg p.typography_body-l__KUYFJ::text').getall()
-        ratings = review_containers.css('div.star-rating_starRating__4rrcf img::attr(alt)').getall()
-        posting_times = review_containers.css('time::text').getall()
-        
-        for posting_time, rating, comment in zip(posting_times, ratings, comments):
+        items = []
+        for posting_time, rating, comment in reviews:
 
             item = AldiReviewsItem()
             item['posting_time'] = posting_time
             item['rating'] = rating
             item['comment'] = comment
 
-            self.data.append(item)   
-        
+            items.append(item)
+
+        if self.fingerprints is not None:
+            new_items = self.fingerprints.new_items(items)
+            if items and not new_items:
+                logging.info(f"---only known reviews on {response.url}, stopping pagination---")
+                return
+            items = new_items
+
+        yield from items
+
         if next_page is not None:
             yield response.follow(next_page, self.parse)
-            
+
     def closed(self, reason):
-        df = pd.DataFrame(self.data)
-        df.to_csv(self.filename, index=False)
+        if self.fingerprints is not None:
+            # fingerprints of an interrupted crawl are discarded, its reviews are crawled again next time
+            if reason == 'finished':
+                self.fingerprints.commit()
+            self.fingerprints.close()
@@ -0,0 +1,156 @@
+import json
+import logging
+import os
+import re
+
+from scrapy import Request, Spider
+from scrapy.settings import BaseSettings
+from typing import Any, Iterable
+
+from ..fingerprints import ReviewFingerprintStore
+from ..items import TrustpilotReviewsItem
+from ..review_pages import extract_reviews
+
+COMPANY_PATTERN = re.compile(r'[\w.-]+')
+
+
+def parse_targets(targets: Any) -> dict[str, str]:
+    """
+        Reads the target companies from a mapping of company names to review page URLs,
+        a list of `{"company": ..., "url": ...}` objects, a JSON file or string of either,
+        or comma separated `company=url` pairs, as given with `-a targets=...`.
+
+        @return: review page URL of every company
+    """
+    if targets is None:
+        return {}
+    if isinstance(targets, str):
+        if os.path.isfile(targets):
+            with open(targets, encoding='utf-8') as file:
+                return parse_targets(json.load(file))
+        if targets.lstrip().startswith(('[', '{')):
+            return parse_targets(json.loads(targets))
+
+        return parse_targets(dict(pair.strip().split('=', 1) for pair in targets.split(',') if pair.strip()))
+    if isinstance(targets, dict):
+        parsed = dict(targets)
+    else:
+        parsed = {target['company']: target['url'] for target in targets}
+
+    for company in parsed:
+        assert COMPANY_PATTERN.fullmatch(company), f"Company {company} must consist of letters, digits, '.', '_' or '-'"
+
+    return parsed
+
+
+class TrustpilotReviewsSpider(Spider):
+    """
+        Crawls the Trustpilot reviews of several companies in one process. Every company is
+        downloaded through its own download slot, so CONCURRENT_REQUESTS_PER_DOMAIN, DOWNLOAD_DELAY
+        and AutoThrottle apply per company although all of them share one host,
+        and a slow company does not hold back the others. The pages of every company are followed
+        one after the other, the companies are crawled side by side, so the crawl takes about as
+        long as its slowest company. Items carry their company, `CrawlersPipeline` writes every
+        company to its own output, `output_filename`.
+
+        The targets are read from CRAWLERS_TARGETS unless they are given with `-a targets=...`,
+        see `parse_targets`. The concurrency and AutoThrottle limits of this spider are read from
+        the TRUSTPILOT_* settings of `settings.py`, see `update_settings`, the other spiders keep
+        the Scrapy settings; `-s` overrides either as usual.
+    """
+    REVIEWS_DIRECTORY = '../../resources/crawler/'
+    SLOT_PREFIX = 'trustpilot-'
+    # project settings of this spider and the Scrapy settings they are applied as
+    SPIDER_SETTINGS = {
+        'TRUSTPILOT_CONCURRENT_REQUESTS': 'CONCURRENT_REQUESTS',
+        'TRUSTPILOT_CONCURRENT_REQUESTS_PER_COMPANY': 'CONCURRENT_REQUESTS_PER_DOMAIN',
+        'TRUSTPILOT_AUTOTHROTTLE_ENABLED': 'AUTOTHROTTLE_ENABLED',
+        'TRUSTPILOT_AUTOTHROTTLE_START_DELAY': 'AUTOTHROTTLE_START_DELAY',
+        'TRUSTPILOT_AUTOTHROTTLE_MAX_DELAY': 'AUTOTHROTTLE_MAX_DELAY',
+        'TRUSTPILOT_AUTOTHROTTLE_TARGET_CONCURRENCY': 'AUTOTHROTTLE_TARGET_CONCURRENCY',
+    }
+    name = "trustpilot-reviews"
+
+    def __init__(self,
+                 *args: Any,
+                 targets: Any = None,
+                 directory: str = REVIEWS_DIRECTORY,
+                 incremental: bool | str = False,
+                 **kwargs: Any):
+        """
+            @param targets: target companies and their review page URLs, CRAWLERS_TARGETS by default
+            @param directory: output directory, every company is written to `<company>-reviews.csv`
+            @param incremental: emits only unseen reviews and stops paginating a company at its first
+                                page made up of already known reviews, `-a incremental=1` on the command line
+        """
+        super().__init__(*args, **kwargs)
+        self.targets = parse_targets(targets) if targets is not None else None
+        self.directory = directory
+        # the combined outputs, such as the streaming analysis, are written next to the companies
+        self.filename = os.path.join(directory, f"{self.name}.csv")
+        self.incremental = str(incremental).lower() in ('1', 'true', 'yes')
+        self.fingerprints: dict[str, ReviewFingerprintStore] = {}
+
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def update_settings(cls, settings: BaseSettings) -> None:
+        """
+            Applies the TRUSTPILOT_* settings at their own priority, so they are edited in `settings.py`
+            like any project setting, take precedence over the Scrapy setting of the same priority
+            and give way to a Scrapy setting given with `-s`
+        """
+        super().update_settings(settings)
+        for name, setting in cls.SPIDER_SETTINGS.items():
+            if name in settings:
+                settings.set(setting, settings[name], priority=settings.getpriority(name))
+
+    @classmethod
+    def from_crawler(cls, crawler, *args: Any, **kwargs: Any):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        if spider.targets is None:
+            spider.targets = parse_targets(crawler.settings.get('CRAWLERS_TARGETS'))
+
+        return spider
+
+    def output_filename(self, company: str) -> str:
+        return os.path.join(self.directory, f"{company}-reviews.csv")
+
+    def start_requests(self) -> Iterable[Request]:
+        assert self.targets, "No target companies to crawl"
+
+        for company, url in self.targets.items():
+            if self.incremental:
+                self.fingerprints[company] = ReviewFingerprintStore(
+                    os.path.join(self.directory, f"{company}-reviews-fingerprints.sqlite"))
+
+            yield Request(url=url, callback=self.parse, meta=self._meta(company))
+
+    def parse(self, response):
+        company = response.meta['company']
+        reviews, next_page = extract_reviews(response)
+
+        items = [TrustpilotReviewsItem(company=company, posting_time=posting_time, rating=rating, comment=comment)
+                 for posting_time, rating, comment in reviews]
+
+        if company in self.fingerprints:
+            new_items = self.fingerprints[company].new_items(items)
+            if items and not new_items:
+                logging.info(f"---only known {company} reviews on {response.url}, stopping pagination---")
+                return
+            items = new_items
+
+        yield from items
+
+        if next_page is not None:
+            yield response.follow(next_page, self.parse, meta=self._meta(company))
+
+    def closed(self, reason):
+        for fingerprints in self.fingerprints.values():
+            # fingerprints of an interrupted crawl are discarded, its reviews are crawled again next time
+            if reason == 'finished':
+                fingerprints.commit()
+            fingerprints.close()
+
+    def _meta(self, company: str) -> dict:
+        return {'company': company, 'download_slot': f"{self.SLOT_PREFIX}{company}"}
@@ -0,0 +1,281 @@
+
+import cProfile
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Optional, Protocol
+
+PROFILERS = ('cprofile', 'tracemalloc')
+
+
+@dataclass
+class StageMetrics:
+    """
+        Measurements of one call of a handler or strategy. Times and the memory delta
+        exclude the nested stages, so a handler does not account for the rest of the chain.
+    """
+    stage: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    memory_delta_bytes: int = 0
+    profile_path: Optional[str] = None
+
+
+class MetricsSink(Protocol):
+    def emit(self, metrics: StageMetrics) -> None:
+        ...
+
+
+class LogSink:
+    """
+        Writes every stage as one structured log record.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO) -> None:
+        self.logger = logger or logging.getLogger('harvester.instrumentation')
+        self.level = level
+
+    def emit(self, metrics: StageMetrics) -> None:
+        record = asdict(metrics)
+        self.logger.log(self.level, "stage metrics %s", json.dumps(record), extra={'metrics': record})
+
+
+class JsonSink:
+    """
+        Appends every stage as one JSON line to a file.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def emit(self, metrics: StageMetrics) -> None:
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(asdict(metrics)) + '\n')
+
+
+class PrometheusSink:
+    """
+        Aggregates the stages of the process into counters and rewrites them in the Prometheus
+        text exposition format after every stage, e.g. for the node exporter textfile collector.
+    """
+    COUNTERS = (('calls', None), ('wall_seconds', 'wall_seconds'), ('cpu_seconds', 'cpu_seconds'),
+                ('rows_in', 'rows_in'), ('rows_out', 'rows_out'))
+
+    def __init__(self, path: str, prefix: str = 'harvester_stage') -> None:
+        self.path = path
+        self.prefix = prefix
+        self.totals: dict[str, dict[str, float]] = {}
+        self.memory: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def emit(self, metrics: StageMetrics) -> None:
+        with self.lock:
+            totals = self.totals.setdefault(metrics.stage, dict.fromkeys((name for name, _ in self.COUNTERS), 0))
+            for name, attribute in self.COUNTERS:
+                totals[name] += 1 if attribute is None else getattr(metrics, attribute) or 0
+            self.memory[metrics.stage] = metrics.memory_delta_bytes
+
+            self._write()
+
+    def _write(self) -> None:
+        lines = []
+        for name, _ in self.COUNTERS:
+            lines.append(f"# TYPE {self.prefix}_{name}_total counter")
+            lines.extend(f'{self.prefix}_{name}_total{{stage="{stage}"}} {totals[name]}'
+                         for stage, totals in self.totals.items())
+        lines.append(f"# TYPE {self.prefix}_memory_delta_bytes gauge")
+        lines.extend(f'{self.prefix}_memory_delta_bytes{{stage="{stage}"}} {memory}'
+                     for stage, memory in self.memory.items())
+
+        with open(f"{self.path}.tmp", 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+        os.replace(f"{self.path}.tmp", self.path)
+
+
+@dataclass
+class _Frame:
+    owner: Any
+    metrics: StageMetrics
+    wall: float
+    cpu: float
+    memory: int
+    child_wall: float = 0.0
+    child_cpu: float = 0.0
+    child_memory: int = 0
+    profiling: bool = False
+    profiler: Optional[cProfile.Profile] = None
+
+
+class Instrumentation:
+    """
+        Per-stage metrics of the handler chain and the ML strategies. Disabled by default,
+        a disabled stage costs one attribute lookup. One stage can additionally be profiled
+        with cProfile, which is paused while nested stages run, or with tracemalloc.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.sinks: list[MetricsSink] = []
+        self.profile_stage: Optional[str] = None
+        self.profiler = 'cprofile'
+        self.profile_dir = '.'
+        self.profiles = 0
+        self.local = threading.local()
+
+    def configure(self,
+                  sinks: list[MetricsSink],
+                  profile_stage: Optional[str] = None,
+                  profiler: str = 'cprofile',
+                  profile_dir: str = '.') -> None:
+        """
+            Enables the instrumentation.
+            @param sinks: receivers of the metrics of every stage
+            @param profile_stage: class name of the handler or strategy to profile
+            @param profiler: `cprofile` or `tracemalloc`
+            @param profile_dir: directory the profiles are written to
+        """
+        assert profiler in PROFILERS, f"Profiler {profiler} is not one of {PROFILERS}"
+
+        self.sinks = list(sinks)
+        self.profile_stage = profile_stage
+        self.profiler = profiler
+        self.profile_dir = profile_dir
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+        self.sinks = []
+        self.profile_stage = None
+
+    @property
+    def stack(self) -> list[_Frame]:
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+
+        return self.local.stack
+
+    def run(self, owner: Any, call: Callable, request: Any) -> Any:
+        """
+            Runs the stage call of the owner and records its metrics.
+        """
+        stack = self.stack
+        if stack and stack[-1].owner is owner:
+            # a subclass extending the `handle` or `execute` of its parent is one stage
+            return call()
+
+        stage = type(owner).__name__
+        frame = _Frame(owner, StageMetrics(stage, rows_in=_rows(request)),
+                       time.perf_counter(), time.process_time(), _rss_bytes())
+
+        if stack and stack[-1].profiler is not None:
+            stack[-1].profiler.disable()
+        if stage == self.profile_stage:
+            self._start_profile(frame)
+
+        stack.append(frame)
+        try:
+            result = call()
+        finally:
+            stack.pop()
+            self._finish(frame, stack)
+
+        if frame.metrics.rows_out is None:
+            frame.metrics.rows_out = _rows(result)
+        for sink in self.sinks:
+            sink.emit(frame.metrics)
+
+        return result
+
+    def dispatching(self, request: Any) -> None:
+        """
+            Marks the output of the current handler, which is passed on to the next one.
+        """
+        if self.enabled and self.stack:
+            self.stack[-1].metrics.rows_out = _rows(request)
+
+    def _finish(self, frame: _Frame, stack: list[_Frame]) -> None:
+        wall = time.perf_counter() - frame.wall
+        cpu = time.process_time() - frame.cpu
+        memory = _rss_bytes() - frame.memory
+
+        if frame.profiling:
+            self._stop_profile(frame)
+
+        frame.metrics.wall_seconds = wall - frame.child_wall
+        frame.metrics.cpu_seconds = cpu - frame.child_cpu
+        frame.metrics.memory_delta_bytes = memory - frame.child_memory
+
+        if stack:
+            parent = stack[-1]
+            parent.child_wall += wall
+            parent.child_cpu += cpu
+            parent.child_memory += memory
+            if parent.profiler is not None:
+                parent.profiler.enable()
+
+    def _start_profile(self, frame: _Frame) -> None:
+        frame.profiling = True
+
+        if self.profiler == 'cprofile':
+            frame.profiler = cProfile.Profile()
+            frame.profiler.enable()
+        elif not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _stop_profile(self, frame: _Frame) -> None:
+        self.profiles += 1
+        path = os.path.join(self.profile_dir, f"{frame.metrics.stage}-{os.getpid()}-{self.profiles}")
+
+        if frame.profiler is not None:
+            frame.profiler.disable()
+            frame.profiler.dump_stats(f"{path}.prof")
+            frame.metrics.profile_path = f"{path}.prof"
+        elif tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            with open(f"{path}.tracemalloc.txt", 'w', encoding='utf-8') as file:
+                file.writelines(f"{statistic}\n" for statistic in snapshot.statistics('lineno')[:50])
+            frame.metrics.profile_path = f"{path}.tracemalloc.txt"
+
+
+def _rows(value: Any) -> Optional[int]:
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+def _rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+
+instrumentation = Instrumentation()
+
+
+def instrumented(method: Callable) -> Callable:
+    """
+        Wraps the `handle` or `execute` method of a stage, the first argument is its input.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not instrumentation.enabled:
+            return method(self, *args, **kwargs)
+
+        request = args[0] if args else kwargs.get('dataset', kwargs.get('request'))
+        return instrumentation.run(self, lambda: method(self, *args, **kwargs), request)
+
+    wrapper.__instrumented__ = True
+
+    return wrapper
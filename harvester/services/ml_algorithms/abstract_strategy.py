@@ -3,12 +3,28 @@ from abc import ABC, abstractmethod
 
 import pandas as pd
 
+from ..instrumentation import instrumented
+
 
 class MLStrategy(ABC):
     """
         The Strategy interface declares operations common to all supported versions
         of machine learning algorithm.
+        A strategy lists the linguistic annotations it can take in `ANNOTATIONS`,
+        see `annotations`, an `AnalysisPlan` computes them once for all its strategies
+        and passes them to `execute` as `annotations`.
     """
+    ANNOTATIONS: frozenset[str] = frozenset()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        """
+            Instruments the `execute` of every concrete strategy, see `instrumentation`
+        """
+        super().__init_subclass__(**kwargs)
+
+        if 'execute' in cls.__dict__:
+            cls.execute = instrumented(cls.__dict__['execute'])
+
     @abstractmethod
     def execute(self, *args, **kwargs) -> pd.DataFrame:
         pass
@@ -0,0 +1,99 @@
+
+from typing import Any, Optional
+
+import pandas as pd
+
+from .abstract_strategy import MLStrategy
+from .annotations import Annotations, Annotator, resolve
+from ..preprocessor.deduplication import canonical_mapping
+from ..review_store import ReviewStore, load_reviews
+
+
+class AnalysisPlan:
+    """
+        Runs several strategies on the same texts and tokenizes them only once. The plan
+        computes the union of the annotations the strategies declare in `ANNOTATIONS`,
+        together with the ones they depend on, and passes them to every strategy which
+        declares any. Annotations no strategy asks for are never computed, only the
+        canonical rows of a deduplicated dataset are annotated and their annotations
+        are passed on without being spread to the duplicates. With an output store the
+        reviews are appended to it once, with the columns of every strategy which
+        analyzes them row by row, such as the sentiment and the aspects.
+
+        plan = (AnalysisPlan()
+                .add(ExtractDominantTopicsStrategy(), num_topics=10)
+                .add(PerformAspectAnalysisStrategy()))
+        topics, aspects = plan.run(dataset, text_column='comment')
+    """
+
+    def __init__(self,
+                 n_workers: Optional[int] = 1,
+                 chunk_size: int = 1_000,
+                 output: Optional[ReviewStore] = None) -> None:
+        """
+            @param n_workers: number of annotation worker processes, `None` uses every available core
+            @param chunk_size: number of texts annotated per batch
+            @param output: store the analyzed reviews are appended to
+        """
+        self.annotator = Annotator(n_workers=n_workers, chunk_size=chunk_size)
+        self.output = output
+        self.steps: list[tuple[MLStrategy, dict[str, Any]]] = []
+        self.annotations: Annotations | None = None
+
+    def add(self, strategy: MLStrategy, **kwargs: Any) -> 'AnalysisPlan':
+        """
+            @param strategy: strategy to run
+            @param kwargs: further arguments of its `execute`
+
+            @return: the plan, so additions can be chained
+        """
+        self.steps.append((strategy, kwargs))
+
+        return self
+
+    @property
+    def required_annotations(self) -> set[str]:
+        return resolve(name for strategy, _ in self.steps for name in strategy.ANNOTATIONS)
+
+    def run(self, dataset: pd.DataFrame | ReviewStore, text_column: str) -> list[pd.DataFrame]:
+        """
+            Annotates the texts and runs the strategies in the order they were added.
+            @param dataset: given dataset or the store it is read from, the store is read once
+            @param text_column: textual column
+
+            @return: result of every strategy
+        """
+        dataset = load_reviews(dataset)
+        names = self.required_annotations
+        mapping = canonical_mapping(dataset)
+
+        if not names:
+            self.annotations = None
+        elif mapping is None:
+            self.annotations = self.annotator.annotate(dataset[text_column].tolist(), names)
+        else:
+            # the strategies take the annotations of the canonical rows as they are
+            self.annotations = self.annotator.annotate(dataset[text_column].take(mapping[0]).tolist(), names)
+
+        results = []
+        for strategy, kwargs in self.steps:
+            if strategy.ANNOTATIONS:
+                kwargs = {**kwargs, 'annotations': self.annotations}
+            results.append(strategy.execute(dataset=dataset, text_column=text_column, **kwargs))
+
+        if self.output is not None:
+            self.output.append(self._analyzed(dataset, results, text_column))
+        return results
+
+    @staticmethod
+    def _analyzed(dataset: pd.DataFrame, results: list[pd.DataFrame], text_column: str) -> pd.DataFrame:
+        """
+            Joins the columns the strategies added to the reviews, results which summarize
+            the reviews, such as the topics, do not hold the texts and are left out
+        """
+        analyzed = dataset
+        for result in results:
+            if text_column in result and result.index.equals(dataset.index):
+                analyzed = analyzed.join(result[[column for column in result.columns if column not in analyzed]])
+
+        return analyzed
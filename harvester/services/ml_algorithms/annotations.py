@@ -0,0 +1,258 @@
+
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from pandas.api.types import union_categoricals
+
+from ..nltk_resources import require
+
+SENTENCES = 'sentences'
+TOKENS = 'tokens'
+POS_TAGS = 'pos_tags'
+WORDS = 'words'
+
+# annotations computed from another one
+DEPENDENCIES = {SENTENCES: (), TOKENS: (SENTENCES,), POS_TAGS: (TOKENS,), WORDS: ()}
+
+
+def resolve(names: Iterable[str]) -> set[str]:
+    """
+        Adds the annotations the given ones are computed from.
+        @param names: requested annotations
+
+        @return: every annotation to compute
+    """
+    resolved = set()
+    pending = list(names)
+
+    while pending:
+        name = pending.pop()
+        assert name in DEPENDENCIES, f"Annotation {name} is not one of {tuple(DEPENDENCIES)}"
+        if name not in resolved:
+            resolved.add(name)
+            pending.extend(DEPENDENCIES[name])
+
+    return resolved
+
+
+def _offsets(lengths: list[int]) -> np.ndarray:
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    return offsets
+
+
+def _take(values, offsets: np.ndarray, positions: Sequence[int]) -> tuple:
+    """
+        Gathers the spans of the given documents from a flat column
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    starts, stops = offsets[positions], offsets[positions + 1]
+    indices = np.concatenate([np.arange(start, stop) for start, stop in zip(starts, stops)]) \
+        if len(positions) else np.empty(0, dtype=np.int64)
+
+    return values[indices], _offsets((stops - starts).tolist())
+
+
+@dataclass
+class Annotations:
+    """
+        Linguistic annotations of a sequence of documents in columnar form. Every annotation
+        is one flat column over all documents and the offsets delimit the span of every
+        document. Text columns are dictionary encoded, so a repeated token or tag is stored
+        once. Tokens and POS tags are aligned, `token_sentences` holds the sentence index of
+        every token within its document. Annotations which were not computed are `None`.
+    """
+    documents: int
+    sentences: Optional[pd.Categorical] = None
+    sentence_offsets: Optional[np.ndarray] = None
+    tokens: Optional[pd.Categorical] = None
+    token_offsets: Optional[np.ndarray] = None
+    token_sentences: Optional[np.ndarray] = None
+    pos_tags: Optional[pd.Categorical] = None
+    words: Optional[pd.Categorical] = None
+    word_offsets: Optional[np.ndarray] = None
+
+    # column: offsets delimiting its documents
+    OFFSETS = {'sentences': 'sentence_offsets', 'tokens': 'token_offsets', 'token_sentences': 'token_offsets',
+               'pos_tags': 'token_offsets', 'words': 'word_offsets'}
+
+    def __len__(self) -> int:
+        return self.documents
+
+    @property
+    def available(self) -> set[str]:
+        return {name for name in DEPENDENCIES if getattr(self, name) is not None}
+
+    def span(self, name: str, document: int) -> list:
+        """
+            @param name: column, an annotation or `token_sentences`
+            @param document: document position
+
+            @return: values of the document
+        """
+        values, offsets = self._column(name)
+
+        return values[offsets[document]:offsets[document + 1]].tolist()
+
+    def spans(self, name: str) -> Iterator[list]:
+        """
+            Iterates over the values of every document, decoding the column once
+        """
+        values, offsets = self._column(name)
+        if isinstance(values, pd.Categorical):
+            values = values.categories.to_numpy(dtype=object)[values.codes]
+
+        for start, stop in zip(offsets[:-1].tolist(), offsets[1:].tolist()):
+            yield values[start:stop].tolist()
+
+    def take(self, positions: Sequence[int]) -> 'Annotations':
+        """
+            @param positions: document positions
+
+            @return: annotations of the given documents, in the given order
+        """
+        taken = Annotations(documents=len(positions))
+
+        for name, offsets in self.OFFSETS.items():
+            if getattr(self, name) is not None:
+                values, document_offsets = _take(getattr(self, name), getattr(self, offsets), positions)
+                setattr(taken, name, values)
+                setattr(taken, offsets, document_offsets)
+
+        return taken
+
+    @classmethod
+    def concat(cls, parts: list['Annotations']) -> 'Annotations':
+        """
+            Joins the annotations of consecutive document chunks
+        """
+        joined = cls(documents=sum(part.documents for part in parts))
+
+        for name, offsets in cls.OFFSETS.items():
+            if not parts or getattr(parts[0], name) is None:
+                continue
+
+            columns = [getattr(part, name) for part in parts]
+            setattr(joined, name, union_categoricals(columns) if isinstance(columns[0], pd.Categorical)
+                    else np.concatenate(columns))
+            setattr(joined, offsets, _offsets([length for part in parts
+                                               for length in np.diff(getattr(part, offsets)).tolist()]))
+
+        return joined
+
+    def _column(self, name: str) -> tuple:
+        values = getattr(self, name)
+        assert values is not None, f"Annotation {name} was not computed"
+
+        return values, getattr(self, self.OFFSETS[name])
+
+
+def canonical_annotations(annotations: Optional[Annotations], canonical: np.ndarray) -> Optional[Annotations]:
+    """
+        Annotations of the canonical rows of a deduplicated dataset, they are given either for
+        every row or, as `AnalysisPlan` computes them, for the canonical rows only. Both are
+        the same without duplicates.
+        @param annotations: annotations of the rows or of the canonical rows
+        @param canonical: positions of the canonical rows, see `canonical_mapping`
+
+        @return: annotations of the canonical rows
+    """
+    if annotations is None or len(annotations) == len(canonical):
+        return annotations
+
+    return annotations.take(canonical)
+
+
+def annotate_chunk(texts: Sequence, names: Iterable[str]) -> Annotations:
+    """
+        Annotates a chunk of documents, POS tagging all of them in one batch.
+        Tokens are word tokens of the sentences, which equals `word_tokenize` on the whole text,
+        words are whitespace separated. Non textual values get empty annotations.
+        @param texts: documents
+        @param names: annotations to compute, together with the ones they depend on
+
+        @return: annotations of the chunk
+    """
+    names = resolve(names)
+    texts = [text if isinstance(text, str) else '' for text in texts]
+    annotations = Annotations(documents=len(texts))
+
+    if SENTENCES in names:
+        require('punkt_tab')
+        from nltk import sent_tokenize, word_tokenize
+
+        documents = [sent_tokenize(text) for text in texts]
+        annotations.sentences = pd.Categorical([sentence for sentences in documents for sentence in sentences])
+        annotations.sentence_offsets = _offsets([len(sentences) for sentences in documents])
+
+        if TOKENS in names:
+            tokens, owners, lengths = [], [], []
+            for sentences in documents:
+                length = len(tokens)
+                for index, sentence in enumerate(sentences):
+                    sentence_tokens = word_tokenize(sentence, preserve_line=True)
+                    tokens.extend(sentence_tokens)
+                    owners.extend([index] * len(sentence_tokens))
+                lengths.append(len(tokens) - length)
+
+            annotations.tokens = pd.Categorical(tokens)
+            annotations.token_offsets = _offsets(lengths)
+            annotations.token_sentences = np.array(owners, dtype=np.int32)
+
+            if POS_TAGS in names:
+                require('averaged_perceptron_tagger_eng')
+                from nltk import pos_tag_sents
+
+                offsets = annotations.token_offsets.tolist()
+                tagged = pos_tag_sents([tokens[start:stop] for start, stop in zip(offsets, offsets[1:])])
+                annotations.pos_tags = pd.Categorical([tag for document in tagged for _, tag in document])
+
+    if WORDS in names:
+        documents = [text.split() for text in texts]
+        annotations.words = pd.Categorical([word for words in documents for word in words])
+        annotations.word_offsets = _offsets([len(words) for words in documents])
+
+    return annotations
+
+
+class Annotator:
+    """
+        Computes the requested annotations of a sequence of documents in chunks,
+        the chunks can be spread across a process pool.
+    """
+
+    def __init__(self, n_workers: Optional[int] = 1, chunk_size: int = 1_000) -> None:
+        """
+            @param n_workers: number of worker processes, `None` uses every available core
+            @param chunk_size: number of documents annotated per chunk
+        """
+        assert chunk_size > 0, "chunk_size must be positive"
+
+        self.n_workers = n_workers if n_workers is not None else os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def annotate(self, texts: Sequence, names: Iterable[str]) -> Annotations:
+        """
+            @param texts: documents
+            @param names: annotations to compute
+
+            @return: annotations of all documents
+        """
+        names = resolve(names)
+        # an empty input is one empty chunk, which still gets the requested columns and offsets
+        chunks = [texts[start:start + self.chunk_size] for start in range(0, len(texts), self.chunk_size)] or [texts]
+
+        if self.n_workers <= 1 or len(chunks) <= 1:
+            parts = [annotate_chunk(chunk, names) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.n_workers, len(chunks))) as executor:
+                parts = list(executor.map(annotate_chunk, chunks, [names] * len(chunks)))
+
+        return parts[0] if len(parts) == 1 else Annotations.concat(parts)
@@ -0,0 +1,113 @@
+
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence
+
+from .annotations import POS_TAGS, SENTENCES, TOKENS, Annotations, annotate_chunk
+
+# a review is split into sentences and word tokens once, the tokens are POS tagged
+REQUIRED_ANNOTATIONS = frozenset({SENTENCES, TOKENS, POS_TAGS})
+
+
+def _label(polarity: float) -> str:
+    return 'POSITIVE' if polarity > 0 else 'NEGATIVE' if polarity < 0 else 'NEUTRAL'
+
+
+def _aspects_and_sentiments(sentences: list[str], tagged: list[tuple[str, str]], owners: list[int]) -> list:
+    """
+        Labels every noun of a review with the polarity of the first sentence
+        mentioning it. The sentence index of every aspect is computed once,
+        the polarity once per sentence.
+        @param sentences: sentences of the review
+        @param tagged: POS tagged tokens of the review
+        @param owners: sentence index of every token
+
+        @return: list of (aspect, label) tuples
+    """
+    from textblob import TextBlob
+
+    aspects = [(word, owner) for (word, pos), owner in zip(tagged, owners) if pos.startswith('NN')]
+
+    sentence_index: dict[str, int] = {}
+    for aspect, owner in aspects:
+        if aspect not in sentence_index:
+            # The first mention is at the latest in the sentence the token comes from
+            sentence_index[aspect] = next(
+                (index for index in range(owner + 1) if aspect in sentences[index]), owner)
+
+    polarities = {index: TextBlob(sentences[index]).sentiment.polarity
+                  for index in set(sentence_index.values())}
+
+    return [(aspect, _label(polarities[sentence_index[aspect]])) for aspect, _ in aspects]
+
+
+def _aspects_of(annotations: Annotations) -> list[list]:
+    """
+        Extracts the aspects of annotated reviews, see `annotations.POS_TAGS`
+    """
+    return [
+        _aspects_and_sentiments(sentences, list(zip(tokens, tags)), owners)
+        for sentences, tokens, tags, owners in zip(annotations.spans(SENTENCES), annotations.spans(TOKENS),
+                                                   annotations.spans(POS_TAGS), annotations.spans('token_sentences'))
+    ]
+
+
+def _extract_chunk(texts: Sequence) -> list[list]:
+    """
+        Extracts the aspects of a chunk of reviews, POS tagging all of them in one batch.
+        Non textual values get no aspects.
+    """
+    return _aspects_of(annotate_chunk(texts, REQUIRED_ANNOTATIONS))
+
+
+class AspectEngine:
+    """
+        Single-pass aspect extraction engine. Every review is tokenized and
+        POS tagged once, reviews are tagged in batches and the batches can be
+        spread across a process pool.
+    """
+
+    def __init__(self, n_workers: Optional[int] = 1, chunk_size: int = 1_000) -> None:
+        """
+            @param n_workers: number of worker processes, `None` uses every available core
+            @param chunk_size: number of reviews tagged per batch
+        """
+        assert chunk_size > 0, "chunk_size must be positive"
+
+        self.n_workers = n_workers if n_workers is not None else os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def extract(self, texts: Sequence) -> list[list]:
+        """
+            Extracts aspects and their sentiment labels.
+            @param texts: sequence of reviews
+
+            @return: list of (aspect, label) tuples for every review
+        """
+        chunks = [texts[start:start + self.chunk_size] for start in range(0, len(texts), self.chunk_size)]
+
+        if self.n_workers <= 1 or len(chunks) <= 1:
+            return [aspects for chunk in chunks for aspects in _extract_chunk(chunk)]
+
+        with ProcessPoolExecutor(max_workers=min(self.n_workers, len(chunks))) as executor:
+            return [aspects for chunk_aspects in executor.map(_extract_chunk, chunks) for aspects in chunk_aspects]
+
+    def extract_annotated(self, annotations: Annotations) -> list[list]:
+        """
+            Extracts aspects and their sentiment labels from already annotated reviews.
+            @param annotations: annotations holding at least `REQUIRED_ANNOTATIONS`
+
+            @return: list of (aspect, label) tuples for every review
+        """
+        assert REQUIRED_ANNOTATIONS <= annotations.available, \
+            f"Aspect extraction requires the annotations {sorted(REQUIRED_ANNOTATIONS)}"
+
+        if self.n_workers <= 1 or len(annotations) <= self.chunk_size:
+            return _aspects_of(annotations)
+
+        chunks = [annotations.take(range(start, min(start + self.chunk_size, len(annotations))))
+                  for start in range(0, len(annotations), self.chunk_size)]
+
+        with ProcessPoolExecutor(max_workers=min(self.n_workers, len(chunks))) as executor:
+            return [aspects for chunk_aspects in executor.map(_aspects_of, chunks) for aspects in chunk_aspects]
@@ -1,97 +1,320 @@
 
-import nltk
+from __future__ import annotations
+
+import os
+
+import numpy as np
 import pandas as pd
 
 from collections import Counter
 
-from gensim.corpora.dictionary import Dictionary
-from gensim.models.ldamodel import LdaModel
-from nltk import pos_tag, sent_tokenize, word_tokenize
-from nltk.sentiment import SentimentIntensityAnalyzer
-from textblob import TextBlob
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
+
+from numpy.typing import DTypeLike
 
 from .abstract_strategy import MLStrategy
+from .annotations import WORDS, Annotations, canonical_annotations
+from .aspect_engine import REQUIRED_ANNOTATIONS, AspectEngine
+from .sentiment_engine import SENTIMENT_COLUMNS, SentimentEngine
+from .topic_engine import TopicInferenceEngine, dominant_topics
+from .topic_sweep import TopicSweep
+from ..preprocessor.deduplication import CANONICAL_COLUMN, canonical_mapping
+from ..result_cache import ResultCache, cached_apply
+from ..review_store import ReviewStore, load_reviews
 
-nltk.download('averaged_perceptron_tagger', quiet=True)
-nltk.download('vader_lexicon', quiet=True)
-nltk.download('averaged_perceptron_tagger_eng', quiet=True)
+if TYPE_CHECKING:
+    # gensim is imported on first use, it takes most of the import time of this module
+    from gensim.corpora.dictionary import Dictionary
+    from gensim.corpora.mmcorpus import MmCorpus
+    from gensim.models.ldamodel import LdaModel
 
 
 class CreateSentimentAnalysisStrategy(MLStrategy):
-    def execute(self, dataset: pd.DataFrame, text_column: str) -> pd.DataFrame:
+    CACHE_STAGE = 'sentiment:vader:1'
+
+    def __init__(self,
+                 n_workers: int | None = 1,
+                 chunk_size: int = 10_000,
+                 cache: ResultCache | None = None,
+                 dtype: DTypeLike = np.float64,
+                 output: ReviewStore | None = None):
+        """
+            @param n_workers: number of worker processes, `None` uses every available core
+            @param chunk_size: number of texts scored per worker task
+            @param cache: result cache, only the texts which are not cached yet are scored
+            @param dtype: float dtype of the sentiment columns, `np.float32` halves their memory
+            @param output: store the analyzed reviews are appended to
         """
-            Creates sentiment analysis to given dataset and column name.
-            @param dataset: given dataset
+        self.engine = SentimentEngine(n_workers=n_workers, chunk_size=chunk_size, dtype=dtype)
+        self.cache = cache
+        self.output = output
+
+    def execute(self, dataset: pd.DataFrame | ReviewStore, text_column: str) -> pd.DataFrame:
+        """
+            Creates sentiment analysis to given dataset and column name. Only the canonical rows
+            of a deduplicated dataset are scored, their duplicates take over their scores.
+            @param dataset: given dataset or the store it is read from
             @param text_column: textual column
 
             @return: pre-processed dataset with sentiment analysis data
         """
-        sentiments = dataset[text_column].apply(
-            lambda text: SentimentIntensityAnalyzer().polarity_scores(text)
-            if isinstance(text, str)
-            else {'neg': None, 'neu': None, 'pos': None, 'compound': None})
-
-        sentiment_df = pd.json_normalize(sentiments)
+        dataset = load_reviews(dataset)
+        mapping = canonical_mapping(dataset)
+        texts = dataset[text_column].tolist() if mapping is None else dataset[text_column].take(mapping[0]).tolist()
+        if self.cache is None:
+            scores = self.engine.score(texts)
+        else:
+            scores = np.array(cached_apply(self.cache, self.CACHE_STAGE, texts,
+                                           lambda batch: [tuple(row) for row in self.engine.score(batch)]),
+                              dtype=self.engine.dtype).reshape(-1, len(SENTIMENT_COLUMNS))
+        if mapping is not None:
+            scores = scores[mapping[1]]
+        sentiment_df = pd.DataFrame(scores, index=dataset.index, columns=list(SENTIMENT_COLUMNS))
+        analyzed = pd.concat([dataset, sentiment_df], axis=1)
 
-        return pd.concat([dataset, sentiment_df], axis=1)
+        if self.output is not None:
+            self.output.append(analyzed)
+        return analyzed
 
 
 class ExtractDominantTopicsStrategy(MLStrategy):
-    def __init__(self):
-        self.lda_model: LdaModel
-        self.corpus: list
-        self.id2word: Dictionary
+    DICTIONARY_FILENAME = 'dictionary.gensim'
+    LDA_MODEL_FILENAME = 'lda_model.gensim'
+    MODES = ('train', 'update', 'score')
+    ANNOTATIONS = frozenset({WORDS})
+
+    def __init__(self,
+                 model_dir: str | None = None,
+                 workers: int = 1,
+                 corpus_path: str | None = None,
+                 inference_chunk_size: int = 2_000):
+        """
+            @param model_dir: directory the dictionary and the LDA model are saved to and loaded from
+            @param workers: number of LDA worker processes, more than one trains with `LdaMulticore`
+                            and infers the document topics in parallel
+            @param corpus_path: Matrix Market file the corpus is streamed into instead of being kept
+                                as a Python list in memory
+            @param inference_chunk_size: number of documents per batch topic inference
+        """
+        self.model_dir = model_dir
+        self.workers = workers
+        self.corpus_path = corpus_path
+        self.inference_engine = TopicInferenceEngine(n_workers=workers, chunk_size=inference_chunk_size)
+        self.lda_model: LdaModel | None = None
+        self.corpus: list | MmCorpus
+        self.id2word: Dictionary | None = None
+        self.document_topics: np.ndarray | None = None
 
     def execute(self,
-                dataset: pd.DataFrame,
+                dataset: pd.DataFrame | ReviewStore,
                 text_column: str,
                 num_topics: int,
                 minimum_probability: float = .8,
-                most_common_elements: int = 10) -> pd.DataFrame:
+                most_common_elements: int = 10,
+                mode: str = 'train',
+                annotations: Annotations | None = None) -> pd.DataFrame:
         """
-            Extracts dominant topics from given dataset and column name.
-            @param dataset: given dataset
+            Extracts dominant topics from given dataset and column name. Only the canonical rows of
+            a deduplicated dataset are trained on and scored, their duplicates take over their topics,
+            so repeated comments do not skew the model.
+            @param dataset: given dataset or the store it is read from, only the textual and the
+                            canonical row columns are read
             @param text_column: textual column
             @param num_topics: the number of topics
             @param minimum_probability: sets a threshold for the dominant topics
             @param most_common_elements: most common elements
+            @param mode: `train` trains a new model, `update` extends the dictionary and updates
+                         the saved model with the given documents only, `score` assigns the topics
+                         with the saved model without training
+            @param annotations: annotations of the texts holding their words, the texts are split otherwise,
+                                see `canonical_annotations` for a deduplicated dataset
 
             @return: dataframe with dominant topics
         """
-        words = dataset[text_column].apply(lambda doc: doc.split()).tolist()
-        self._create_dictionary_and_corpus(words)
-        self._train_lda_model(num_topics=num_topics)
+        assert mode in self.MODES, f"Mode {mode} is not one of {self.MODES}"
+
+        texts, annotations, mapping = self._canonical_texts(dataset, text_column, annotations)
+
+        if mode == 'train':
+            self._create_dictionary_and_corpus(texts, annotations)
+            self._train_lda_model(num_topics=num_topics)
+        else:
+            self._ensure_model_loaded()
+            if mode == 'update':
+                self.id2word.add_documents(self._tokenize(texts, annotations))
+            self.corpus = self._build_corpus(
+                self._known_terms(self.id2word.doc2bow(words)) for words in self._tokenize(texts, annotations))
+            if mode == 'update':
+                self.lda_model.update(self.corpus)
+
+        if mode != 'score':
+            self.save()
+
         topics = self._extract_dominant_topics(minimum_probability=minimum_probability)
+        if mapping is not None:
+            self.document_topics = self.document_topics[mapping[1]]
+            topics = [topics[position] for position in mapping[1].tolist()]
 
         return self._summarize_topics(topics, num_topics, most_common_elements)
 
-    def _create_dictionary_and_corpus(self, words: list[list[str]]) -> None:
-        self.id2word = Dictionary(words)
-        self.corpus = [self.id2word.doc2bow(word) for word in words]
+    def sweep(self,
+              dataset: pd.DataFrame | ReviewStore,
+              text_column: str,
+              topic_counts: Iterable[int],
+              n_workers: int | None = None,
+              coherence: str = 'u_mass',
+              patience: int | None = None,
+              min_delta: float = 0.,
+              annotations: Annotations | None = None) -> pd.DataFrame:
+        """
+            Trains a model for every topic count in parallel, see `TopicSweep`, the dictionary and the
+            corpus are built once. The model with the best coherence becomes the model of the strategy
+            and is saved, `execute` with mode `score` assigns its topics.
+            @param dataset: given dataset or the store it is read from
+            @param text_column: textual column
+            @param topic_counts: topic counts to train, in the order they are swept
+            @param n_workers: number of worker processes, `None` uses every available core
+            @param coherence: coherence measure, see `topic_sweep.COHERENCE_MEASURES`
+            @param patience: number of topic counts without improvement after which the sweep stops
+            @param min_delta: smallest coherence gain counted as an improvement
+            @param annotations: annotations of the texts holding their words, the texts are split otherwise,
+                                see `canonical_annotations` for a deduplicated dataset
+
+            @return: topic counts ranked by coherence
+        """
+        from gensim.corpora.dictionary import Dictionary
+
+        texts, annotations, _ = self._canonical_texts(dataset, text_column, annotations)
+        self.id2word = Dictionary(self._tokenize(texts, annotations))
+        result = TopicSweep(n_workers=n_workers, coherence=coherence, patience=patience, min_delta=min_delta,
+                            work_dir=os.path.dirname(self.corpus_path) if self.corpus_path else None).run(
+            self.id2word, (self.id2word.doc2bow(words) for words in self._tokenize(texts, annotations)),
+            topic_counts, texts=list(self._tokenize(texts, annotations)) if coherence != 'u_mass' else None)
+
+        self.lda_model = result.best_model
+        self.save()
+
+        return result.table
+
+    def infer(self, texts: Iterable[str]) -> np.ndarray:
+        """
+            Infers the topic distribution of every text with the trained or saved model, the model
+            and the dictionary are left unchanged.
+            @param texts: preprocessed texts
+
+            @return: normalized matrix of shape (texts, topics)
+        """
+        self._ensure_model_loaded()
+
+        return self.inference_engine.infer(
+            self.lda_model, [self._known_terms(self.id2word.doc2bow(words)) for words in self._tokenize(texts)])
+
+    def save(self) -> None:
+        """
+            Saves the dictionary and the LDA model to the model directory, if one is configured
+        """
+        if self.model_dir is None:
+            return
+
+        os.makedirs(self.model_dir, exist_ok=True)
+        self.id2word.save(os.path.join(self.model_dir, self.DICTIONARY_FILENAME))
+        self.lda_model.save(os.path.join(self.model_dir, self.LDA_MODEL_FILENAME))
+
+    def load(self) -> None:
+        """
+            Loads the dictionary and the LDA model from the model directory
+        """
+        assert self.model_dir is not None, "A model directory is required to load a model"
+
+        from gensim.corpora.dictionary import Dictionary
+        from gensim.models.ldamodel import LdaModel
+
+        self.id2word = Dictionary.load(os.path.join(self.model_dir, self.DICTIONARY_FILENAME))
+        self.lda_model = LdaModel.load(os.path.join(self.model_dir, self.LDA_MODEL_FILENAME))
+        self.lda_model.id2word = self.id2word
+
+    def _ensure_model_loaded(self) -> None:
+        if self.lda_model is None:
+            self.load()
+
+    def _known_terms(self, doc_bow: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+            The vocabulary of a trained LDA model is fixed, terms added to the dictionary
+            by later updates are ignored until the next full training.
+        """
+        return [(term_id, count) for term_id, count in doc_bow if term_id < self.lda_model.num_terms]
+
+    @staticmethod
+    def _canonical_texts(dataset: pd.DataFrame | ReviewStore,
+                         text_column: str,
+                         annotations: Annotations | None) -> tuple[pd.Series, Annotations | None, tuple | None]:
+        """
+            Reads the texts, only the canonical ones of a deduplicated dataset together with their annotations
+        """
+        dataset = load_reviews(dataset, columns=[text_column, CANONICAL_COLUMN])
+        texts = dataset[text_column]
+        mapping = canonical_mapping(dataset)
+        if mapping is not None:
+            texts = texts.take(mapping[0])
+            annotations = canonical_annotations(annotations, mapping[0])
+
+        return texts, annotations, mapping
+
+    @staticmethod
+    def _tokenize(texts: Iterable[str], annotations: Annotations | None = None) -> Iterator[list[str]]:
+        if annotations is not None:
+            return annotations.spans(WORDS)
+
+        return (doc.split() for doc in texts)
+
+    def _build_corpus(self, doc_bows: Iterable[list[tuple[int, int]]]) -> list | MmCorpus:
+        """
+            Materializes the bag of words documents as a list, or streams them into
+            the Matrix Market file when a corpus path is configured.
+        """
+        if self.corpus_path is None:
+            return list(doc_bows)
+
+        from gensim.corpora.mmcorpus import MmCorpus
+
+        MmCorpus.serialize(self.corpus_path, doc_bows)
+
+        return MmCorpus(self.corpus_path)
+
+    def _create_dictionary_and_corpus(self, texts: Iterable[str], annotations: Annotations | None = None) -> None:
+        """
+            Builds the dictionary and the corpus in two passes over the texts,
+            without holding the tokenized documents in memory.
+        """
+        from gensim.corpora.dictionary import Dictionary
+
+        self.id2word = Dictionary(self._tokenize(texts, annotations))
+        self.corpus = self._build_corpus(self.id2word.doc2bow(words) for words in self._tokenize(texts, annotations))
 
     def _train_lda_model(self, num_topics: int, random_state: int = 42) -> None:
-        self.lda_model = LdaModel(corpus=self.corpus, id2word=self.id2word,
-                                  num_topics=num_topics, random_state=random_state)
+        from gensim.models.ldamodel import LdaModel
+        from gensim.models.ldamulticore import LdaMulticore
+
+        if self.workers > 1:
+            self.lda_model = LdaMulticore(corpus=self.corpus, id2word=self.id2word, num_topics=num_topics,
+                                          random_state=random_state, workers=self.workers)
+        else:
+            self.lda_model = LdaModel(corpus=self.corpus, id2word=self.id2word,
+                                      num_topics=num_topics, random_state=random_state)
 
     def _extract_dominant_topics(self, minimum_probability: float) -> list:
         """
             Designed to extract the most dominant topic for each document in the corpus.
-            For each document (doc_bow), this function retrieves a list of topics
-            with their associated probabilities. The result is a list of tuples,
-            where each tuple contains a topic ID and its probability.
+            The topic distributions of all documents are inferred in batches into the
+            `document_topics` matrix (documents x topics), which is kept for reuse.
+            The dominant topic of a document is its most probable topic, or `None`
+            when no topic reaches the threshold.
             @param minimum_probability: sets a threshold for the dominant topics
-            @return:
+            @return: dominant topic id of every document
         """
-        probability_index: int = 1
-        topic_id_index: int = 0
-
-        return [
-            max(self.lda_model.get_document_topics(
-                doc_bow, minimum_probability=minimum_probability),
-                key=lambda topic: topic[probability_index], default=(None,))[topic_id_index]
+        self.document_topics = self.inference_engine.infer(self.lda_model, self.corpus)
 
-            for doc_bow in self.corpus
-        ]
+        return dominant_topics(self.document_topics, minimum_probability)
 
     def _summarize_topics(self, topics: list[int], num_words: int, most_common_elements: int) -> pd.DataFrame:
         """
@@ -114,23 +337,80 @@ class ExtractDominantTopicsStrategy(MLStrategy):
 
 
 class PerformAspectAnalysisStrategy(MLStrategy):
+    CACHE_STAGE = 'aspects:pos-textblob:1'
+    ANNOTATIONS = REQUIRED_ANNOTATIONS
+
+    def __init__(self,
+                 n_workers: int | None = 1,
+                 chunk_size: int = 1_000,
+                 cache: ResultCache | None = None,
+                 output: ReviewStore | None = None):
+        """
+            @param n_workers: number of worker processes, `None` uses every available core
+            @param chunk_size: number of reviews POS tagged per batch
+            @param cache: result cache, only the reviews which are not cached yet are analyzed
+            @param output: store the analyzed reviews are appended to, the aspects are read back
+                           as lists of [aspect, label] pairs
+        """
+        self.engine = AspectEngine(n_workers=n_workers, chunk_size=chunk_size)
+        self.cache = cache
+        self.output = output
+
     def execute(self,
-                dataset: pd.DataFrame,
+                dataset: pd.DataFrame | ReviewStore,
                 text_column: str,
-                aspects_sentiments_column: str = 'aspects_sentiments') -> pd.DataFrame:
+                aspects_sentiments_column: str = 'aspects_sentiments',
+                annotations: Annotations | None = None) -> pd.DataFrame:
+        """
+            Extracts the aspects of every review and labels them with the sentiment of their sentence.
+            Only the canonical rows of a deduplicated dataset are analyzed, their duplicates take over their aspects.
+            @param dataset: given dataset or the store it is read from
+            @param text_column: textual column
+            @param aspects_sentiments_column: column the (aspect, label) tuples are written to
+            @param annotations: sentences, tokens and POS tags of the texts, they are computed otherwise,
+                                see `canonical_annotations` for a deduplicated dataset
+
+            @return: dataset with the aspects column
+        """
+        dataset = load_reviews(dataset)
+        mapping = canonical_mapping(dataset)
+        texts = dataset[text_column].tolist()
+        if mapping is not None:
+            texts = [texts[position] for position in mapping[0].tolist()]
+            annotations = canonical_annotations(annotations, mapping[0])
+        extract = self.engine.extract if annotations is None else self._annotated_extractor(texts, annotations)
+
+        aspects = cached_apply(self.cache, self.CACHE_STAGE, texts, extract)
+        if mapping is not None:
+            aspects = [aspects[position] for position in mapping[1].tolist()]
+        dataset[aspects_sentiments_column] = pd.Series(aspects, index=dataset.index, dtype=object)
 
-        dataset[aspects_sentiments_column] = dataset[text_column].apply(self._extract_aspects_and_sentiments)
+        if self.output is not None:
+            self.output.append(dataset)
         return dataset
 
+    def _annotated_extractor(self, texts: list, annotations: Annotations) -> Callable[[list], list]:
+        """
+            Extracts the aspects of a batch of the texts from their annotations,
+            the cache passes only the distinct texts which are not cached yet
+        """
+        assert len(texts) == len(annotations), "The annotations do not belong to the texts"
+
+        if self.cache is None:
+            return lambda batch: self.engine.extract_annotated(annotations)
+
+        positions: dict[str, int] = {}
+        for position, text in enumerate(texts):
+            if isinstance(text, str):
+                positions.setdefault(text, position)
+
+        def extract(batch: list) -> list:
+            aspects = iter(self.engine.extract_annotated(
+                annotations.take([positions[text] for text in batch if isinstance(text, str)])))
+
+            return [next(aspects) if isinstance(text, str) else [] for text in batch]
+
+        return extract
+
     def _extract_aspects_and_sentiments(self, text: str) -> list:
-        word = word_tokenize(text)
-        pos_tags = pos_tag(word)
-        aspects = [word for word, pos in pos_tags if pos.startswith('NN')]
-
-        return [
-            (aspect,
-             'POSITIVE' if (sentiment := TextBlob(next(
-                 sent for sent in sent_tokenize(text) if aspect in sent)).sentiment.polarity) > 0
-             else 'NEGATIVE' if sentiment < 0 else 'NEUTRAL')
-            for aspect in aspects
-        ]
+        return self.engine.extract([text])[0]
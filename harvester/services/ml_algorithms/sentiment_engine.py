@@ -0,0 +1,102 @@
+
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Optional, Sequence
+
+import numpy as np
+
+from numpy.typing import DTypeLike
+
+from ..nltk_resources import require
+
+if TYPE_CHECKING:
+    from nltk.sentiment import SentimentIntensityAnalyzer
+
+SENTIMENT_COLUMNS = ('neg', 'neu', 'pos', 'compound')
+
+_analyzer: Optional['SentimentIntensityAnalyzer'] = None
+
+
+def _get_analyzer() -> 'SentimentIntensityAnalyzer':
+    """
+        Returns the analyzer of the current process, the VADER lexicon is loaded
+        only once per worker instead of once per row, and not before the first text is scored.
+    """
+    global _analyzer
+
+    if _analyzer is None:
+        require('vader_lexicon')
+        from nltk.sentiment import SentimentIntensityAnalyzer
+
+        _analyzer = SentimentIntensityAnalyzer()
+
+    return _analyzer
+
+
+def _score_chunk(texts: Sequence, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+        Scores a chunk of texts into a float array with one row per text.
+        Non textual values are left as NaN.
+        @param texts: chunk of texts
+        @param out: preallocated array of shape (len(texts), 4), allocated when missing
+
+        @return: array with the `neg`, `neu`, `pos` and `compound` scores
+    """
+    if out is None:
+        out = np.empty((len(texts), len(SENTIMENT_COLUMNS)))
+
+    out.fill(np.nan)
+    analyzer = _get_analyzer()
+
+    for row, text in enumerate(texts):
+        if isinstance(text, str):
+            scores = analyzer.polarity_scores(text)
+            out[row] = (scores['neg'], scores['neu'], scores['pos'], scores['compound'])
+
+    return out
+
+
+class SentimentEngine:
+    """
+        Batched VADER scoring engine. The texts are split into chunks which are
+        scored either in the current process or across a process pool, every
+        worker keeping a single analyzer. Scores are written into one
+        preallocated float array.
+    """
+
+    def __init__(self, n_workers: Optional[int] = 1, chunk_size: int = 10_000, dtype: DTypeLike = np.float64) -> None:
+        """
+            @param n_workers: number of worker processes, `None` uses every available core
+            @param chunk_size: number of texts scored per task
+            @param dtype: float dtype of the scores, `np.float32` halves their memory
+        """
+        assert chunk_size > 0, "chunk_size must be positive"
+
+        self.n_workers = n_workers if n_workers is not None else os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.dtype = dtype
+
+    def score(self, texts: Sequence) -> np.ndarray:
+        """
+            Scores the given texts.
+            @param texts: sequence of texts, non textual values get NaN scores
+
+            @return: array of shape (len(texts), 4) ordered as `SENTIMENT_COLUMNS`
+        """
+        scores = np.empty((len(texts), len(SENTIMENT_COLUMNS)), dtype=self.dtype)
+        starts = range(0, len(texts), self.chunk_size)
+
+        if self.n_workers <= 1 or len(starts) <= 1:
+            for start in starts:
+                end = start + self.chunk_size
+                _score_chunk(texts[start:end], out=scores[start:end])
+
+            return scores
+
+        with ProcessPoolExecutor(max_workers=min(self.n_workers, len(starts))) as executor:
+            chunks = (texts[start:start + self.chunk_size] for start in starts)
+            for start, chunk_scores in zip(starts, executor.map(_score_chunk, chunks)):
+                scores[start:start + len(chunk_scores)] = chunk_scores
+
+        return scores
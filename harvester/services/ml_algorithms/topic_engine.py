@@ -0,0 +1,112 @@
+
+from __future__ import annotations
+
+import os
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from gensim.models.ldamodel import LdaModel
+
+_lda_model: Optional[LdaModel] = None
+
+
+def _init_worker(lda_model: LdaModel) -> None:
+    """
+        Receives the model once per worker instead of once per chunk.
+    """
+    global _lda_model
+    _lda_model = lda_model
+
+
+def _infer_chunk(chunk: list, random_state: tuple) -> np.ndarray:
+    """
+        Infers the topic weights of a chunk, starting from the random state the
+        model would have reached had the chunks been inferred one after the other.
+    """
+    _lda_model.random_state.set_state(random_state)
+    gamma, _ = _lda_model.inference(chunk)
+
+    return gamma
+
+
+def dominant_topics(document_topics: np.ndarray, minimum_probability: float) -> list:
+    """
+        Picks the most probable topic of every document, `None` when it is below the threshold.
+        @param document_topics: document-topic probability matrix
+        @param minimum_probability: sets a threshold for the dominant topics
+
+        @return: dominant topic id of every document
+    """
+    best_topics = document_topics.argmax(axis=1)
+    best_probabilities = document_topics[np.arange(len(document_topics)), best_topics]
+    # same floor as `LdaModel.get_document_topics`
+    is_dominant = best_probabilities >= max(minimum_probability, 1e-8)
+
+    return [int(topic) if dominant else None for topic, dominant in zip(best_topics, is_dominant)]
+
+
+class TopicInferenceEngine:
+    """
+        Batch topic inference. The corpus is inferred in chunks into one dense
+        document-topic matrix, optionally across a process pool. Each chunk starts from
+        the random state the model would have after the previous chunks, so the
+        probabilities equal the ones of per-document `get_document_topics` calls.
+    """
+
+    def __init__(self, n_workers: Optional[int] = 1, chunk_size: int = 2_000) -> None:
+        """
+            @param n_workers: number of worker processes, `None` uses every available core
+            @param chunk_size: number of documents inferred per chunk
+        """
+        assert chunk_size > 0, "chunk_size must be positive"
+
+        self.n_workers = n_workers if n_workers is not None else os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def infer(self, lda_model: LdaModel, corpus: Iterable) -> np.ndarray:
+        """
+            Infers the topic distribution of every document.
+            @param lda_model: trained model
+            @param corpus: bag of words documents
+
+            @return: normalized matrix of shape (documents, topics)
+        """
+        gammas = self._infer_serial(lda_model, corpus) if self.n_workers <= 1 \
+            else self._infer_parallel(lda_model, corpus)
+        gamma = np.concatenate(gammas) if gammas else np.empty((0, lda_model.num_topics), dtype=lda_model.dtype)
+
+        return gamma / gamma.sum(axis=1, keepdims=True)
+
+    def _chunks(self, corpus: Iterable) -> Iterable[list]:
+        documents = iter(corpus)
+        while chunk := list(islice(documents, self.chunk_size)):
+            yield chunk
+
+    def _infer_serial(self, lda_model: LdaModel, corpus: Iterable) -> list[np.ndarray]:
+        return [lda_model.inference(chunk)[0] for chunk in self._chunks(corpus)]
+
+    def _infer_parallel(self, lda_model: LdaModel, corpus: Iterable) -> list[np.ndarray]:
+        gammas = []
+        pending = deque()
+        random_state = lda_model.random_state
+
+        with ProcessPoolExecutor(max_workers=self.n_workers,
+                                 initializer=_init_worker,
+                                 initargs=(lda_model,)) as executor:
+            for chunk in self._chunks(corpus):
+                pending.append(executor.submit(_infer_chunk, chunk, random_state.get_state()))
+                # advances the random state exactly as `LdaModel.inference` does for this chunk
+                random_state.gamma(100., 1. / 100., (len(chunk), lda_model.num_topics))
+
+                if len(pending) >= 2 * self.n_workers:
+                    gammas.append(pending.popleft().result())
+
+            gammas.extend(future.result() for future in pending)
+
+        return gammas
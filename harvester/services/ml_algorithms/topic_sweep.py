@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from gensim.corpora.dictionary import Dictionary
+    from gensim.models.ldamodel import LdaModel
+
+# coherence measures of gensim, all but `u_mass` need the tokenized texts
+COHERENCE_MEASURES = ('u_mass', 'c_v', 'c_uci', 'c_npmi')
+
+_corpus: Optional[CsrCorpus] = None
+_dictionary: Optional[Dictionary] = None
+_texts: Optional[list[list[str]]] = None
+
+
+class CsrCorpus:
+    """
+        Bag of words corpus stored as the three arrays of a CSR matrix in `.npy` files.
+        The arrays are memory mapped when the corpus is first iterated, so worker processes
+        share the pages of one file instead of holding a copy each. Only the path is pickled.
+    """
+    ARRAYS = ('indptr', 'indices', 'data')
+
+    def __init__(self, path: str) -> None:
+        """
+            @param path: directory of the arrays
+        """
+        self.path = path
+        self._arrays: Optional[tuple[np.ndarray, ...]] = None
+
+    @classmethod
+    def serialize(cls, path: str, doc_bows: Iterable[list[tuple[int, int]]]) -> CsrCorpus:
+        """
+            Writes the bag of words documents to the directory, in one pass.
+            @param path: directory of the arrays, created when missing
+            @param doc_bows: bag of words documents
+
+            @return: corpus reading the written arrays
+        """
+        indptr, indices, data = [0], [], []
+        for doc_bow in doc_bows:
+            indices.extend(term_id for term_id, _ in doc_bow)
+            data.extend(count for _, count in doc_bow)
+            indptr.append(len(indices))
+
+        os.makedirs(path, exist_ok=True)
+        for name, values, dtype in zip(cls.ARRAYS, (indptr, indices, data), (np.int64, np.int32, np.float32)):
+            np.save(os.path.join(path, f"{name}.npy"), np.array(values, dtype=dtype))
+
+        return cls(path)
+
+    @property
+    def arrays(self) -> tuple[np.ndarray, ...]:
+        if self._arrays is None:
+            self._arrays = tuple(np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode='r')
+                                 for name in self.ARRAYS)
+
+        return self._arrays
+
+    def __len__(self) -> int:
+        return len(self.arrays[0]) - 1
+
+    def __iter__(self) -> Iterator[list[tuple[int, float]]]:
+        indptr, indices, data = self.arrays
+        for start, stop in zip(indptr[:-1].tolist(), indptr[1:].tolist()):
+            yield list(zip(indices[start:stop].tolist(), data[start:stop].tolist()))
+
+    def __getstate__(self) -> dict:
+        return {'path': self.path, '_arrays': None}
+
+
+def _init_worker(corpus_path: Optional[str], dictionary: Optional[Dictionary], texts: Optional[list[list[str]]]) -> None:
+    """
+        Receives the dictionary and the texts once per worker, the corpus is mapped from its file.
+    """
+    global _corpus, _dictionary, _texts
+    _corpus, _dictionary, _texts = CsrCorpus(corpus_path) if corpus_path is not None else None, dictionary, texts
+
+
+def _train(num_topics: int, coherence: str, topn: int, random_state: int) -> tuple[int, float, float, LdaModel]:
+    """
+        Trains one model on the shared corpus and scores its topics.
+
+        @return: number of topics, coherence, training and scoring seconds, and the model
+    """
+    from gensim.models.coherencemodel import CoherenceModel
+    from gensim.models.ldamodel import LdaModel
+
+    start = time.perf_counter()
+    lda_model = LdaModel(corpus=_corpus, id2word=_dictionary, num_topics=num_topics, random_state=random_state)
+    score = CoherenceModel(model=lda_model, corpus=_corpus, texts=_texts, dictionary=_dictionary,
+                           coherence=coherence, topn=topn, processes=1).get_coherence()
+
+    return num_topics, float(score), time.perf_counter() - start, lda_model
+
+
+@dataclass
+class SweepResult:
+    """
+        Outcome of a topic-count sweep. The table holds one row per trained model,
+        best coherence first.
+    """
+    table: pd.DataFrame
+    best_model: LdaModel
+    best_num_topics: int
+    stopped_early: bool
+
+
+class TopicSweep:
+    """
+        Trains LDA models for a range of topic counts on one corpus and ranks them by topic
+        coherence. The corpus is written once to a memory-mapped `CsrCorpus`, which the worker
+        processes share, and every worker trains a whole model. Topic counts are trained in the
+        given order, at most one per worker at a time, and their results are taken in that order,
+        so the sweep can stop once the coherence has not improved for `patience` topic counts.
+        A model of a sweep equals the one `ExtractDominantTopicsStrategy` trains with the same
+        topic count and random state.
+    """
+
+    def __init__(self,
+                 n_workers: Optional[int] = None,
+                 coherence: str = 'u_mass',
+                 topn: int = 10,
+                 patience: Optional[int] = None,
+                 min_delta: float = 0.,
+                 random_state: int = 42,
+                 work_dir: Optional[str] = None) -> None:
+        """
+            @param n_workers: number of worker processes, `None` uses every available core
+            @param coherence: coherence measure, one of `COHERENCE_MEASURES`, higher is better for all of them
+            @param topn: number of top words per topic the coherence is computed on
+            @param patience: number of topic counts without improvement after which the sweep stops,
+                             `None` trains every topic count
+            @param min_delta: smallest coherence gain counted as an improvement
+            @param random_state: random state of every model
+            @param work_dir: directory the corpus is written to, a temporary one by default
+        """
+        assert coherence in COHERENCE_MEASURES, f"Coherence {coherence} is not one of {COHERENCE_MEASURES}"
+        assert patience is None or patience > 0, "patience must be positive"
+
+        self.n_workers = n_workers if n_workers is not None else os.cpu_count() or 1
+        self.coherence = coherence
+        self.topn = topn
+        self.patience = patience
+        self.min_delta = min_delta
+        self.random_state = random_state
+        self.work_dir = work_dir
+
+    def run(self,
+            id2word: Dictionary,
+            doc_bows: Iterable[list[tuple[int, int]]],
+            topic_counts: Iterable[int],
+            texts: Optional[list[list[str]]] = None) -> SweepResult:
+        """
+            @param id2word: dictionary of the corpus
+            @param doc_bows: bag of words documents, consumed once
+            @param topic_counts: topic counts to train, in the order they are swept
+            @param texts: tokenized documents, required by every coherence measure but `u_mass`
+
+            @return: ranked table and best model
+        """
+        topic_counts = list(topic_counts)
+        assert topic_counts, "No topic counts to sweep"
+        assert self.coherence == 'u_mass' or texts is not None, f"Coherence {self.coherence} requires the texts"
+
+        with tempfile.TemporaryDirectory(dir=self.work_dir) as work_dir:
+            corpus = CsrCorpus.serialize(work_dir, doc_bows)
+            texts = texts if self.coherence != 'u_mass' else None
+
+            if self.n_workers <= 1 or len(topic_counts) == 1:
+                _init_worker(corpus.path, id2word, texts)
+                try:
+                    return self._collect(_train(*self._train_args(num_topics)) for num_topics in topic_counts)
+                finally:
+                    _init_worker(None, None, None)
+
+            workers = min(self.n_workers, len(topic_counts))
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_init_worker,
+                                     initargs=(corpus.path, id2word, texts)) as executor:
+                pending = deque()
+                remaining = iter(topic_counts)
+
+                def outcomes() -> Iterator[tuple]:
+                    for num_topics in remaining:
+                        pending.append(executor.submit(_train, *self._train_args(num_topics)))
+                        if len(pending) >= workers:
+                            yield pending.popleft().result()
+                    while pending:
+                        yield pending.popleft().result()
+
+                result = self._collect(outcomes())
+                for future in pending:
+                    future.cancel()
+
+                return result
+
+    def _train_args(self, num_topics: int) -> tuple:
+        return num_topics, self.coherence, self.topn, self.random_state
+
+    def _collect(self, outcomes: Iterable[tuple]) -> SweepResult:
+        """
+            Takes the outcomes in sweep order until the coherence stops improving.
+        """
+        rows = []
+        best = None
+        stale = 0
+        stopped_early = False
+
+        for num_topics, score, seconds, lda_model in outcomes:
+            rows.append((num_topics, score, seconds))
+
+            improved = best is None or score > best[1] + self.min_delta
+            if best is None or score > best[1]:
+                best = num_topics, score, lda_model
+            stale = 0 if improved else stale + 1
+
+            if self.patience is not None and stale >= self.patience:
+                stopped_early = True
+                break
+
+        table = (pd.DataFrame(rows, columns=['num_topics', 'coherence', 'seconds'])
+                   .sort_values('coherence', ascending=False, kind='stable', ignore_index=True))
+
+        return SweepResult(table=table, best_model=best[2], best_num_topics=best[0], stopped_early=stopped_early)
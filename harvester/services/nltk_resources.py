@@ -0,0 +1,93 @@
+
+import os
+import threading
+
+from typing import Optional
+
+NLTK_DATA_VARIABLE = 'HARVESTER_NLTK_DATA'
+NLTK_OFFLINE_VARIABLE = 'HARVESTER_NLTK_OFFLINE'
+
+
+class NltkResources:
+    """
+        Makes sure the NLTK data a component needs is available, checking every
+        resource only once per process and only when it is first required.
+        Resources are looked up in the NLTK search path, with the optional local
+        data directory first, and downloaded into that directory when missing,
+        unless downloads are disabled for air-gapped machines.
+    """
+    PATHS = {
+        'stopwords': 'corpora/stopwords',
+        'punkt_tab': 'tokenizers/punkt_tab',
+        'averaged_perceptron_tagger_eng': 'taggers/averaged_perceptron_tagger_eng',
+        'vader_lexicon': 'sentiment/vader_lexicon.zip',
+    }
+
+    def __init__(self, data_dir: Optional[str] = None, allow_download: bool = True) -> None:
+        """
+            @param data_dir: pre-bundled NLTK data directory, searched before the default locations
+            @param allow_download: downloads missing resources, otherwise a `LookupError` is raised
+        """
+        self.data_dir = data_dir
+        self.allow_download = allow_download
+        self.available: set[str] = set()
+        self.lock = threading.Lock()
+
+    def require(self, *names: str) -> None:
+        """
+            Ensures the given resources are available.
+            @param names: NLTK resource names, e.g. `stopwords`
+        """
+        missing = [name for name in names if name not in self.available]
+        if not missing:
+            return
+
+        import nltk
+
+        with self.lock:
+            if self.data_dir is not None and self.data_dir not in nltk.data.path:
+                nltk.data.path.insert(0, self.data_dir)
+
+            for name in missing:
+                if name not in self.available:
+                    self._ensure(nltk, name)
+                    self.available.add(name)
+
+    def _ensure(self, nltk, name: str) -> None:
+        path = self.PATHS.get(name, name)
+
+        try:
+            nltk.data.find(path)
+            return
+        except LookupError:
+            if not self.allow_download:
+                raise
+
+        nltk.download(name, download_dir=self.data_dir, quiet=True, raise_on_error=True)
+        nltk.data.find(path)
+
+
+def _offline() -> bool:
+    # only an explicit true value disables the downloads, `HARVESTER_NLTK_OFFLINE=0` keeps them
+    return os.environ.get(NLTK_OFFLINE_VARIABLE, '').strip().lower() in ('1', 'true', 'yes')
+
+
+resources = NltkResources(data_dir=os.environ.get(NLTK_DATA_VARIABLE), allow_download=not _offline())
+
+
+def configure(data_dir: Optional[str] = None, allow_download: bool = True) -> None:
+    """
+        Replaces the resource settings of the current process. Worker processes started
+        with `spawn` read the `HARVESTER_NLTK_DATA` and `HARVESTER_NLTK_OFFLINE` variables instead.
+        @param data_dir: pre-bundled NLTK data directory
+        @param allow_download: downloads missing resources
+    """
+    global resources
+    resources = NltkResources(data_dir=data_dir, allow_download=allow_download)
+
+
+def require(*names: str) -> None:
+    """
+        Ensures the given NLTK resources are available, see `NltkResources.require`.
+    """
+    resources.require(*names)
@@ -2,6 +2,8 @@
 from abc import ABC, abstractmethod
 from typing import Any, Optional
 
+from ..instrumentation import instrumentation, instrumented
+
 
 class Handler(ABC):
     @abstractmethod
@@ -17,6 +19,15 @@ class AbstractHandler(Handler):
 
     _next_handler: Optional[Handler] = None
 
+    def __init_subclass__(cls, **kwargs) -> None:
+        """
+            Instruments the `handle` of every concrete handler, see `instrumentation`
+        """
+        super().__init_subclass__(**kwargs)
+
+        if 'handle' in cls.__dict__:
+            cls.handle = instrumented(cls.__dict__['handle'])
+
     def set_next(self, handler: Handler) -> Handler:
         self._next_handler = handler
 
@@ -24,6 +35,8 @@ class AbstractHandler(Handler):
 
     @abstractmethod
     def handle(self, request: any) -> Any | None:
+        instrumentation.dispatching(request)
+
         if self._next_handler:
             return self._next_handler.handle(request)
 
@@ -0,0 +1,226 @@
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .abstract_handler import AbstractHandler
+
+# 64-bit hash of the canonical comment of every row, it does not depend on the index,
+# so the groups of batches appended to one store stay apart
+CANONICAL_COLUMN = 'canonical_hash'
+
+SHINGLE_BASE = np.uint64(1_000_003)
+MIX_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+# shingle hashes times permutations held at once while computing the signatures
+SIGNATURE_BLOCK = 1 << 22
+
+
+def lsh_bands(num_perm: int, threshold: float) -> tuple[int, int]:
+    """
+        Chooses the number of bands and rows per band whose S-curve `(1 / bands) ** (1 / rows)`
+        crosses closest to the similarity threshold.
+        @param num_perm: signature length
+        @param threshold: Jaccard similarity above which documents are near-duplicates
+
+        @return: bands and rows per band
+    """
+    return min(((num_perm // rows, rows) for rows in range(1, num_perm + 1)),
+               key=lambda band: abs((1 / band[0]) ** (1 / band[1]) - threshold))
+
+
+def shingle_hashes(texts: Sequence[str], shingle_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+        Hashes the byte shingles of all texts at once with a polynomial rolling hash over
+        their concatenated UTF-8 encoding. Texts shorter than a shingle are padded, so
+        every text has at least one shingle.
+        @param texts: documents
+        @param shingle_size: bytes per shingle
+
+        @return: 32 bit hashes of all shingles and the offsets delimiting every document
+    """
+    encoded = [text.encode().ljust(shingle_size, b'\0') for text in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+
+    windows = len(buffer) - shingle_size + 1
+    rolling = np.zeros(max(windows, 0), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for position in range(shingle_size):
+            rolling = rolling * SHINGLE_BASE + buffer[position:position + windows]
+        rolling *= MIX_MULTIPLIER
+
+    # shingles crossing the boundary of two documents are skipped
+    counts = lengths - shingle_size + 1
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    starts = np.cumsum(lengths) - lengths
+    positions = np.repeat(starts - offsets[:-1], counts) + np.arange(offsets[-1])
+
+    return (rolling[positions] >> np.uint64(32)).astype(np.uint32), offsets
+
+
+def minhash_signatures(texts: Sequence[str], num_perm: int = 128, shingle_size: int = 5,
+                       seed: int = 1) -> np.ndarray:
+    """
+        Computes the MinHash signatures of the texts, every permutation is an affine map
+        `(a * x + b) mod 2 ** 32` of the 32 bit shingle hashes with an odd `a`, which is
+        a bijection, and the signature holds their minima. The work is linear in the total
+        length of the texts.
+        @param texts: documents
+        @param num_perm: signature length
+        @param shingle_size: bytes per shingle
+        @param seed: seed of the permutations
+
+        @return: signatures, one row per document
+    """
+    generator = np.random.default_rng(seed)
+    a = generator.integers(0, 1 << 32, size=(num_perm, 1), dtype=np.uint32) | np.uint32(1)
+    b = generator.integers(0, 1 << 32, size=(num_perm, 1), dtype=np.uint32)
+
+    hashes, offsets = shingle_hashes(texts, shingle_size)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+
+    # blocks of whole documents holding about `SIGNATURE_BLOCK` permuted hashes
+    boundaries = np.searchsorted(offsets, np.arange(0, offsets[-1], max(SIGNATURE_BLOCK // num_perm, 1)))
+    boundaries = np.unique(np.append(boundaries, len(texts)))
+    for first, last in zip(boundaries[:-1].tolist(), boundaries[1:].tolist()):
+        if first == last:
+            continue
+        # permutations by shingles, reducing along the contiguous axis
+        permuted = a * hashes[offsets[first]:offsets[last]]
+        permuted += b
+        signatures[first:last] = np.minimum.reduceat(permuted, offsets[first:last] - offsets[first], axis=1).T
+
+    return signatures
+
+
+def near_duplicates(texts: Sequence[str], threshold: float = .8, num_perm: int = 128, shingle_size: int = 5,
+                    seed: int = 1) -> np.ndarray:
+    """
+        Groups near-duplicate texts with locality-sensitive hashing of their MinHash signatures.
+        Texts sharing a bucket in any band become candidates, a candidate joins the group of the
+        first text of its bucket when their signatures agree on at least `threshold` of their
+        positions. Groups are joined transitively.
+        @param texts: documents
+        @param threshold: estimated Jaccard similarity of the shingles above which texts are near-duplicates
+        @param num_perm: signature length
+        @param shingle_size: bytes per shingle
+        @param seed: seed of the permutations
+
+        @return: position of the first text of its group for every text
+    """
+    assert 0 < threshold <= 1, "threshold must be in (0, 1]"
+
+    labels = np.arange(len(texts))
+    if len(texts) < 2:
+        return labels
+
+    signatures = minhash_signatures(texts, num_perm, shingle_size, seed)
+    bands, rows = lsh_bands(num_perm, threshold)
+    weights = np.random.default_rng(seed).integers(1, 1 << 63, size=rows, dtype=np.uint64)
+
+    candidates, firsts = [], []
+    for band in range(bands):
+        with np.errstate(over='ignore'):
+            keys = (signatures[:, band * rows:(band + 1) * rows].astype(np.uint64) * weights).sum(axis=1)
+        codes, uniques = pd.factorize(keys)
+        first = np.empty(len(uniques), dtype=np.int64)
+        first[codes[::-1]] = labels[::-1]
+        shared = first[codes] != labels
+        candidates.append(labels[shared])
+        firsts.append(first[codes][shared])
+
+    candidates, firsts = np.concatenate(candidates), np.concatenate(firsts)
+    similar = (signatures[candidates] == signatures[firsts]).mean(axis=1) >= threshold
+    candidates, firsts = candidates[similar], firsts[similar]
+
+    # the smallest position of every connected group, by label propagation
+    while True:
+        lowest = np.minimum(labels[candidates], labels[firsts])
+        propagated = labels.copy()
+        np.minimum.at(propagated, candidates, lowest)
+        np.minimum.at(propagated, firsts, lowest)
+        propagated = propagated[propagated]
+        if np.array_equal(propagated, labels):
+            return labels
+        labels = propagated
+
+
+def canonical_mapping(dataset: pd.DataFrame) -> Optional[tuple[np.ndarray, np.ndarray]]:
+    """
+        Reads the groups of a dataset handled by `DeduplicationHandler`, the first row of
+        every group in the dataset is its canonical row.
+        @param dataset: given dataset
+
+        @return: positions of the canonical rows and, for every row, the position of its canonical
+                 row among them, `None` when the dataset was not deduplicated
+    """
+    if CANONICAL_COLUMN not in dataset:
+        return None
+
+    codes, uniques = pd.factorize(dataset[CANONICAL_COLUMN], use_na_sentinel=False)
+    canonical = np.empty(len(uniques), dtype=np.int64)
+    canonical[codes[::-1]] = np.arange(len(codes))[::-1]
+
+    return canonical, codes
+
+
+class DeduplicationHandler(AbstractHandler):
+    def __init__(self,
+                 threshold: float = .8,
+                 num_perm: int = 128,
+                 shingle_size: int = 5,
+                 column: str = 'comment',
+                 seed: int = 1) -> None:
+        """Marks exact and near-duplicate comments. Exact duplicates are grouped by value,
+        the distinct comments are grouped by `near_duplicates`. The hash of the comment of
+        the canonical row, the first one of its group, is written to `canonical_hash` for
+        every row, see `canonical_mapping`. Groups with equal canonical comments, e.g. of
+        separately deduplicated batches, are one group then, which they can be as equal
+        comments are analyzed alike. Non textual comments are never grouped with text.
+
+        Args:
+            threshold (float): estimated Jaccard similarity of the shingles above which comments are near-duplicates
+            num_perm (int): MinHash signature length, longer signatures estimate the similarity more precisely
+            shingle_size (int): bytes per shingle
+            column (str): textual column
+            seed (int): seed of the MinHash permutations
+        """
+        assert 0 < threshold <= 1, "threshold must be in (0, 1]"
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.column = column
+        self.seed = seed
+
+    def handle(self, dataset: pd.DataFrame) -> pd.DataFrame:
+        comments = dataset[self.column]
+        canonical_comments = comments.iloc[self._canonical_positions(comments)]
+        dataset[CANONICAL_COLUMN] = pd.util.hash_pandas_object(canonical_comments, index=False).to_numpy()
+
+        return super().handle(dataset)
+
+    def _canonical_positions(self, comments: pd.Series) -> np.ndarray:
+        """
+        Args:
+            comments (pd.Series): given comments
+
+        Returns:
+            np.ndarray: position of the canonical row of every comment
+        """
+        is_text = comments.map(lambda text: isinstance(text, str)).to_numpy(dtype=bool)
+        codes, uniques = pd.factorize(comments.where(is_text))
+        positions = np.arange(len(comments))
+
+        # factorize numbers the distinct comments in the order of their first row
+        first_rows = np.empty(len(uniques), dtype=np.int64)
+        first_rows[codes[is_text][::-1]] = positions[is_text][::-1]
+        groups = near_duplicates([str(text) for text in uniques], self.threshold, self.num_perm,
+                                 self.shingle_size, self.seed)
+
+        positions[is_text] = first_rows[groups[codes[is_text]]]
+
+        return positions
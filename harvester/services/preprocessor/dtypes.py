@@ -0,0 +1,119 @@
+
+import os
+
+from importlib.util import find_spec
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from pandas.api.types import union_categoricals
+
+ARROW_STRINGS = find_spec('pyarrow') is not None
+TEXT_DTYPE = 'string[pyarrow]' if ARROW_STRINGS else 'string'
+POSTING_TIME_FORMAT = '%b %d, %Y'
+CSV_DTYPES = {'comment': TEXT_DTYPE, 'posting_time': TEXT_DTYPE, 'rating': 'category'}
+
+
+def text_series(values, index: pd.Index | None = None) -> pd.Series:
+    """
+        Args:
+            values: strings
+            index (pd.Index | None): index of the series
+
+        Returns:
+            pd.Series: Arrow backed strings, or pandas strings without pyarrow
+    """
+    return pd.Series(pd.array(values, dtype=TEXT_DTYPE), index=index)
+
+
+def map_text_slices(texts: pd.Series,
+                    function: Callable[[pd.Series], pd.Series],
+                    slice_size: int) -> pd.Series:
+    """Applies a text function to consecutive slices of the column and keeps every result
+    as Arrow strings, the results are joined as chunks without copying. Only one slice is
+    held as Python string objects at a time, however long the column is.
+
+    Args:
+        texts (pd.Series): given texts
+        function (Callable[[pd.Series], pd.Series]): maps a slice to its results, with the index of the slice
+        slice_size (int): number of rows per slice
+
+    Returns:
+        pd.Series: results as Arrow backed strings, or pandas strings without pyarrow
+    """
+    assert slice_size > 0, "slice_size must be positive"
+
+    if len(texts) <= slice_size:
+        return function(texts).astype(TEXT_DTYPE)
+
+    return pd.concat([function(texts.iloc[start:start + slice_size]).astype(TEXT_DTYPE)
+                      for start in range(0, len(texts), slice_size)])
+
+
+def small_integers(values: pd.Series) -> pd.Series:
+    """
+        Args:
+            values (pd.Series): integral numbers or missing values
+
+        Returns:
+            pd.Series: the smallest nullable unsigned integer dtype holding the values
+    """
+    numbers = pd.to_numeric(values)
+    dtype = 'UInt8' if not (numbers > np.iinfo(np.uint8).max).any() else 'UInt32'
+
+    return numbers.astype(dtype)
+
+
+def compact_reviews(dataset: pd.DataFrame) -> pd.DataFrame:
+    """Converts a crawled dataset to the compact data model and drops the rows with missing
+    values, as `dropna` does, without copying when there are none. `comment` becomes an Arrow
+    string column, `rating` a categorical and `posting_time` a datetime column. Unparsable
+    posting times become `NaT`.
+
+    Args:
+        dataset (pd.DataFrame): crawled reviews with object columns
+
+    Returns:
+        pd.DataFrame: new dataset, the given one is left unchanged
+    """
+    complete = dataset.notna().all(axis=1)
+    if not complete.all():
+        dataset = dataset[complete]
+
+    columns = {}
+    for name, column in dataset.items():
+        if name == 'comment':
+            columns[name] = column.astype(TEXT_DTYPE)
+        elif name == 'rating' and column.dtype == object:
+            columns[name] = column.astype('category')
+        elif name == 'posting_time' and not pd.api.types.is_datetime64_any_dtype(column):
+            columns[name] = pd.to_datetime(column, format=POSTING_TIME_FORMAT, errors='coerce')
+        else:
+            columns[name] = column
+
+    return pd.DataFrame(columns, index=dataset.index, copy=False)
+
+
+def read_reviews(path: str | os.PathLike, chunksize: int = 100_000, **kwargs) -> pd.DataFrame:
+    """Reads crawled reviews from CSV into the compact data model chunk by chunk, so at most
+    one chunk is held as Python string objects at a time.
+
+    Args:
+        path (str | os.PathLike): CSV file of crawled reviews
+        chunksize (int): number of rows parsed at a time
+        kwargs: further `pd.read_csv` arguments
+
+    Returns:
+        pd.DataFrame: compact dataset, see `compact_reviews`
+    """
+    chunks = [compact_reviews(chunk) for chunk in pd.read_csv(path, dtype=CSV_DTYPES, chunksize=chunksize, **kwargs)]
+    if not chunks:
+        return compact_reviews(pd.read_csv(path, dtype=CSV_DTYPES, **kwargs))
+
+    dataset = pd.concat(chunks)
+    if 'rating' in dataset and not isinstance(dataset['rating'].dtype, pd.CategoricalDtype):
+        # chunks holding different ratings have different categories
+        dataset['rating'] = union_categoricals([chunk['rating'] for chunk in chunks], sort_categories=True)
+
+    return dataset
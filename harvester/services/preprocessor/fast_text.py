@@ -0,0 +1,143 @@
+
+import re
+
+from functools import lru_cache
+
+MEMO_SIZE = 1 << 16
+
+# characters a contraction must not be adjacent to, as in `contractions.fix`
+WORD_CHARACTERS = 'A-Za-z0-9_'
+NOT_TEXT_PATTERN = re.compile(r'[^\w\s]')
+
+# tokens `word_tokenize` splits although they hold no punctuation, see `MacIntyreContractions`
+SPLIT_WORDS = {'cannot': 3, 'gimme': 3, 'gonna': 3, 'gotta': 3, 'lemme': 3, 'wanna': 3}
+
+
+def _sentence_case(text: str) -> str:
+    return text[0].upper() + text[1:].lower()
+
+
+def _restore_case(match: str, expansion: str) -> str:
+    """
+        Gives the expansion the casing of the matched contraction, as `contractions.fix` does
+    """
+    if match == match.upper():
+        return expansion.upper()
+    if match == match.title():
+        return expansion.title()
+    if match == match.lower():
+        return expansion.lower()
+    if match == _sentence_case(match):
+        return _sentence_case(expansion)
+
+    return expansion
+
+
+def _trie_pattern(keys: list[str]) -> str:
+    """
+        Builds one regular expression matching the longest of the keys, the alternatives
+        are nested by shared prefix, so a position is tested against one branch per character
+    """
+    trie: dict = {}
+    for key in keys:
+        node = trie
+        for character in key:
+            node = node.setdefault(character, {})
+        node[''] = True
+
+    def pattern(node: dict) -> str:
+        branches = [re.escape(character) + pattern(child) for character, child in sorted(node.items()) if character]
+        if not branches:
+            return ''
+
+        group = branches[0] if len(branches) == 1 and len(branches[0]) == 1 else f"(?:{'|'.join(branches)})"
+
+        return f"{group}?" if '' in node else group
+
+    return pattern(trie)
+
+
+class ContractionExpander:
+    """
+        Expands contractions in one pass of a single precompiled regular expression.
+        The contractions and their expansions are read from the Aho-Corasick automaton
+        behind `contractions.fix`, a contraction is matched case insensitively, only as
+        a whole word, the longest one wins and its expansion takes over its casing.
+    """
+
+    def __init__(self, expansions: dict[str, str] | None = None) -> None:
+        """
+            @param expansions: lowercase contractions and their expansions, the ones of
+                               `contractions.fix` with leftovers and slang by default
+        """
+        if expansions is None:
+            import contractions
+
+            expansions = {key: expansion for key, (_, expansion) in contractions.ts_leftovers_slang.automaton.items()}
+
+        self.expansions = expansions
+        self.pattern = re.compile(f"(?<![{WORD_CHARACTERS}])(?:{_trie_pattern(list(expansions))})"
+                                  f"(?![{WORD_CHARACTERS}])")
+
+    def fix(self, text: str) -> str:
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # lowercasing changed the length, the positions of the matches would not fit the text
+            import contractions
+
+            return contractions.fix(text)
+
+        result = []
+        position = 0
+        for match in self.pattern.finditer(lowered):
+            start, stop = match.span()
+            result.append(text[position:start])
+            result.append(_restore_case(text[start:stop], self.expansions[match.group()]))
+            position = stop
+
+        if not result:
+            return text
+
+        result.append(text[position:])
+
+        return ''.join(result)
+
+
+_expander: ContractionExpander | None = None
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def expand_contractions(text: str) -> str:
+    """
+        Fast, memoized equivalent of `contractions.fix`, the expression is compiled on first use
+    """
+    global _expander
+
+    if _expander is None:
+        _expander = ContractionExpander()
+
+    return _expander.fix(text)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def tokenize(text: str) -> tuple[str, ...]:
+    """
+        Fast, memoized equivalent of `word_tokenize` for preprocessed text made up of word
+        characters and whitespace only, it is split on whitespace and the few words the
+        Treebank rules split without punctuation are split alike. Other text is passed
+        to `word_tokenize`.
+    """
+    if NOT_TEXT_PATTERN.search(text):
+        from nltk import word_tokenize
+
+        return tuple(word_tokenize(text))
+
+    tokens = []
+    for token in text.split():
+        split = SPLIT_WORDS.get(token.lower())
+        if split is None:
+            tokens.append(token)
+        else:
+            tokens.extend((token[:split], token[split:]))
+
+    return tuple(tokens)
@@ -0,0 +1,70 @@
+
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import pandas as pd
+
+from .abstract_handler import Handler
+
+_handler: Optional[Handler] = None
+
+
+def _init_worker(handler: Handler) -> None:
+    """
+        Receives the handler chain once per worker instead of once per partition.
+    """
+    global _handler
+    _handler = handler
+
+
+def _handle_partition(partition: pd.DataFrame) -> pd.DataFrame:
+    return _handler.handle(partition)
+
+
+class PartitionedExecutor:
+    """
+        Runs a chain of handlers over row partitions of a dataset in a process pool
+        and concatenates the partial results in the original row order.
+        Any chain of picklable `Handler` objects can be executed, inputs smaller
+        than `min_parallel_rows` are handled serially in the current process.
+    """
+
+    def __init__(self,
+                 handler: Handler,
+                 partition_size: int = 50_000,
+                 n_workers: Optional[int] = None,
+                 min_parallel_rows: int = 100_000) -> None:
+        """
+            Args:
+                handler (Handler): first handler of the chain
+                partition_size (int): number of rows per partition
+                n_workers (Optional[int]): number of worker processes, `None` uses every available core
+                min_parallel_rows (int): datasets with fewer rows skip the process pool
+        """
+        assert partition_size > 0, "partition_size must be positive"
+
+        self.handler = handler
+        self.partition_size = partition_size
+        self.n_workers = n_workers if n_workers is not None else os.cpu_count() or 1
+        self.min_parallel_rows = min_parallel_rows
+
+    def execute(self, dataset: pd.DataFrame) -> pd.DataFrame:
+        """
+            Args:
+                dataset (pd.DataFrame): given dataset
+
+            Returns:
+                pd.DataFrame: dataset handled by the whole chain
+        """
+        starts = range(0, len(dataset), self.partition_size)
+
+        if self.n_workers <= 1 or len(starts) <= 1 or len(dataset) < self.min_parallel_rows:
+            return self.handler.handle(dataset)
+
+        partitions = (dataset.iloc[start:start + self.partition_size] for start in starts)
+        with ProcessPoolExecutor(max_workers=min(self.n_workers, len(starts)),
+                                 initializer=_init_worker,
+                                 initargs=(self.handler,)) as executor:
+            return pd.concat(executor.map(_handle_partition, partitions))
@@ -2,22 +2,103 @@
 import re
 
 import contractions
+import numpy as np
 import pandas as pd
 
-from nltk import word_tokenize, download
-from nltk.corpus import stopwords
-
 from .abstract_handler import AbstractHandler
+from .dtypes import ARROW_STRINGS, TEXT_DTYPE, map_text_slices, small_integers, text_series
+from .fast_text import expand_contractions, tokenize
+from ..nltk_resources import require
+from ..result_cache import ResultCache, cached_apply
+
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+DIGITS_PATTERN = re.compile(r'\d+')
+RATING_PATTERN = re.compile(r'\b(\d+)\b')
 
-download(['stopwords', 'punkt_tab', 'wordnet'], quiet=True)
+# RE2 equivalents of the patterns above for the Arrow string kernels, where `\w`, `\s` and `\d` are ASCII only
+ARROW_PUNCTUATION_PATTERN = r'[^\p{L}\p{N}_\s\p{Z}\x0b\x1c-\x1f\x85]'
+ARROW_DIGITS_PATTERN = r'\p{Nd}+'
 
 
 class PreprocessingHandler(AbstractHandler):
+    CACHE_STAGE = 'preprocessing:1'
+
+    def __init__(self,
+                 vectorized: bool = False,
+                 cache: ResultCache | None = None,
+                 compact: bool = False,
+                 fast_text: bool = False,
+                 partition_size: int = 50_000) -> None:
+        """
+        Args:
+            vectorized (bool): runs the column-wise pandas string kernels instead of the row-wise path
+            cache (ResultCache | None): result cache, only the comments which are not cached yet are preprocessed
+            compact (bool): runs the column-wise path and replaces the column with Arrow strings
+            fast_text (bool): expands contractions with the memoized single-pass expander,
+                              see `fast_text.expand_contractions`, instead of `contractions.fix`
+            partition_size (int): rows the compact path holds as Python strings at a time
+        """
+        self.vectorized = vectorized or compact
+        self.cache = cache
+        self.compact = compact
+        self.fix_contractions = expand_contractions if fast_text else contractions.fix
+        self.partition_size = partition_size
+
     def handle(self, dataset: pd.DataFrame) -> pd.DataFrame:
-        dataset.loc[:, 'comment'] = dataset['comment'].apply(self._preprocess)
+        if self.compact:
+            dataset['comment'] = map_text_slices(dataset['comment'], self._preprocess_compact, self.partition_size)
+        elif self.cache is not None:
+            comments = cached_apply(self.cache, self.CACHE_STAGE, dataset['comment'].tolist(), self._preprocess_texts)
+            dataset.loc[:, 'comment'] = pd.Series(comments, index=dataset.index, dtype=object)
+        elif self.vectorized:
+            dataset.loc[:, 'comment'] = self._preprocess_column(dataset['comment'])
+        else:
+            dataset.loc[:, 'comment'] = dataset['comment'].apply(self._preprocess)
 
         return super().handle(dataset)
 
+    def _preprocess_texts(self, texts: list) -> list[str]:
+        if self.vectorized:
+            return self._preprocess_column(pd.Series(texts, dtype=object)).tolist()
+
+        return [self._preprocess(text) for text in texts]
+
+    def _preprocess_compact(self, comments: pd.Series) -> pd.Series:
+        if self.cache is None:
+            return self._preprocess_column(comments)
+
+        return text_series(cached_apply(self.cache, self.CACHE_STAGE, comments.tolist(), self._preprocess_texts),
+                           index=comments.index)
+
+    def _preprocess_column(self, comments: pd.Series) -> pd.Series:
+        """Column-wise version of `_preprocess`, producing the same output.
+        Contractions are fixed and the letters lowered once per distinct comment
+        with the `str` methods, Arrow lowers the Greek final sigma differently,
+        the removals run as Arrow string kernels when pyarrow is installed.
+
+        Args:
+            comments (pd.Series): given comments
+
+        Returns:
+            pd.Series: preprocessed comments
+        """
+        is_text = comments.map(lambda text: isinstance(text, str))
+        codes, uniques = pd.factorize(comments.where(is_text, ''))
+        texts = pd.Series([self.fix_contractions(text).lower().strip() for text in uniques], dtype=object)
+
+        if ARROW_STRINGS:
+            texts = (texts.astype('string[pyarrow]')
+                          .str.replace(ARROW_PUNCTUATION_PATTERN, '', regex=True)
+                          .str.replace(ARROW_DIGITS_PATTERN, '', regex=True))
+        else:
+            texts = (texts.str.replace(PUNCTUATION_PATTERN, '', regex=True)
+                          .str.replace(DIGITS_PATTERN, '', regex=True))
+
+        if self.compact:
+            return pd.Series(texts.astype(TEXT_DTYPE).array.take(codes), index=comments.index)
+
+        return pd.Series(texts.astype(object).to_numpy()[codes], index=comments.index)
+
     def _preprocess(self, text: str) -> str:
         """Executes the following preprocessing steps:
             1. fix contractions such as `you're` to you `are`
@@ -35,21 +116,98 @@ class PreprocessingHandler(AbstractHandler):
         if not isinstance(text, str):
             return ""
 
-        text = contractions.fix(text)
+        text = self.fix_contractions(text)
         text = text.lower()
         text = text.strip()
-        text = re.sub(r'[^\w\s]', '', text)
-        text = re.sub(r'\d+', '', text)
+        text = PUNCTUATION_PATTERN.sub('', text)
+        text = DIGITS_PATTERN.sub('', text)
 
         return text
 
 
 class ProcessingHandler(AbstractHandler):
+    CACHE_STAGE = 'processing:german-stopwords:1'
+
+    def __init__(self,
+                 vectorized: bool = False,
+                 cache: ResultCache | None = None,
+                 compact: bool = False,
+                 fast_text: bool = False,
+                 partition_size: int = 50_000) -> None:
+        """
+        Args:
+            vectorized (bool): filters the stopwords of the whole column in bulk instead of row by row
+            cache (ResultCache | None): result cache, only the comments which are not cached yet are processed
+            compact (bool): runs the column-wise path and replaces the column with Arrow strings
+            fast_text (bool): splits the preprocessed comments with the memoized regex tokenizer,
+                              see `fast_text.tokenize`, instead of `word_tokenize`
+            partition_size (int): rows the compact path holds as Python strings at a time
+        """
+        self.vectorized = vectorized or compact
+        self.cache = cache
+        self.compact = compact
+        self.fast_text = fast_text
+        self.partition_size = partition_size
+        self._stop_words: frozenset[str] | None = None
+
+    @property
+    def stop_words(self) -> frozenset[str]:
+        """German stopwords, NLTK is loaded on first use instead of at import time."""
+        if self._stop_words is None:
+            require('stopwords')
+            from nltk.corpus import stopwords
+
+            self._stop_words = frozenset(stopwords.words("german"))
+
+        return self._stop_words
+
     def handle(self, dataset: pd.DataFrame) -> pd.DataFrame:
-        dataset.loc[:, 'comment'] = dataset['comment'].apply(self._processing_text)
+        require('stopwords', 'punkt_tab')
+
+        if self.compact:
+            dataset['comment'] = map_text_slices(dataset['comment'], self._processing_compact, self.partition_size)
+        elif self.cache is not None:
+            comments = cached_apply(self.cache, self.CACHE_STAGE, dataset['comment'].tolist(), self._processing_texts)
+            dataset.loc[:, 'comment'] = pd.Series(comments, index=dataset.index, dtype=object)
+        elif self.vectorized:
+            dataset.loc[:, 'comment'] = self._processing_column(dataset['comment'])
+        else:
+            dataset.loc[:, 'comment'] = dataset['comment'].apply(self._processing_text)
 
         return super().handle(dataset)
 
+    def _processing_texts(self, texts: list) -> list[str]:
+        if self.vectorized:
+            return self._processing_column(pd.Series(texts, dtype=object)).tolist()
+
+        return [self._processing_text(text) for text in texts]
+
+    def _processing_compact(self, comments: pd.Series) -> pd.Series:
+        if self.cache is None:
+            return self._processing_column(comments)
+
+        return text_series(cached_apply(self.cache, self.CACHE_STAGE, comments.tolist(), self._processing_texts),
+                           index=comments.index)
+
+    def _processing_column(self, comments: pd.Series) -> pd.Series:
+        """Column-wise version of `_processing_text`: every distinct comment is
+        tokenized and filtered once against the stopword set of the handler,
+        the results are broadcast back to all rows.
+
+        Args:
+            comments (pd.Series): given comments
+
+        Returns:
+            pd.Series: comments without stopwords
+        """
+        codes, uniques = pd.factorize(comments, use_na_sentinel=False)
+        processed = np.array([self._processing_text(text) for text in uniques], dtype=object)
+
+        if self.compact:
+            return pd.Series(text_series(processed).array.take(codes), index=comments.index)
+
+        return pd.Series(processed[codes], index=comments.index)
+
     def _processing_text(self, text: str) -> str:
         tokens = self._tokenize(text)
         filtered_tokens = self._remove_stopwords(tokens)
@@ -57,20 +215,71 @@ class ProcessingHandler(AbstractHandler):
         return ' '.join(filtered_tokens)
 
     def _tokenize(self, text: str) -> list[str]:
+        if self.fast_text:
+            return list(tokenize(text))
+
+        from nltk import word_tokenize
+
         return word_tokenize(text)
 
     def _remove_stopwords(self, tokens: list[str]) -> list[str]:
-        stop_words = set(stopwords.words("german"))
-
-        return [word for word in tokens if word not in stop_words]
+        return [word for word in tokens if word not in self.stop_words]
 
 
 class RatingConverterHandler(AbstractHandler):
+    def __init__(self, vectorized: bool = False, compact: bool = False) -> None:
+        """
+        Args:
+            vectorized (bool): extracts the ratings with `str.extract` instead of the row-wise path
+            compact (bool): replaces the column with small nullable integers, a categorical
+                            column is converted once per category
+        """
+        self.vectorized = vectorized or compact
+        self.compact = compact
+
     def handle(self, dataset: pd.DataFrame) -> pd.DataFrame:
-        dataset.loc[:, 'rating'] = dataset['rating'].apply(self._convert_rating)
+        if self.compact:
+            dataset['rating'] = self._convert_rating_compact(dataset['rating'])
+        elif self.vectorized:
+            dataset['rating'] = self._convert_rating_column(dataset['rating'])
+        else:
+            # numeric whichever ratings fail, so the partitions of `PartitionedExecutor` concatenate to one dtype
+            dataset['rating'] = pd.to_numeric(dataset['rating'].apply(self._convert_rating))
 
         return super().handle(dataset)
 
+    def _convert_rating_column(self, ratings: pd.Series) -> pd.Series:
+        """
+            Column-wise version of `_convert_rating`, non textual ratings become NaN
+
+            Args:
+                ratings (pd.Series): given ratings
+
+            Returns:
+                pd.Series: converted ratings
+        """
+        is_text = ratings.map(lambda rating: isinstance(rating, str))
+        extracted = ratings.where(is_text).astype(object).str.extract(RATING_PATTERN, expand=False)
+
+        # `int` reads every Unicode decimal digit the pattern matches, e.g. "٣", as `_convert_rating` does
+        return pd.to_numeric(extracted.map(int, na_action='ignore'))
+
+    def _convert_rating_compact(self, ratings: pd.Series) -> pd.Series:
+        """
+            Args:
+                ratings (pd.Series): given ratings, categorical or textual
+
+            Returns:
+                pd.Series: converted ratings as small nullable integers
+        """
+        if not isinstance(ratings.dtype, pd.CategoricalDtype):
+            return small_integers(self._convert_rating_column(ratings))
+
+        categories = small_integers(self._convert_rating_column(pd.Series(ratings.cat.categories, dtype=object)))
+        codes = ratings.cat.codes.to_numpy()
+
+        return pd.Series(categories.array.take(codes, allow_fill=True), index=ratings.index)
+
     def _convert_rating(self, rating: str) -> float | None:
         """
             Because of some sources having different rating representation,
@@ -85,7 +294,7 @@ class RatingConverterHandler(AbstractHandler):
         if pd.isna(rating) or not isinstance(rating, str):
             return None
         else:
-            rating_match = re.search(r'\b\d+\b', rating)
+            rating_match = RATING_PATTERN.search(rating)
             if rating_match:
                 return int(rating_match.group())
             else:
@@ -1,7 +1,47 @@
 
+import os
+
+from typing import Callable, Iterable
+
 import pandas as pd
 
+from .abstract_handler import Handler
+from .deduplication import DeduplicationHandler
+from .dtypes import CSV_DTYPES, compact_reviews
+from .partitioned_executor import PartitionedExecutor
 from .preprocessing_handler import PreprocessingHandler, ProcessingHandler, RatingConverterHandler
+from ..result_cache import ResultCache
+from ..review_store import ReviewStore
+
+
+def build_pipeline(vectorized: bool = False,
+                   cache: ResultCache | None = None,
+                   compact: bool = False,
+                   fast_text: bool = False,
+                   partition_size: int = 50_000) -> Handler:
+    """
+        Builds the preprocessing chain shared by the in-memory and the streaming preprocessor,
+        the text handlers memoize their results in the cache when one is given, the
+        compact chain replaces the columns with compact dtypes, see `dtypes.compact_reviews`,
+        and works through the comments `partition_size` rows at a time, and the fast text
+        chain expands contractions and tokenizes with `fast_text`
+    """
+    pipeline = PreprocessingHandler(vectorized=vectorized, cache=cache, compact=compact, fast_text=fast_text,
+                                    partition_size=partition_size)
+    (pipeline
+         .set_next(ProcessingHandler(vectorized=vectorized, cache=cache, compact=compact, fast_text=fast_text,
+                                     partition_size=partition_size))
+         .set_next(RatingConverterHandler(vectorized=vectorized, compact=compact)))
+
+    return pipeline
+
+
+def validate_columns(columns: Iterable[str], required_column: list[str]) -> None:
+    """
+        Validates required columns in the dataset
+    """
+    for column in columns:
+        assert column in required_column, f"Column {column} not present in the dataset"
 
 
 class ReviewsPreprocessor:
@@ -9,29 +49,120 @@ class ReviewsPreprocessor:
         This class represents a preprocessing pipeline for crawled reviews.
         It requires a strict column identification with concrete type.
         The data is passed through several techniques to have as output
-        clean textual data.
+        clean textual data. The dataset can be read from a `ReviewStore`
+        and the clean data appended to another one. With a deduplication
+        threshold the clean comments are grouped into near-duplicates
+        across the whole dataset, see `DeduplicationHandler`.
 
         Returns:
             pd.Dataframe: clean textual data
     """
 
-    def __init__(self, dataset: pd.DataFrame) -> None:
-        self.dataset = dataset
-        self.pipeline = PreprocessingHandler()
-        (self.pipeline
-             .set_next(ProcessingHandler())
-             .set_next(RatingConverterHandler()))
-
+    def __init__(self,
+                 dataset: pd.DataFrame | ReviewStore,
+                 vectorized: bool = False,
+                 n_workers: int | None = 1,
+                 partition_size: int = 50_000,
+                 cache: ResultCache | None = None,
+                 compact: bool = False,
+                 fast_text: bool = False,
+                 output: ReviewStore | None = None,
+                 deduplicate: float | None = None) -> None:
         self.required_column = ['posting_time', 'rating', 'comment']
+        self.dataset = dataset.read(columns=self.required_column) if isinstance(dataset, ReviewStore) else dataset
+        self.pipeline = build_pipeline(vectorized, cache, compact, fast_text, partition_size)
+        self.compact = compact
+        self.executor = PartitionedExecutor(self.pipeline, partition_size=partition_size, n_workers=n_workers)
+        self.output = output
+        self.deduplicator = DeduplicationHandler(threshold=deduplicate) if deduplicate is not None else None
+
         self.__validate_data()
 
     def __validate_data(self) -> None:
         """
             Validates required columns in the dataset
         """
-        for column in self.dataset.columns:
-            assert column in self.required_column, f"Column {column} not present in the dataset"
+        validate_columns(self.dataset.columns, self.required_column)
 
     def execute(self) -> None:
-        self.dataset = self.dataset.dropna()
-        self.dataset = self.pipeline.handle(self.dataset)
+        self.dataset = compact_reviews(self.dataset) if self.compact else self.dataset.dropna()
+        self.dataset = self.executor.execute(self.dataset)
+        if self.deduplicator is not None:
+            # after the partitions are joined, so duplicates in different partitions are found
+            self.dataset = self.deduplicator.handle(self.dataset)
+
+        if self.output is not None:
+            self.output.append(self.dataset)
+
+
+class StreamingReviewsPreprocessor:
+    """
+        Chunked variant of `ReviewsPreprocessor` for datasets which do not fit in memory.
+        Chunks are read from a CSV file, a `ReviewStore` or any iterator of DataFrames, passed through
+        the preprocessing chain and handed to the sink one by one, so peak memory is
+        bounded by the chunk size. The schema is validated once, on the first chunk.
+    """
+
+    def __init__(self,
+                 chunksize: int = 100_000,
+                 vectorized: bool = False,
+                 n_workers: int | None = 1,
+                 partition_size: int = 50_000,
+                 cache: ResultCache | None = None,
+                 compact: bool = False,
+                 fast_text: bool = False) -> None:
+        self.chunksize = chunksize
+        self.pipeline = build_pipeline(vectorized, cache, compact, fast_text, partition_size)
+        self.compact = compact
+        self.executor = PartitionedExecutor(self.pipeline, partition_size=partition_size, n_workers=n_workers)
+        self.required_column = ['posting_time', 'rating', 'comment']
+
+    def execute(self,
+                source: str | os.PathLike | ReviewStore | Iterable[pd.DataFrame],
+                sink: str | os.PathLike | ReviewStore | Callable[[pd.DataFrame], None]) -> int:
+        """
+            Args:
+                source: path of a CSV file, a review store or an iterable of DataFrame chunks
+                sink: path of the output CSV file, a review store the processed chunks are appended to
+                    or a callable receiving every processed chunk
+
+            Returns:
+                int: number of rows written to the sink
+        """
+        if isinstance(source, (str, os.PathLike)):
+            validate_columns(pd.read_csv(source, nrows=0).columns, self.required_column)
+            chunks = pd.read_csv(source, chunksize=self.chunksize, dtype=CSV_DTYPES if self.compact else None)
+        elif isinstance(source, ReviewStore):
+            chunks = source.iter_batches(batch_size=self.chunksize, columns=self.required_column)
+        else:
+            chunks = iter(source)
+
+        if isinstance(sink, ReviewStore):
+            write = sink.append
+        else:
+            write = sink if callable(sink) else self._csv_writer(sink)
+        rows = 0
+
+        for index, chunk in enumerate(chunks):
+            if index == 0 and not isinstance(source, (str, os.PathLike)):
+                validate_columns(chunk.columns, self.required_column)
+
+            chunk = self.executor.execute(compact_reviews(chunk) if self.compact else chunk.dropna())
+            write(chunk)
+            rows += len(chunk)
+
+        return rows
+
+    @staticmethod
+    def _csv_writer(path: str | os.PathLike) -> Callable[[pd.DataFrame], None]:
+        """
+            Returns a writer that truncates the file on the first chunk and appends the following ones
+        """
+        header_written = False
+
+        def write(chunk: pd.DataFrame) -> None:
+            nonlocal header_written
+            chunk.to_csv(path, mode='a' if header_written else 'w', header=not header_written, index=False)
+            header_written = True
+
+        return write
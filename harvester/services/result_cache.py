@@ -0,0 +1,135 @@
+
+import hashlib
+import pickle
+import sqlite3
+import time
+
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+
+class ResultCache:
+    """
+        Content addressed, SQLite backed memo of per-review results. An entry is keyed on
+        a hash of the stage tag and the review text, the stage tag names the stage and
+        the version of its model, so bumping it invalidates the old results.
+        The cache holds at most `max_entries` results, the least recently used ones
+        are evicted first. The connection is opened lazily and is not pickled, so a
+        cache can be shipped to worker processes, each of them keeps its own counters.
+    """
+    QUERY_BATCH = 500
+
+    def __init__(self, path: str, max_entries: int = 1_000_000) -> None:
+        """
+            @param path: SQLite database file
+            @param max_entries: maximum number of cached results
+        """
+        assert max_entries > 0, "max_entries must be positive"
+
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def __getstate__(self) -> dict:
+        return {**self.__dict__, '_connection': None}
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, timeout=60)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB, accessed INTEGER)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+
+        return self._connection
+
+    @staticmethod
+    def key(stage: str, text: str) -> str:
+        return hashlib.sha1(f"{stage}\x1f{text}".encode('utf-8')).hexdigest()
+
+    def get_many(self, stage: str, texts: Iterable[str]) -> dict[str, Any]:
+        """
+            Looks up the results of the given texts and marks them as recently used.
+            @param stage: stage and version tag
+            @param texts: review texts
+
+            @return: results of the cached texts, by text
+        """
+        keys = {self.key(stage, text): text for text in texts}
+        key_list = list(keys)
+        found = {}
+
+        for start in range(0, len(key_list), self.QUERY_BATCH):
+            batch = key_list[start:start + self.QUERY_BATCH]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.connection.execute(f"SELECT key, value FROM results WHERE key IN ({placeholders})", batch)
+            found.update((keys[key], pickle.loads(value)) for key, value in rows)
+            self.connection.execute(f"UPDATE results SET accessed = ? WHERE key IN ({placeholders})",
+                                    [time.time_ns(), *batch])
+
+        self.connection.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+
+        return found
+
+    def put_many(self, stage: str, results: dict[str, Any]) -> None:
+        """
+            Stores the results of the given texts and evicts the least recently used entries.
+            @param stage: stage and version tag
+            @param results: results by text
+        """
+        accessed = time.time_ns()
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+            ((self.key(stage, text), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), accessed)
+             for text, value in results.items()))
+
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            self.connection.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed LIMIT ?)", (excess,))
+
+        self.connection.commit()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def cached_apply(cache: Optional[ResultCache],
+                 stage: str,
+                 texts: Sequence,
+                 compute: Callable[[list], Sequence]) -> list:
+    """
+        Maps `compute` over the texts, computing only the distinct texts which are not cached.
+        Non textual values are always computed and never cached.
+        @param cache: result cache, `None` computes every text
+        @param stage: stage and version tag
+        @param texts: review texts
+        @param compute: computes the results of a list of texts in one batch
+
+        @return: result of every text
+    """
+    if cache is None:
+        return list(compute(list(texts)))
+
+    distinct = list(dict.fromkeys(text for text in texts if isinstance(text, str)))
+    results = cache.get_many(stage, distinct)
+
+    missing = [text for text in distinct if text not in results]
+    if missing:
+        computed = dict(zip(missing, compute(missing)))
+        cache.put_many(stage, computed)
+        results.update(computed)
+
+    uncached = [text for text in texts if not isinstance(text, str)]
+    uncached_results = iter(compute(uncached)) if uncached else iter(())
+
+    return [results[text] if isinstance(text, str) else next(uncached_results) for text in texts]
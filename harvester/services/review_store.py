@@ -0,0 +1,237 @@
+import json
+import os
+import uuid
+
+from datetime import date, datetime
+from typing import Iterable, Iterator, Optional, Sequence
+
+import pandas as pd
+
+from .preprocessor.dtypes import POSTING_TIME_FORMAT
+
+DateLike = date | datetime | str | pd.Timestamp
+
+
+class ReviewStore:
+    """
+        Parquet dataset of reviews partitioned by posting date. `posting_time` is parsed once,
+        when the reviews are appended, and every append adds new files to the partitions of
+        its reviews, so nothing is rewritten. Reads select columns and filter by date range
+        and rating, partitions outside of the date range are not opened at all and row groups
+        are skipped by their statistics. Every append is cast to the schema of the first one.
+        Reviews with an unparsable posting time are kept in the null partition. The granularity
+        is saved next to the dataset with the first append, the partitions are pruned by it.
+    """
+    PARTITION_COLUMN = 'posting_period'
+    GRANULARITIES = {'day': '%Y-%m-%d', 'month': '%Y-%m', 'year': '%Y'}
+    DEFAULT_GRANULARITY = 'month'
+    # a leading underscore keeps the file out of the Parquet dataset
+    METADATA_FILE = '_review_store.json'
+
+    def __init__(self,
+                 path: str | os.PathLike,
+                 granularity: Optional[str] = None,
+                 max_rows_per_file: int = 1_000_000) -> None:
+        """
+            @param path: directory of the dataset
+            @param granularity: `day`, `month` or `year`, the time span of one partition, the saved one
+                                of an existing store by default, otherwise `month`
+            @param max_rows_per_file: rows per Parquet file within a partition
+            @raise ValueError: when the granularity differs from the one the store was written with
+        """
+        assert granularity is None or granularity in self.GRANULARITIES, \
+            f"Granularity {granularity} is not one of {tuple(self.GRANULARITIES)}"
+
+        self.path = os.fspath(path)
+        self.max_rows_per_file = max_rows_per_file
+        self.granularity = self._check_granularity(granularity) or granularity or self.DEFAULT_GRANULARITY
+
+    @property
+    def partitioning(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        return ds.partitioning(pa.schema([(self.PARTITION_COLUMN, pa.string())]), flavor='hive')
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.path) and any(
+            name.endswith('.parquet') for _, _, names in os.walk(self.path) for name in names)
+
+    def dataset(self):
+        import pyarrow.dataset as ds
+
+        return ds.dataset(self.path, format='parquet', partitioning=self.partitioning)
+
+    def append(self, dataset: pd.DataFrame) -> int:
+        """
+            Parses the posting times and writes the reviews to their partitions.
+            @param dataset: reviews with a `posting_time` column, as strings or datetimes
+
+            @return: number of appended rows
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        assert 'posting_time' in dataset, "Column posting_time not present in the dataset"
+        assert self.PARTITION_COLUMN not in dataset, f"Column {self.PARTITION_COLUMN} is reserved for the store"
+
+        # a store written before the granularity was saved is left as it is
+        if self._check_granularity(self.granularity) is None and not self.exists():
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, self.METADATA_FILE), 'w', encoding='utf-8') as file:
+                json.dump({'granularity': self.granularity}, file)
+
+        posting_times = self.parse_posting_times(dataset['posting_time'])
+        # reviews share few posting days, every distinct day is formatted once
+        codes, days = pd.factorize(posting_times)
+        periods = days.strftime(self.GRANULARITIES[self.granularity]).to_numpy(dtype=object)[codes]
+        periods[codes == -1] = None
+        table = pa.Table.from_pandas(dataset.assign(posting_time=posting_times), preserve_index=False)
+
+        if self.exists():
+            schema = self.dataset().schema
+            schema = schema.remove(schema.get_field_index(self.PARTITION_COLUMN))
+            assert set(schema.names) == set(table.column_names), \
+                f"Columns {table.column_names} do not match the store columns {schema.names}"
+            table = table.select(schema.names).cast(schema)
+
+        table = table.append_column(self.PARTITION_COLUMN, pa.array(periods, type=pa.string()))
+        ds.write_dataset(table, self.path, format='parquet', partitioning=self.partitioning,
+                         basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                         existing_data_behavior='overwrite_or_ignore',
+                         max_rows_per_file=self.max_rows_per_file, max_rows_per_group=min(self.max_rows_per_file, 1 << 20))
+
+        return len(dataset)
+
+    def read(self,
+             columns: Optional[Sequence[str]] = None,
+             start: Optional[DateLike] = None,
+             end: Optional[DateLike] = None,
+             ratings: Optional[Iterable] = None) -> pd.DataFrame:
+        """
+            @param columns: columns to read, all but the partition column by default
+            @param start: first posting day to read, inclusive
+            @param end: last posting day to read, inclusive
+            @param ratings: ratings to read, compared with the stored `rating` column
+
+            @return: the matching reviews
+        """
+        if not self.exists():
+            return pd.DataFrame(columns=list(columns) if columns is not None else None)
+
+        dataset = self.dataset()
+        table = dataset.to_table(columns=self._columns(dataset, columns), filter=self._filter(start, end, ratings))
+
+        return self._to_pandas(table)
+
+    def iter_batches(self,
+                     batch_size: int = 100_000,
+                     columns: Optional[Sequence[str]] = None,
+                     start: Optional[DateLike] = None,
+                     end: Optional[DateLike] = None,
+                     ratings: Optional[Iterable] = None) -> Iterator[pd.DataFrame]:
+        """
+            Reads the matching reviews in batches of at most `batch_size` rows, see `read`
+        """
+        if not self.exists():
+            return
+
+        dataset = self.dataset()
+        for batch in dataset.to_batches(columns=self._columns(dataset, columns),
+                                        filter=self._filter(start, end, ratings), batch_size=batch_size):
+            if batch.num_rows:
+                yield self._to_pandas(batch)
+
+    def count(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+              ratings: Optional[Iterable] = None) -> int:
+        if not self.exists():
+            return 0
+
+        return self.dataset().count_rows(filter=self._filter(start, end, ratings))
+
+    @staticmethod
+    def parse_posting_times(posting_times: pd.Series) -> pd.Series:
+        """
+            Parses Trustpilot dates such as `Oct 21, 2024`, unparsable ones become `NaT`
+        """
+        if pd.api.types.is_datetime64_any_dtype(posting_times):
+            return posting_times
+
+        return pd.to_datetime(posting_times, format=POSTING_TIME_FORMAT, errors='coerce')
+
+    def _check_granularity(self, granularity: Optional[str]) -> Optional[str]:
+        """
+            @return: the saved granularity, `None` for a store written without one
+            @raise ValueError: when the given granularity differs from the saved one
+        """
+        try:
+            with open(os.path.join(self.path, self.METADATA_FILE), encoding='utf-8') as file:
+                saved = json.load(file)['granularity']
+        except FileNotFoundError:
+            return None
+
+        if granularity is not None and granularity != saved:
+            raise ValueError(f"Store {self.path} is partitioned by {saved}, not by {granularity}")
+
+        return saved
+
+    @staticmethod
+    def _to_pandas(table) -> pd.DataFrame:
+        """
+            Converts the table, list columns such as the aspects become Python lists instead of nested arrays
+        """
+        import pyarrow as pa
+
+        dataset = table.to_pandas()
+        for field in table.schema:
+            if pa.types.is_list(field.type) or pa.types.is_large_list(field.type):
+                dataset[field.name] = pd.Series(table.column(field.name).to_pylist(), index=dataset.index, dtype=object)
+
+        return dataset
+
+    def _columns(self, dataset, columns: Optional[Sequence[str]]) -> list[str]:
+        if columns is not None:
+            return list(columns)
+
+        return [name for name in dataset.schema.names if name != self.PARTITION_COLUMN]
+
+    def _filter(self, start: Optional[DateLike], end: Optional[DateLike], ratings: Optional[Iterable]):
+        """
+            Builds the filter expression, the bounds on the partition column prune the partitions
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        expression = None
+        period_format = self.GRANULARITIES[self.granularity]
+
+        def conjoin(condition):
+            nonlocal expression
+            expression = condition if expression is None else expression & condition
+
+        if start is not None:
+            start = pd.Timestamp(start).normalize()
+            conjoin(ds.field(self.PARTITION_COLUMN) >= start.strftime(period_format))
+            conjoin(ds.field('posting_time') >= pa.scalar(start.to_datetime64()))
+        if end is not None:
+            end = pd.Timestamp(end).normalize()
+            conjoin(ds.field(self.PARTITION_COLUMN) <= end.strftime(period_format))
+            conjoin(ds.field('posting_time') < pa.scalar((end + pd.Timedelta(days=1)).to_datetime64()))
+        if ratings is not None:
+            conjoin(ds.field('rating').isin(list(ratings)))
+
+        return expression
+
+
+def load_reviews(dataset: 'pd.DataFrame | ReviewStore', columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+        Returns the dataset as it is or reads the given columns of a store, the ones
+        the store does not hold are skipped
+    """
+    if isinstance(dataset, ReviewStore):
+        if columns is not None and dataset.exists():
+            names = dataset.dataset().schema.names
+            columns = [column for column in columns if column in names]
+        return dataset.read(columns=columns)
+
+    return dataset
@@ -0,0 +1,337 @@
+"""
+    Long-lived local scoring service. The strategies, the NLTK resources and the topic model
+    are loaded once at start, concurrent requests are scored together in micro-batches.
+
+    Usage:
+        python -m harvester.services.scoring_service --port 8080 --model-dir models/
+        python -m harvester.services.scoring_service --unix /tmp/harvester.sock
+
+    Endpoints:
+        POST /score   a review `{"comment": ...}` or a list of reviews, returns their scores
+        GET  /stats   queue depth, batch and latency statistics
+        GET  /health  liveness
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import time
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from .ml_algorithms.ml_appliances import (CreateSentimentAnalysisStrategy, ExtractDominantTopicsStrategy,
+                                          PerformAspectAnalysisStrategy)
+from .ml_algorithms.sentiment_engine import SENTIMENT_COLUMNS
+from .ml_algorithms.topic_engine import dominant_topics
+from .preprocessor.abstract_handler import Handler
+from .preprocessor.preprocessing_handler import PreprocessingHandler, ProcessingHandler
+
+WARM_UP_REVIEW = {'comment': "The bread wasn't fresh, but the staff were friendly."}
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class ScoringService:
+    """
+        Scores single reviews with warm strategies. `score` puts the review on a bounded queue,
+        a batcher task collects the queued reviews into micro-batches of up to `max_batch_size`,
+        waiting at most `latency_budget` seconds after the first review of a batch arrived,
+        and scores every batch in one worker thread, so the event loop keeps accepting requests.
+        Sentiment and aspects are computed from the comment as it is, the topic of a review from
+        its preprocessed comment. The latencies of the last `latency_window` reviews, from arrival
+        to result, are kept for the p50 and p99 of `stats`.
+    """
+
+    def __init__(self,
+                 sentiment: Optional[CreateSentimentAnalysisStrategy] = None,
+                 aspects: Optional[PerformAspectAnalysisStrategy] = None,
+                 topics: Optional[ExtractDominantTopicsStrategy] = None,
+                 max_batch_size: int = 64,
+                 latency_budget: float = 0.005,
+                 max_pending: int = 10_000,
+                 minimum_probability: float = .8,
+                 latency_window: int = 10_000) -> None:
+        """
+            @param sentiment: sentiment strategy, a default one when missing
+            @param aspects: aspect strategy, aspects are not computed when missing
+            @param topics: topic strategy with a trained or saved model, topics are not assigned when missing
+            @param max_batch_size: maximum number of reviews scored at once
+            @param latency_budget: seconds the first review of a batch waits for more reviews
+            @param max_pending: maximum number of queued reviews, further requests are rejected
+            @param minimum_probability: threshold of the dominant topic
+            @param latency_window: number of recent reviews the latency percentiles are computed on
+        """
+        assert max_batch_size > 0, "max_batch_size must be positive"
+        assert latency_budget >= 0, "latency_budget must not be negative"
+
+        self.sentiment = sentiment or CreateSentimentAnalysisStrategy()
+        self.aspects = aspects
+        self.topics = topics
+        self.max_batch_size = max_batch_size
+        self.latency_budget = latency_budget
+        self.max_pending = max_pending
+        self.minimum_probability = minimum_probability
+        self.pipeline: Optional[Handler] = None
+        if topics is not None:
+            self.pipeline = PreprocessingHandler(vectorized=True, fast_text=True)
+            self.pipeline.set_next(ProcessingHandler(vectorized=True, fast_text=True))
+
+        self.requests = 0
+        self.scored = 0
+        self.batches = 0
+        self.rejected = 0
+        self.latencies: deque[float] = deque(maxlen=latency_window)
+        self.queue: Optional[asyncio.Queue] = None
+        self.batcher: Optional[asyncio.Task] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    async def start(self) -> None:
+        """
+            Loads the models and resources by scoring one review, then starts the batcher
+        """
+        self.queue = asyncio.Queue(maxsize=self.max_pending)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='scoring-service')
+
+        started = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.analyze, [WARM_UP_REVIEW])
+        logging.info(f"---Scoring service warmed up in {time.perf_counter() - started:.2f} seconds---")
+
+        self.batcher = asyncio.get_running_loop().create_task(self._batch())
+
+    async def close(self) -> None:
+        if self.batcher is None:
+            return
+
+        self.batcher.cancel()
+        try:
+            await self.batcher
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.executor.shutdown()
+            self.batcher = None
+
+        while not self.queue.empty():
+            _, future, _ = self.queue.get_nowait()
+            future.cancel()
+
+    async def score(self, review: dict) -> dict:
+        """
+            @param review: review with a `comment`
+
+            @return: scores of the review
+            @raise asyncio.QueueFull: when `max_pending` reviews are already queued
+        """
+        return (await self.score_many([review]))[0]
+
+    async def score_many(self, reviews: list[dict]) -> list[dict]:
+        """
+            Queues all reviews or none of them, a list never holds queue slots it is rejected for
+
+            @param reviews: reviews with a `comment`
+
+            @return: scores of every review
+            @raise asyncio.QueueFull: when the queue cannot take every review
+        """
+        assert self.batcher is not None, "The service is not started"
+
+        # checked and queued without awaiting in between, so no other request takes the free slots
+        if self.queue.maxsize > 0 and self.queue.maxsize - self.queue.qsize() < len(reviews):
+            self.rejected += len(reviews)
+            raise asyncio.QueueFull
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for review in reviews:
+            future = loop.create_future()
+            self.queue.put_nowait((review, future, time.perf_counter()))
+            futures.append(future)
+
+        self.requests += len(reviews)
+        return list(await asyncio.gather(*futures))
+
+    def analyze(self, reviews: list[dict]) -> list[dict]:
+        """
+            Scores one batch with the warm strategies
+        """
+        dataset = pd.DataFrame({'comment': [review.get('comment') for review in reviews]})
+        columns = {}
+
+        sentiments = self.sentiment.execute(dataset=dataset.copy(), text_column='comment')
+        for column in SENTIMENT_COLUMNS:
+            columns[column] = [None if math.isnan(score) else score for score in sentiments[column].tolist()]
+
+        if self.aspects is not None:
+            aspects = self.aspects.execute(dataset=dataset.copy(), text_column='comment')['aspects_sentiments']
+            columns['aspects_sentiments'] = [list(map(list, pairs)) for pairs in aspects.tolist()]
+
+        if self.topics is not None:
+            texts = self.pipeline.handle(dataset.copy())['comment'].tolist()
+            document_topics = self.topics.infer(texts)
+            columns['topic'] = dominant_topics(document_topics, self.minimum_probability)
+            columns['topic_probability'] = document_topics.max(axis=1, initial=0.).tolist()
+
+        return [dict(zip(columns, scores)) for scores in zip(*columns.values())]
+
+    def stats(self) -> dict:
+        latencies = np.fromiter(self.latencies, dtype=np.float64, count=len(self.latencies))
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1_000 if len(latencies) else (None, None)
+
+        return {'queue_depth': self.queue.qsize() if self.queue is not None else 0,
+                'requests': self.requests,
+                'rejected': self.rejected,
+                'batches': self.batches,
+                'mean_batch_size': self.scored / self.batches if self.batches else None,
+                'p50_ms': p50,
+                'p99_ms': p99}
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8080, path: Optional[str] = None) -> asyncio.Server:
+        """
+            Starts serving HTTP/1.1 with keep-alive, on the Unix socket when a path is given.
+
+            @return: the listening server
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self._serve_connection, path=path)
+
+        return await asyncio.start_server(self._serve_connection, host=host, port=port)
+
+    async def _batch(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self.queue.get()]
+            deadline = batch[0][2] + self.latency_budget
+
+            while len(batch) < self.max_batch_size:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            reviews = [review for review, _, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.analyze, reviews)
+            except Exception as error:
+                logging.exception("Scoring a batch failed")
+                results = [error] * len(batch)
+
+            finished = time.perf_counter()
+            self.batches += 1
+            self.scored += len(batch)
+            for (_, future, arrived), result in zip(batch, results):
+                self.latencies.append(finished - arrived)
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while request_line := await reader.readline():
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                status, payload = await self._route(method, target, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                content = json.dumps(payload).encode()
+                writer.write(f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(content)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + content)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, target: str, body: bytes) -> tuple[int, Any]:
+        route = target.split('?', 1)[0]
+
+        if route == '/health':
+            return 200, {'status': 'ok'}
+        if route == '/stats':
+            return 200, self.stats()
+        if route != '/score':
+            return 404, {'error': f"Unknown route {route}"}
+        if method != 'POST':
+            return 405, {'error': "Reviews are scored with POST"}
+
+        try:
+            reviews = json.loads(body)
+        except json.JSONDecodeError as error:
+            return 400, {'error': f"Invalid JSON: {error}"}
+
+        batch = reviews if isinstance(reviews, list) else [reviews]
+        if not all(isinstance(review, dict) and isinstance(review.get('comment'), str) for review in batch):
+            return 400, {'error': "Every review needs a textual comment"}
+
+        try:
+            results = await self.score_many(batch)
+        except asyncio.QueueFull:
+            return 503, {'error': "Too many pending reviews"}
+        except Exception as error:
+            return 500, {'error': str(error)}
+
+        return 200, results if isinstance(reviews, list) else results[0]
+
+
+async def _run(args: argparse.Namespace) -> None:
+    service = ScoringService(aspects=PerformAspectAnalysisStrategy() if args.aspects else None,
+                             topics=ExtractDominantTopicsStrategy(model_dir=args.model_dir) if args.model_dir else None,
+                             max_batch_size=args.max_batch_size,
+                             latency_budget=args.latency_budget_ms / 1_000)
+    await service.start()
+    server = await service.serve(host=args.host, port=args.port, path=args.unix)
+    logging.info(f"---Scoring service listening on {args.unix or f'{args.host}:{args.port}'}---")
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--unix', help="path of a Unix socket to serve on instead of TCP")
+    parser.add_argument('--model-dir', help="directory of a saved topic model, topics are not assigned without one")
+    parser.add_argument('--no-aspects', dest='aspects', action='store_false')
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--latency-budget-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import pandas as pd
+
+from .ml_algorithms.ml_appliances import CreateSentimentAnalysisStrategy
+from .preprocessor.reviews_preprocessor import build_pipeline, validate_columns
+from .result_cache import ResultCache
+
+REQUIRED_COLUMNS = ['posting_time', 'rating', 'comment']
+
+# marks the end of the stream in the queue
+_CLOSED = object()
+
+
+class StreamingAnalyzer:
+    """
+        Preprocesses and scores reviews while they are still being crawled. Records are put
+        on a bounded asyncio queue, a consumer task collects them into micro-batches of up to
+        `batch_size` records, waiting at most `max_delay` seconds for a batch to fill, and
+        analyzes every batch in a worker thread, so the event loop keeps serving the network.
+        A full queue suspends `put`, which is the backpressure on the producer.
+        Every analyzed batch is handed to the sink in the worker thread, in crawl order.
+    """
+
+    def __init__(self,
+                 sink: Callable[[pd.DataFrame], None],
+                 batch_size: int = 200,
+                 max_pending: int = 1_000,
+                 max_delay: float = 5.0,
+                 vectorized: bool = True,
+                 cache: Optional[ResultCache] = None,
+                 sentiment: Optional[CreateSentimentAnalysisStrategy] = None) -> None:
+        """
+            @param sink: receives every analyzed batch
+            @param batch_size: maximum number of records analyzed at once
+            @param max_pending: maximum number of records waiting in the queue
+            @param max_delay: seconds an incomplete batch waits for more records
+            @param vectorized: runs the vectorized preprocessing handlers
+            @param cache: result cache of the preprocessing handlers and the sentiment strategy
+            @param sentiment: sentiment strategy, by default one scoring in the worker thread
+        """
+        assert batch_size > 0, "batch_size must be positive"
+        assert max_pending > 0, "max_pending must be positive"
+
+        self.sink = sink
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.max_delay = max_delay
+        self.pipeline = build_pipeline(vectorized=vectorized, cache=cache)
+        self.sentiment = sentiment or CreateSentimentAnalysisStrategy(cache=cache)
+
+        self.batches = 0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.queue: Optional[asyncio.Queue] = None
+        self.consumer: Optional[asyncio.Task] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    async def start(self) -> None:
+        self.queue = asyncio.Queue(maxsize=self.max_pending)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='streaming-analysis')
+        self.consumer = asyncio.get_running_loop().create_task(self._consume())
+
+    def offer(self, record: dict) -> bool:
+        """
+            Enqueues the record without waiting.
+
+            @return: False if the queue is full, the record then has to be passed to `put`
+        """
+        self._raise_if_failed()
+        try:
+            self.queue.put_nowait(record)
+        except asyncio.QueueFull:
+            return False
+
+        self.rows_in += 1
+        return True
+
+    async def put(self, record: dict) -> None:
+        """
+            Enqueues the record, waits while the queue is full
+        """
+        self._raise_if_failed()
+        await self.queue.put(record)
+        self.rows_in += 1
+
+    async def close(self) -> None:
+        """
+            Analyzes the remaining records and stops the consumer
+        """
+        if self.consumer is None:
+            return
+
+        if not self.consumer.done():
+            await self.queue.put(_CLOSED)
+        try:
+            await self.consumer
+        finally:
+            self.executor.shutdown()
+            self.consumer = None
+
+        logging.info(f"---{self.rows_out} reviews analyzed in {self.batches} batches---")
+
+    def analyze(self, records: list[dict]) -> pd.DataFrame:
+        """
+            Runs the preprocessing chain and the sentiment strategy on one batch. Columns besides
+            the review columns, such as the `company` of the multi-company spider, are not analyzed,
+            they are set aside and put back in front of the analyzed rows.
+        """
+        dataset = pd.DataFrame.from_records(records)
+        carried = dataset[[column for column in dataset.columns if column not in REQUIRED_COLUMNS]]
+        dataset = dataset.drop(columns=carried.columns)
+        validate_columns(dataset.columns, REQUIRED_COLUMNS)
+
+        dataset = self.pipeline.handle(dataset.dropna())
+        analyzed = self.sentiment.execute(dataset=dataset, text_column='comment')
+
+        if not len(carried.columns):
+            return analyzed
+
+        return pd.concat([carried.loc[analyzed.index], analyzed], axis=1)
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        closed = False
+
+        while not closed:
+            batch, closed = await self._next_batch(loop)
+            if batch:
+                await loop.run_in_executor(self.executor, self._analyze_batch, batch)
+
+    async def _next_batch(self, loop: asyncio.AbstractEventLoop) -> tuple[list[dict], bool]:
+        """
+            Collects up to `batch_size` records, the first one is awaited without a deadline
+
+            @return: the batch and whether the stream is closed
+        """
+        batch = []
+        deadline = None
+
+        while len(batch) < self.batch_size:
+            if not self.queue.empty():
+                record = self.queue.get_nowait()
+            elif deadline is None:
+                record = await self.queue.get()
+            else:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+            if record is _CLOSED:
+                return batch, True
+
+            batch.append(record)
+            if deadline is None:
+                deadline = loop.time() + self.max_delay
+
+        return batch, False
+
+    def _analyze_batch(self, batch: list[dict]) -> None:
+        analyzed = self.analyze(batch)
+        self.sink(analyzed)
+
+        self.batches += 1
+        self.rows_out += len(analyzed)
+
+    def _raise_if_failed(self) -> None:
+        assert self.consumer is not None, "The analyzer is not started"
+
+        if self.consumer.done():
+            # re-raises the exception of the failed analysis
+            self.consumer.result()
+            raise RuntimeError("The analyzer is closed")
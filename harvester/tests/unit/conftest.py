@@ -4,5 +4,11 @@ from pytest import fixture
 
 
 @fixture(scope="session")
-def mock_reviews() -> pd.DataFrame:
+def mock_reviews_file() -> pd.DataFrame:
     return pd.read_csv("../resources/aldi_mock_reviews.csv")
+
+
+@fixture
+def mock_reviews(mock_reviews_file) -> pd.DataFrame:
+    # handlers and strategies change the dataset in place, every test gets its own copy
+    return mock_reviews_file.copy()
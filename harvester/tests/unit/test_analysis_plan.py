@@ -0,0 +1,46 @@
+from harvester.services.ml_algorithms.analysis_plan import AnalysisPlan
+from harvester.services.ml_algorithms.annotations import Annotator
+from harvester.services.ml_algorithms.ml_appliances import (CreateSentimentAnalysisStrategy,
+                                                            ExtractDominantTopicsStrategy,
+                                                            PerformAspectAnalysisStrategy)
+from harvester.services.result_cache import ResultCache
+
+
+def test_analysis_plan_matches_separate_strategies(mock_reviews, tmp_path):
+    reviews = mock_reviews[['posting_time', 'rating', 'comment']]
+    topics = ExtractDominantTopicsStrategy().execute(dataset=reviews, text_column='comment', num_topics=2)
+    aspects = PerformAspectAnalysisStrategy().execute(dataset=reviews.copy(), text_column='comment')
+
+    plan = (AnalysisPlan()
+            .add(ExtractDominantTopicsStrategy(), num_topics=2)
+            .add(PerformAspectAnalysisStrategy(cache=ResultCache(str(tmp_path / 'cache.sqlite'))))
+            .add(CreateSentimentAnalysisStrategy()))
+    planned_topics, planned_aspects, sentiments = plan.run(reviews.copy(), text_column='comment')
+
+    assert {'sentences', 'tokens', 'pos_tags', 'words'} == plan.required_annotations
+    assert topics.equals(planned_topics)
+    assert aspects['aspects_sentiments'].tolist() == planned_aspects['aspects_sentiments'].tolist()
+    assert len(reviews) == len(sentiments)
+
+
+def test_annotator_computes_only_requested_annotations(mock_reviews):
+    texts = mock_reviews['comment'].tolist()
+    words = Annotator().annotate(texts, ['words'])
+    chunked = Annotator(chunk_size=2).annotate(texts, ['pos_tags'])
+    taken = chunked.take([2, 0])
+
+    assert {'words'} == words.available
+    assert [text.split() for text in texts] == list(words.spans('words'))
+    assert {'sentences', 'tokens', 'pos_tags'} == chunked.available
+    assert Annotator().annotate(texts, ['tokens']).tokens.tolist() == chunked.tokens.tolist()
+    assert [chunked.span('tokens', 2), chunked.span('tokens', 0)] == list(taken.spans('tokens'))
+
+
+def test_analysis_plan_runs_on_empty_reviews(mock_reviews):
+    reviews = mock_reviews[['posting_time', 'rating', 'comment']].head(0)
+    aspects = PerformAspectAnalysisStrategy().execute(dataset=reviews.copy(), text_column='comment')
+
+    planned_aspects, = AnalysisPlan().add(PerformAspectAnalysisStrategy()).run(reviews.copy(), text_column='comment')
+
+    assert {'sentences', 'tokens', 'pos_tags'} == Annotator().annotate([], ['pos_tags']).available
+    assert planned_aspects['aspects_sentiments'].tolist() == aspects['aspects_sentiments'].tolist() == []
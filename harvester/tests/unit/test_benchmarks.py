@@ -0,0 +1,43 @@
+
+import pandas as pd
+
+from harvester.benchmarks.bench_suite import compare
+from harvester.benchmarks.synthetic_reviews import generate_reviews
+
+
+def test_generate_reviews_is_deterministic(mock_reviews):
+    reviews = generate_reviews(500, seed=7)
+
+    pd.testing.assert_frame_equal(reviews, generate_reviews(500, seed=7))
+    assert mock_reviews.columns.tolist() == reviews.columns.tolist()
+    assert reviews['rating'].str.fullmatch(r'Rated [1-5] out of 5 stars').all()
+    assert pd.to_datetime(reviews['posting_time'], format='%b %d, %Y').notna().all()
+
+
+def test_compare_flags_regressions():
+    baseline = [{'stage': 'sentiment_strategy', 'rows': 1000, 'rows_per_s': 100.0, 'peak_rss_mb': 100.0},
+                {'stage': 'aspect_strategy', 'rows': 1000, 'rows_per_s': 100.0, 'peak_rss_mb': 100.0}]
+    current = [{'stage': 'sentiment_strategy', 'rows': 1000, 'rows_per_s': 95.0, 'peak_rss_mb': 105.0},
+               {'stage': 'aspect_strategy', 'rows': 1000, 'rows_per_s': 80.0, 'peak_rss_mb': 100.0},
+               {'stage': 'topic_strategy', 'rows': 1000, 'rows_per_s': 10.0, 'peak_rss_mb': 100.0}]
+
+    comparisons = compare(baseline, current, tolerance=0.1)
+
+    assert [False, True] == [comparison['regression'] for comparison in comparisons]
+
+
+def test_compare_matches_runs_of_the_same_path_and_batch_size():
+    result = {'stage': 'preprocessing_handler', 'rows': 1000, 'peak_rss_mb': 100.0}
+    baseline = [{**result, 'batch_size': 1000, 'vectorized': True, 'rows_per_s': 100.0},
+                {**result, 'batch_size': 1000, 'vectorized': False, 'rows_per_s': 10.0},
+                {**result, 'batch_size': 100, 'vectorized': True, 'rows_per_s': 50.0}]
+    current = [{**result, 'batch_size': 1000, 'vectorized': False, 'rows_per_s': 10.0},
+               {**result, 'batch_size': 100, 'vectorized': True, 'rows_per_s': 50.0},
+               {**result, 'batch_size': 10, 'vectorized': True, 'rows_per_s': 5.0}]
+
+    comparisons = compare(baseline, current, tolerance=0.1)
+
+    assert [(1000, False), (100, True)] == [(comparison['batch_size'], comparison['vectorized'])
+                                            for comparison in comparisons]
+    assert [1.0, 1.0] == [comparison['throughput_ratio'] for comparison in comparisons]
+    assert not any(comparison['regression'] for comparison in comparisons)
@@ -0,0 +1,209 @@
+
+import asyncio
+import inspect
+
+import pandas as pd
+
+from types import SimpleNamespace
+
+import pytest
+
+from scrapy import Request
+from scrapy.crawler import Crawler
+from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import HtmlResponse
+from scrapy.settings import Settings
+from scrapy.utils.test import get_crawler
+
+from harvester.services.crawlers.crawlers.http_cache import CrawlCacheMode, cached_responses
+from harvester.services.crawlers.crawlers import pipelines
+from harvester.services.crawlers.crawlers import settings as crawlers_settings
+from harvester.services.crawlers.crawlers.items import AldiReviewsItem, TrustpilotReviewsItem
+from harvester.services.crawlers.crawlers.pipelines import CrawlersPipeline
+from harvester.services.crawlers.crawlers.spiders.trustpilot_alti_reviews import AldiReviewsSpider
+from harvester.services.crawlers.crawlers.spiders.trustpilot_reviews import TrustpilotReviewsSpider, parse_targets
+
+
+def reviews_page(url: str, reviews: pd.DataFrame, next_page: str | None = None) -> HtmlResponse:
+    articles = ''.join(
+        f'<article><time>{review.posting_time}</time>'
+        f'<div class="star-rating_starRating__4rrcf"><img alt="{review.rating}"></div>'
+        f'<div class="styles_reviewContent__0Q2Tg"><p class="typography_body-l__KUYFJ">{review.comment}</p></div>'
+        f'</article>'
+        for review in reviews.itertuples())
+    pagination = f'<a class="pagination-link_next__SDNU4" href="{next_page}">Next</a>' if next_page else ''
+    body = (f'<html><body><nav class="pagination_pagination___F1qS">{pagination}</nav>'
+            f'<section class="styles_reviewsContainer__3_GQw">{articles}</section></body></html>')
+
+    return HtmlResponse(url=url, body=body, encoding='utf-8', request=Request(url))
+
+
+def test_crawlers_pipeline_rotates_part_files(mock_reviews, tmp_path):
+    spider = SimpleNamespace(filename=str(tmp_path / 'aldi-reviews.csv'))
+    pipeline = CrawlersPipeline(flush_items=2, flush_interval=0, rows_per_file=4)
+
+    pipeline.open_spider(spider)
+    for _, review in mock_reviews[['posting_time', 'rating', 'comment']].iterrows():
+        pipeline.process_item(AldiReviewsItem(**review.to_dict()), spider)
+    pipeline.close_spider(spider)
+
+    part_files = sorted(tmp_path.glob('aldi-reviews-*.csv'))
+    written = pd.concat([pd.read_csv(part_file) for part_file in part_files], ignore_index=True)
+
+    assert [] == list(tmp_path.glob('*.inprogress'))
+    assert len(part_files) == -(-len(mock_reviews) // 4)
+    assert mock_reviews['comment'].tolist() == written['comment'].tolist()
+
+
+def test_incremental_crawl_stops_at_known_reviews(mock_reviews, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fingerprints_filename = str(tmp_path / 'fingerprints.sqlite')
+    first_page = reviews_page('https://example.com/page-1', mock_reviews.iloc[:2], next_page='/page-2')
+
+    first_crawl = AldiReviewsSpider(incremental=True, fingerprints_filename=fingerprints_filename)
+    first_results = list(first_crawl.parse(first_page))
+    first_crawl.closed('finished')
+
+    second_crawl = AldiReviewsSpider(incremental='1', fingerprints_filename=fingerprints_filename)
+    second_results = list(second_crawl.parse(first_page))
+    second_crawl.closed('finished')
+
+    assert 3 == len(first_results)
+    assert isinstance(first_results[-1], Request)
+    assert [] == second_results
+
+
+def test_parse_targets_accepts_pairs_and_json(tmp_path):
+    expected = {'aldi': 'https://example.com/aldi', 'lidl.de': 'https://example.com/lidl'}
+    targets_file = tmp_path / 'targets.json'
+    targets_file.write_text('[{"company": "aldi", "url": "https://example.com/aldi"},'
+                            ' {"company": "lidl.de", "url": "https://example.com/lidl"}]')
+
+    assert expected == parse_targets('aldi=https://example.com/aldi, lidl.de=https://example.com/lidl')
+    assert expected == parse_targets(str(targets_file))
+    assert expected == parse_targets('{"aldi": "https://example.com/aldi", "lidl.de": "https://example.com/lidl"}')
+
+
+def test_companies_are_crawled_in_own_slots_and_written_to_own_files(mock_reviews, tmp_path):
+    reviews = mock_reviews[['posting_time', 'rating', 'comment']].copy()
+    spider = TrustpilotReviewsSpider(targets={'aldi': 'https://example.com/aldi', 'lidl': 'https://example.com/lidl'},
+                                     directory=str(tmp_path))
+    start_requests = list(spider.start_requests())
+
+    assert ['trustpilot-aldi', 'trustpilot-lidl'] == [request.meta['download_slot'] for request in start_requests]
+
+    pipeline = CrawlersPipeline(flush_interval=0)
+    pipeline.open_spider(spider)
+    for request, company_reviews in zip(start_requests, (reviews.iloc[:3], reviews.iloc[3:])):
+        response = reviews_page(request.url, company_reviews, next_page='/page-2')
+        response.request.meta.update(request.meta)
+        *items, next_request = spider.parse(response)
+
+        assert next_request.meta == request.meta
+        for item in items:
+            pipeline.process_item(item, spider)
+    pipeline.close_spider(spider)
+
+    assert reviews['comment'][:3].tolist() == pd.read_csv(tmp_path / 'aldi-reviews.csv')['comment'].tolist()
+    assert reviews['comment'][3:].tolist() == pd.read_csv(tmp_path / 'lidl-reviews.csv')['comment'].tolist()
+    assert 'company' not in pd.read_csv(tmp_path / 'lidl-reviews.csv').columns
+
+
+def cache_middleware(mode: str, cache_dir: str) -> tuple[HttpCacheMiddleware, AldiReviewsSpider]:
+    crawler = get_crawler(AldiReviewsSpider, {'ADDONS': {CrawlCacheMode: 0},
+                                              'CRAWL_CACHE_MODE': mode,
+                                              'CRAWL_CACHE_DIR': cache_dir})
+    spider = AldiReviewsSpider.from_crawler(crawler, filename='aldi-reviews.csv')
+    middleware = HttpCacheMiddleware.from_crawler(crawler)
+    middleware.spider_opened(spider)
+
+    return middleware, spider
+
+
+def test_recorded_crawl_is_replayed_from_the_cache_only(mock_reviews, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache_dir = str(tmp_path / 'httpcache')
+    page = reviews_page('https://example.com/page-1', mock_reviews.iloc[:3], next_page='/page-2')
+
+    recorder, spider = cache_middleware('record', cache_dir)
+    assert recorder.process_request(page.request, spider) is None
+    recorder.process_response(page.request, page, spider)
+
+    replayer, spider = cache_middleware('replay', cache_dir)
+    replayed = replayer.process_request(Request(page.url), spider)
+    with pytest.raises(IgnoreRequest):
+        replayer.process_request(Request('https://example.com/page-2'), spider)
+
+    [fixture] = cached_responses(cache_dir, spider.name)
+    recorded_items = [dict(item) for item in spider.parse(page) if not isinstance(item, Request)]
+
+    assert 'cached' in replayed.flags
+    assert recorded_items == [dict(item) for item in spider.parse(replayed) if not isinstance(item, Request)]
+    assert recorded_items == [dict(item) for item in spider.parse(fixture) if not isinstance(item, Request)]
+    assert fixture.request.url == page.url
+    assert all(path.read_bytes()[:2] == b'\x1f\x8b' for path in (tmp_path / 'httpcache').rglob('response_body'))
+
+
+def test_crawl_cache_mode_keeps_explicit_http_cache_settings():
+    crawler = get_crawler(AldiReviewsSpider, {'ADDONS': {CrawlCacheMode: 0}, 'CRAWL_CACHE_MODE': 'replay'})
+    overridden = get_crawler(AldiReviewsSpider, {'ADDONS': {CrawlCacheMode: 0}, 'CRAWL_CACHE_MODE': 'replay',
+                                                 'HTTPCACHE_IGNORE_MISSING': False})
+
+    assert crawler.settings.getbool('HTTPCACHE_ENABLED')
+    assert crawler.settings.getbool('HTTPCACHE_IGNORE_MISSING')
+    assert not overridden.settings.getbool('HTTPCACHE_IGNORE_MISSING')
+    assert not get_crawler(AldiReviewsSpider, {'ADDONS': {CrawlCacheMode: 0}}).settings.getbool('HTTPCACHE_ENABLED')
+
+
+def test_companies_are_analyzed_while_crawling(mock_reviews, tmp_path, monkeypatch):
+    # the pipeline coroutines are awaited on the test's event loop instead of the asyncio reactor
+    monkeypatch.setattr(pipelines, 'deferred_from_coro', lambda coroutine: coroutine)
+    reviews = mock_reviews[['posting_time', 'rating', 'comment']].copy()
+    spider = TrustpilotReviewsSpider(targets={'aldi': 'https://example.com/aldi', 'lidl': 'https://example.com/lidl'},
+                                     directory=str(tmp_path))
+    pipeline = CrawlersPipeline(flush_interval=0, stream_analysis=True, analysis_batch_items=3)
+
+    async def crawl():
+        await pipeline.open_spider(spider)
+        for position, review in enumerate(reviews.to_dict('records')):
+            item = TrustpilotReviewsItem(company=('aldi', 'lidl')[position % 2], **review)
+            if inspect.isawaitable(processed := pipeline.process_item(item, spider)):
+                await processed
+        await pipeline.close_spider(spider)
+
+    asyncio.run(crawl())
+
+    analyzed = pd.read_csv(tmp_path / 'trustpilot-reviews-analyzed.csv')
+    assert len(reviews) == len(analyzed)
+    assert ['aldi', 'lidl'] * (len(reviews) // 2) + ['aldi'] * (len(reviews) % 2) == analyzed['company'].tolist()
+    assert 'compound' in analyzed.columns
+    assert 'company' not in pd.read_csv(tmp_path / 'aldi-reviews.csv').columns
+
+
+def spider_settings(spidercls, cmdline: dict | None = None, **overrides) -> Settings:
+    # the spider settings of `settings.py`, its pipelines and add-ons are imported from the crawlers project
+    settings = Settings()
+    settings.setdict({name: value for name, value in vars(crawlers_settings).items()
+                      if name in TrustpilotReviewsSpider.SPIDER_SETTINGS}, priority='project')
+    settings.setdict(overrides, priority='project')
+    settings.setdict(cmdline or {}, priority='cmdline')
+
+    return Crawler(spidercls, settings).settings
+
+
+def test_throttling_settings_apply_to_the_multi_company_spider_only():
+    aldi = spider_settings(AldiReviewsSpider)
+    trustpilot = spider_settings(TrustpilotReviewsSpider)
+
+    assert not aldi.getbool('AUTOTHROTTLE_ENABLED') and aldi.getint('CONCURRENT_REQUESTS_PER_DOMAIN') == 8
+    assert trustpilot.getbool('AUTOTHROTTLE_ENABLED') and trustpilot.getint('CONCURRENT_REQUESTS_PER_DOMAIN') == 4
+
+
+def test_project_throttling_settings_reach_the_multi_company_spider():
+    edited = spider_settings(TrustpilotReviewsSpider, TRUSTPILOT_CONCURRENT_REQUESTS_PER_COMPANY=2,
+                             TRUSTPILOT_AUTOTHROTTLE_MAX_DELAY=10, CONCURRENT_REQUESTS_PER_DOMAIN=16)
+    overridden = spider_settings(TrustpilotReviewsSpider, cmdline={'CONCURRENT_REQUESTS_PER_DOMAIN': 1})
+
+    assert edited.getint('CONCURRENT_REQUESTS_PER_DOMAIN') == 2 and edited.getfloat('AUTOTHROTTLE_MAX_DELAY') == 10
+    assert overridden.getint('CONCURRENT_REQUESTS_PER_DOMAIN') == 1
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from harvester.services.ml_algorithms.analysis_plan import AnalysisPlan
+from harvester.services.ml_algorithms.ml_appliances import (CreateSentimentAnalysisStrategy,
+                                                            PerformAspectAnalysisStrategy)
+from harvester.services.preprocessor.deduplication import (CANONICAL_COLUMN, DeduplicationHandler,
+                                                           canonical_mapping, lsh_bands, minhash_signatures,
+                                                           near_duplicates)
+from harvester.services.preprocessor.reviews_preprocessor import ReviewsPreprocessor
+from harvester.services.review_store import ReviewStore
+
+
+def duplicated_reviews(mock_reviews) -> pd.DataFrame:
+    reviews = mock_reviews[['posting_time', 'rating', 'comment']]
+    copies = reviews.copy()
+    copies['comment'] = copies['comment'] + '!'
+
+    return pd.concat([reviews, reviews, copies], ignore_index=True)
+
+
+def test_near_duplicates_groups_similar_texts():
+    texts = ['the bread was not fresh and the staff were unfriendly today',
+             'completely different review about the toilet paper',
+             'the bread was not fresh and the staff were unfriendly today!',
+             'the bread was not fresh and the staff were unfriendly',
+             '',
+             '']
+
+    signatures = minhash_signatures(texts)
+
+    assert (signatures[0] == signatures[2]).mean() > .9 > .1 > (signatures[0] == signatures[1]).mean()
+    assert near_duplicates(texts).tolist() == [0, 1, 0, 0, 4, 4]
+    assert near_duplicates(texts, threshold=1.).tolist() == [0, 1, 2, 3, 4, 4]
+    assert lsh_bands(128, .8) == (11, 11)
+
+
+def test_deduplication_handler_maps_duplicates_to_canonical_rows(mock_reviews):
+    reviews = duplicated_reviews(mock_reviews)
+    reviews.index = reviews.index + 100
+    reviews.loc[101, 'comment'] = None
+
+    handled = DeduplicationHandler().handle(reviews)
+    canonical, inverse = canonical_mapping(handled)
+
+    # 105 to 109 repeat 100 to 104 exactly, 110 to 114 nearly, the comment of 101 is missing
+    groups = handled[CANONICAL_COLUMN]
+    assert groups[100] == groups[105] == groups[110]
+    assert groups[101] != groups[106] == groups[111]
+    assert len(canonical) == len(mock_reviews) + 1
+    assert handled.index[canonical].tolist() == [100, 101, 102, 103, 104, 106]
+    assert np.array_equal(groups.to_numpy()[canonical[inverse]], groups.to_numpy())
+
+
+def test_deduplicated_batches_keep_their_groups_in_one_store(mock_reviews, tmp_path):
+    reviews = mock_reviews[['posting_time', 'rating', 'comment']]
+    store = ReviewStore(tmp_path / 'store')
+    # both batches are indexed from 0, their rows share index labels but not comments
+    for batch in (reviews.iloc[:3], reviews.iloc[3:]):
+        ReviewsPreprocessor(batch.reset_index(drop=True).copy(), output=store, deduplicate=.8).execute()
+
+    stored = store.read()
+    sentiments = CreateSentimentAnalysisStrategy().execute(dataset=stored.copy(), text_column='comment')
+    expected = CreateSentimentAnalysisStrategy().execute(dataset=stored.drop(columns=CANONICAL_COLUMN),
+                                                         text_column='comment')
+
+    assert stored[CANONICAL_COLUMN].nunique() == stored['comment'].nunique()
+    assert sentiments['compound'].tolist() == expected['compound'].tolist()
+
+
+def test_strategies_spread_canonical_results(mock_reviews):
+    reviews = duplicated_reviews(mock_reviews)
+    deduplicated = DeduplicationHandler().handle(reviews.copy())
+
+    sentiments = CreateSentimentAnalysisStrategy().execute(dataset=deduplicated.copy(), text_column='comment')
+    aspects = PerformAspectAnalysisStrategy().execute(dataset=deduplicated.copy(), text_column='comment')
+    plan = AnalysisPlan().add(PerformAspectAnalysisStrategy())
+    planned, = plan.run(deduplicated.copy(), 'comment')
+    expected = CreateSentimentAnalysisStrategy().execute(dataset=reviews.head(len(mock_reviews)).copy(),
+                                                         text_column='comment')
+
+    repeated = np.tile(expected['compound'].to_numpy(), 3)
+    assert np.array_equal(sentiments['compound'].to_numpy(), repeated)
+    assert aspects['aspects_sentiments'].tolist()[:len(mock_reviews)] == \
+           aspects['aspects_sentiments'].tolist()[-len(mock_reviews):]
+    assert planned['aspects_sentiments'].tolist() == aspects['aspects_sentiments'].tolist()
+    # only the canonical rows are annotated and their annotations are not spread to the duplicates
+    assert len(plan.annotations) == len(canonical_mapping(deduplicated)[0])
@@ -0,0 +1,39 @@
+import contractions
+
+from nltk import word_tokenize
+
+from harvester.services.preprocessor.fast_text import ContractionExpander, expand_contractions, tokenize
+from harvester.services.preprocessor.preprocessing_handler import PreprocessingHandler
+from harvester.services.preprocessor.reviews_preprocessor import build_pipeline
+
+CONTRACTED_TEXTS = ["I'm happy", "You're gonna LOVE it", "Y'all can't park here!", "It's ok, he's fine.",
+                    "ain't WON'T Don't", "at 5 o'clock", "I’m tired", "Jan. 5", "r u ok", "Straße isn't clean",
+                    "can'tcan't", "(you'd)", "xdon't", "I'd've gone", "'cause it's cheap"]
+
+
+def test_expand_contractions_matches_contractions_fix(mock_reviews):
+    texts = mock_reviews['comment'].tolist() + CONTRACTED_TEXTS
+    expander = ContractionExpander()
+    keys = list(expander.expansions)[::5]
+
+    assert [contractions.fix(text) for text in texts] == [expand_contractions(text) for text in texts]
+    for key in keys:
+        for text in (key, key.upper(), key.title(), f"Well {key}, ok", f"x{key}", f"{key}{key}", f"{key} {key}"):
+            assert contractions.fix(text) == expander.fix(text)
+
+
+def test_tokenize_matches_word_tokenize(mock_reviews):
+    preprocessor = PreprocessingHandler()
+    texts = [preprocessor._preprocess(comment) for comment in mock_reviews['comment']]
+    texts += ['cannot gonna Wanna gotta lemme gimme', 'a_b c²', 'not preprocessed, still works!']
+
+    assert [word_tokenize(text) for text in texts] == [list(tokenize(text)) for text in texts]
+
+
+def test_fast_text_pipeline_matches_default(mock_reviews):
+    for vectorized in (False, True):
+        reviews = mock_reviews[['posting_time', 'rating', 'comment']].dropna()
+        expected = build_pipeline(vectorized=vectorized).handle(reviews.copy())
+        fast = build_pipeline(vectorized=vectorized, fast_text=True).handle(reviews.copy())
+
+        assert expected['comment'].tolist() == fast['comment'].tolist()
@@ -0,0 +1,53 @@
+
+import pytest
+
+from harvester.services.instrumentation import JsonSink, PrometheusSink, StageMetrics, instrumentation
+from harvester.services.ml_algorithms.ml_appliances import CreateSentimentAnalysisStrategy
+from harvester.services.preprocessor.reviews_preprocessor import build_pipeline
+
+
+class CollectingSink:
+    def __init__(self):
+        self.metrics: list[StageMetrics] = []
+
+    def emit(self, metrics: StageMetrics) -> None:
+        self.metrics.append(metrics)
+
+
+@pytest.fixture
+def sink():
+    sink = CollectingSink()
+    yield sink
+    instrumentation.disable()
+
+
+def test_handler_chain_metrics(mock_reviews, sink, tmp_path):
+    instrumentation.configure([sink, JsonSink(str(tmp_path / 'metrics.jsonl'))], profile_stage='ProcessingHandler',
+                              profile_dir=str(tmp_path))
+    dataset = mock_reviews.dropna().copy()
+    build_pipeline().handle(dataset)
+
+    stages = {metrics.stage: metrics for metrics in sink.metrics}
+    assert ['RatingConverterHandler', 'ProcessingHandler', 'PreprocessingHandler'] == [
+        metrics.stage for metrics in sink.metrics]
+    assert all(metrics.rows_in == metrics.rows_out == len(dataset) for metrics in sink.metrics)
+    assert all(metrics.wall_seconds >= 0 and metrics.cpu_seconds >= 0 for metrics in sink.metrics)
+    assert stages['ProcessingHandler'].profile_path.endswith('.prof')
+    assert 3 == len((tmp_path / 'metrics.jsonl').read_text().splitlines())
+
+
+def test_strategy_metrics(mock_reviews, sink, tmp_path):
+    instrumentation.configure([sink, PrometheusSink(str(tmp_path / 'metrics.prom'))])
+    CreateSentimentAnalysisStrategy().execute(dataset=mock_reviews, text_column='comment')
+
+    assert ['CreateSentimentAnalysisStrategy'] == [metrics.stage for metrics in sink.metrics]
+    assert len(mock_reviews) == sink.metrics[0].rows_out
+    assert (f'harvester_stage_rows_in_total{{stage="CreateSentimentAnalysisStrategy"}} {len(mock_reviews)}'
+            in (tmp_path / 'metrics.prom').read_text())
+
+
+def test_disabled_instrumentation_records_nothing(mock_reviews, sink):
+    build_pipeline().handle(mock_reviews.dropna().copy())
+
+    assert [] == sink.metrics
+    assert [] == instrumentation.stack
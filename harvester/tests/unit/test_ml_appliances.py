@@ -1,4 +1,8 @@
 
+import copy
+
+import numpy as np
+
 import pandas as pd
 
 from harvester.services.ml_algorithms.ml_appliances import (CreateSentimentAnalysisStrategy,
@@ -18,6 +22,14 @@ def test_create_sentiment_analysis(mock_reviews):
     assert 0.0 == sentiment_df['compound'][0]
 
 
+def test_create_sentiment_analysis_in_parallel(mock_reviews):
+    serial_df = CreateSentimentAnalysisStrategy().execute(dataset=mock_reviews, text_column='comment')
+    parallel_df = CreateSentimentAnalysisStrategy(n_workers=2, chunk_size=2).execute(dataset=mock_reviews,
+                                                                                     text_column='comment')
+
+    pd.testing.assert_frame_equal(serial_df, parallel_df)
+
+
 def test_extract_dominant_topics(mock_reviews):
     dominant_topics = ExtractDominantTopicsStrategy().execute(dataset=mock_reviews, text_column='comment',
                                                               num_topics=10)
@@ -38,3 +50,69 @@ def test_perform_aspect_analysis(mock_reviews):
     print(aspect_analysis['aspects_sentiments'][0])
     assert pd.DataFrame == type(aspect_analysis)
     assert aspect_analysis['aspects_sentiments'][0] == expected_aspect_analysis
+
+
+def test_perform_aspect_analysis_in_parallel(mock_reviews):
+    serial_analysis = PerformAspectAnalysisStrategy().execute(dataset=mock_reviews.copy(), text_column='comment')
+    parallel_analysis = PerformAspectAnalysisStrategy(n_workers=2, chunk_size=2).execute(dataset=mock_reviews.copy(),
+                                                                                         text_column='comment')
+
+    assert serial_analysis['aspects_sentiments'].tolist() == parallel_analysis['aspects_sentiments'].tolist()
+
+
+def test_extract_dominant_topics_with_saved_model(mock_reviews, tmp_path):
+    trained_topics = ExtractDominantTopicsStrategy(model_dir=str(tmp_path)).execute(
+        dataset=mock_reviews, text_column='comment', num_topics=10)
+    scored_topics = ExtractDominantTopicsStrategy(model_dir=str(tmp_path)).execute(
+        dataset=mock_reviews, text_column='comment', num_topics=10, mode='score')
+
+    pd.testing.assert_frame_equal(trained_topics, scored_topics)
+
+
+def test_extract_dominant_topics_incremental_update(mock_reviews, tmp_path):
+    ExtractDominantTopicsStrategy(model_dir=str(tmp_path)).execute(dataset=mock_reviews.iloc[:2],
+                                                                  text_column='comment', num_topics=10)
+    strategy = ExtractDominantTopicsStrategy(model_dir=str(tmp_path))
+    updated_topics = strategy.execute(dataset=mock_reviews.iloc[2:], text_column='comment', num_topics=10,
+                                      mode='update')
+
+    assert pd.DataFrame == type(updated_topics)
+    assert len(strategy.id2word) > strategy.lda_model.num_terms
+
+
+def test_extract_dominant_topics_with_streamed_corpus(mock_reviews, tmp_path):
+    in_memory_topics = ExtractDominantTopicsStrategy().execute(dataset=mock_reviews, text_column='comment',
+                                                               num_topics=10)
+    streamed_topics = ExtractDominantTopicsStrategy(corpus_path=str(tmp_path / 'corpus.mm')).execute(
+        dataset=mock_reviews, text_column='comment', num_topics=10)
+
+    pd.testing.assert_frame_equal(in_memory_topics, streamed_topics)
+
+
+def test_extract_dominant_topics_with_multiple_workers(mock_reviews, tmp_path):
+    dominant_topics = ExtractDominantTopicsStrategy(workers=2, corpus_path=str(tmp_path / 'corpus.mm')).execute(
+        dataset=mock_reviews, text_column='comment', num_topics=10)
+
+    assert pd.DataFrame == type(dominant_topics)
+    assert ['Topic', 'Count', 'Words'] == dominant_topics.columns.tolist()
+
+
+def test_extract_dominant_topics_batch_inference(mock_reviews):
+    strategy = ExtractDominantTopicsStrategy(inference_chunk_size=2)
+    strategy.execute(dataset=mock_reviews, text_column='comment', num_topics=10)
+    per_document_model = copy.deepcopy(strategy.lda_model)
+
+    topics = strategy._extract_dominant_topics(minimum_probability=.8)
+    expected_topics = [max(per_document_model.get_document_topics(doc_bow, minimum_probability=.8),
+                           key=lambda topic: topic[1], default=(None,))[0] for doc_bow in strategy.corpus]
+
+    assert (len(mock_reviews), 10) == strategy.document_topics.shape
+    assert expected_topics == topics
+
+
+def test_create_sentiment_analysis_float32(mock_reviews):
+    sentiment_df = CreateSentimentAnalysisStrategy().execute(dataset=mock_reviews, text_column='comment')
+    compact_df = CreateSentimentAnalysisStrategy(dtype=np.float32).execute(dataset=mock_reviews, text_column='comment')
+
+    assert all(np.float32 == compact_df[column].dtype for column in ['neg', 'neu', 'pos', 'compound'])
+    np.testing.assert_allclose(sentiment_df['compound'], compact_df['compound'], rtol=1e-6)
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from harvester.services.nltk_resources import NltkResources
+
+
+def test_nltk_resources_offline_lookup(tmp_path):
+    resources = NltkResources(data_dir=str(tmp_path), allow_download=False)
+
+    resources.require('stopwords')
+    with pytest.raises(LookupError):
+        resources.require('not_a_bundled_resource')
+
+    assert {'stopwords'} == resources.available
+
+
+def test_import_is_lazy():
+    code = (f"import sys\n"
+            f"sys.path[:0] = {sys.path!r}\n"
+            "import harvester.services.ml_algorithms.ml_appliances\n"
+            "import harvester.services.preprocessor.reviews_preprocessor\n"
+            "print([name for name in ('nltk', 'gensim', 'textblob') if name in sys.modules])")
+    completed = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+
+    assert '[]' == completed.stdout.strip()
+
+
+@pytest.mark.parametrize('value, allow_download', [('1', False), ('true', False), (' Yes ', False),
+                                                   ('0', True), ('false', True), ('no', True), ('', True)])
+def test_offline_variable_is_parsed(value, allow_download):
+    code = (f"import sys\n"
+            f"sys.path[:0] = {sys.path!r}\n"
+            "from harvester.services import nltk_resources\n"
+            "print(nltk_resources.resources.allow_download)")
+    completed = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                               env={**os.environ, 'HARVESTER_NLTK_OFFLINE': value})
+
+    assert str(allow_download) == completed.stdout.strip()
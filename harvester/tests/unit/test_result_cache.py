@@ -0,0 +1,62 @@
+
+import pandas as pd
+
+from harvester.services.ml_algorithms.ml_appliances import (CreateSentimentAnalysisStrategy,
+                                                            PerformAspectAnalysisStrategy)
+from harvester.services.preprocessor.reviews_preprocessor import build_pipeline
+from harvester.services.result_cache import ResultCache, cached_apply
+
+
+def test_result_cache_bulk_lookup_and_counters(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache.sqlite'))
+    cache.put_many('stage:1', {'gut': 1, 'schlecht': -1})
+
+    assert {'gut': 1} == cache.get_many('stage:1', ['gut', 'neu'])
+    assert {} == cache.get_many('stage:2', ['gut'])
+    assert (1, 2) == (cache.hits, cache.misses)
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache.sqlite'), max_entries=2)
+    cache.put_many('stage:1', {'a': 1})
+    cache.put_many('stage:1', {'b': 2})
+    cache.get_many('stage:1', ['a'])
+    cache.put_many('stage:1', {'c': 3})
+
+    assert 2 == len(cache)
+    assert {'a': 1, 'c': 3} == cache.get_many('stage:1', ['a', 'b', 'c'])
+
+
+def test_cached_apply_computes_only_misses(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache.sqlite'))
+    computed = []
+
+    def compute(texts):
+        computed.extend(texts)
+        return [text.upper() if isinstance(text, str) else None for text in texts]
+
+    assert ['A', 'B', 'A'] == cached_apply(cache, 'upper:1', ['a', 'b', 'a'], compute)
+    assert ['B', None, 'C'] == cached_apply(cache, 'upper:1', ['b', float('nan'), 'c'], compute)
+    assert 3 == len(cache)
+    assert ['a', 'b', 'c'] == [text for text in computed if isinstance(text, str)]
+
+
+def test_cached_strategies_and_handlers(mock_reviews, tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache.sqlite'))
+
+    sentiment_df = CreateSentimentAnalysisStrategy().execute(dataset=mock_reviews, text_column='comment')
+    for _ in range(2):
+        cached_sentiment_df = CreateSentimentAnalysisStrategy(cache=cache).execute(dataset=mock_reviews,
+                                                                                   text_column='comment')
+        pd.testing.assert_frame_equal(sentiment_df, cached_sentiment_df)
+
+    aspects = PerformAspectAnalysisStrategy().execute(dataset=mock_reviews.copy(), text_column='comment')
+    cached_aspects = PerformAspectAnalysisStrategy(cache=cache).execute(dataset=mock_reviews.copy(),
+                                                                        text_column='comment')
+    assert aspects['aspects_sentiments'].tolist() == cached_aspects['aspects_sentiments'].tolist()
+
+    preprocessed = build_pipeline().handle(mock_reviews.dropna().copy())
+    for _ in range(2):
+        pd.testing.assert_frame_equal(preprocessed, build_pipeline(cache=cache).handle(mock_reviews.dropna().copy()))
+
+    assert cache.hits > 0
@@ -0,0 +1,103 @@
+import os
+
+import pandas as pd
+import pytest
+
+from harvester.services.ml_algorithms.analysis_plan import AnalysisPlan
+from harvester.services.ml_algorithms.ml_appliances import (CreateSentimentAnalysisStrategy,
+                                                            ExtractDominantTopicsStrategy,
+                                                            PerformAspectAnalysisStrategy)
+from harvester.services.preprocessor.reviews_preprocessor import (ReviewsPreprocessor,
+                                                                  StreamingReviewsPreprocessor)
+from harvester.services.review_store import ReviewStore
+
+
+def reviews(mock_reviews) -> pd.DataFrame:
+    return mock_reviews[['posting_time', 'rating', 'comment']].copy()
+
+
+def test_append_partitions_by_posting_month(mock_reviews, tmp_path):
+    store = ReviewStore(tmp_path / 'store')
+    store.append(reviews(mock_reviews))
+    store.append(reviews(mock_reviews))
+
+    stored = store.read()
+
+    assert sorted(os.listdir(store.path)) == ['_review_store.json', 'posting_period=2024-10',
+                                              'posting_period=2024-11', 'posting_period=2024-12']
+    assert store.count() == len(stored) == 2 * len(mock_reviews)
+    assert pd.api.types.is_datetime64_any_dtype(stored['posting_time'])
+    assert list(stored.columns) == ['posting_time', 'rating', 'comment']
+
+
+def test_read_filters_by_date_rating_and_columns(mock_reviews, tmp_path):
+    store = ReviewStore(tmp_path / 'store', granularity='day')
+    dataset = reviews(mock_reviews)
+    store.append(dataset)
+
+    posting_times = pd.to_datetime(dataset['posting_time'], format='%b %d, %Y')
+    expected = dataset[(posting_times >= '2024-11-01') & (posting_times <= '2024-12-10')]
+    stored = store.read(columns=['comment'], start='2024-11-01', end='2024-12-10')
+
+    assert list(stored.columns) == ['comment']
+    assert sorted(stored['comment']) == sorted(expected['comment'])
+
+    rating = dataset['rating'].iloc[0]
+    assert store.count(ratings=[rating]) == (dataset['rating'] == rating).sum()
+    assert store.count(start='2025-01-01') == 0
+    assert sum(len(batch) for batch in store.iter_batches(batch_size=2)) == len(dataset)
+
+
+def test_reopened_store_keeps_its_granularity(mock_reviews, tmp_path):
+    ReviewStore(tmp_path / 'store', granularity='day').append(reviews(mock_reviews))
+    expected = ReviewStore(tmp_path / 'store', granularity='day').read(start='2024-10-01', end='2024-12-31')
+
+    reopened = ReviewStore(tmp_path / 'store')
+
+    assert 'day' == reopened.granularity
+    assert len(expected) == len(reopened.read(start='2024-10-01', end='2024-12-31')) == len(mock_reviews)
+    with pytest.raises(ValueError):
+        ReviewStore(tmp_path / 'store', granularity='month')
+
+
+def test_preprocessors_read_and_write_the_store(mock_reviews, tmp_path):
+    source = ReviewStore(tmp_path / 'source')
+    source.append(reviews(mock_reviews))
+
+    preprocessor = ReviewsPreprocessor(source, vectorized=True, output=ReviewStore(tmp_path / 'clean'))
+    preprocessor.execute()
+    streamed = ReviewStore(tmp_path / 'streamed')
+    rows = StreamingReviewsPreprocessor(chunksize=2, vectorized=True).execute(source, streamed)
+
+    clean = ReviewStore(tmp_path / 'clean').read()
+    assert rows == len(clean) == len(preprocessor.dataset)
+    assert sorted(streamed.read()['comment']) == sorted(clean['comment'])
+
+    analyzed = CreateSentimentAnalysisStrategy().execute(dataset=ReviewStore(tmp_path / 'clean'),
+                                                         text_column='comment')
+    assert analyzed['compound'].notna().all()
+
+
+def test_strategies_and_plan_write_the_analyzed_reviews(mock_reviews, tmp_path):
+    sentiments = CreateSentimentAnalysisStrategy(output=ReviewStore(tmp_path / 'sentiment')).execute(
+        dataset=reviews(mock_reviews), text_column='comment')
+    aspects = PerformAspectAnalysisStrategy(output=ReviewStore(tmp_path / 'aspects')).execute(
+        dataset=reviews(mock_reviews), text_column='comment')
+    plan = (AnalysisPlan(output=ReviewStore(tmp_path / 'plan'))
+            .add(ExtractDominantTopicsStrategy(), num_topics=2)
+            .add(CreateSentimentAnalysisStrategy())
+            .add(PerformAspectAnalysisStrategy()))
+    plan.run(reviews(mock_reviews), text_column='comment')
+
+    def pairs(stored):
+        return [[tuple(pair) for pair in review] for review in stored.sort_values('comment')['aspects_sentiments']]
+
+    stored_sentiments = ReviewStore(tmp_path / 'sentiment').read()
+    stored_aspects = ReviewStore(tmp_path / 'aspects').read()
+    planned = ReviewStore(tmp_path / 'plan').read()
+
+    assert sorted(stored_sentiments['compound']) == sorted(sentiments['compound'])
+    assert pairs(stored_aspects) == pairs(aspects)
+    assert pairs(planned) == pairs(aspects)
+    assert sorted(planned['compound']) == sorted(sentiments['compound'])
+    assert len(planned) == len(mock_reviews) and 'Topic' not in planned
@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+from harvester.services.ml_algorithms.ml_appliances import (CreateSentimentAnalysisStrategy,
+                                                            ExtractDominantTopicsStrategy,
+                                                            PerformAspectAnalysisStrategy)
+from harvester.services.preprocessor.reviews_preprocessor import ReviewsPreprocessor
+from harvester.services.scoring_service import ScoringService
+
+
+async def request(connection, method: str, target: str, payload=None) -> tuple[int, object]:
+    reader, writer = await connection
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(f"{method} {target} HTTP/1.1\r\nConnection: close\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+                 + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+
+    head, _, content = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(content)
+
+
+def test_service_scores_concurrent_reviews_in_batches(mock_reviews):
+    comments = mock_reviews['comment'].tolist()
+    expected = CreateSentimentAnalysisStrategy().execute(dataset=mock_reviews[['comment']].copy(),
+                                                         text_column='comment')
+    expected_aspects = PerformAspectAnalysisStrategy().execute(dataset=mock_reviews[['comment']].copy(),
+                                                               text_column='comment')
+
+    async def run():
+        service = ScoringService(aspects=PerformAspectAnalysisStrategy(), max_batch_size=4, latency_budget=.05)
+        await service.start()
+        server = await service.serve(port=0)
+        port = server.sockets[0].getsockname()[1]
+
+        responses = await asyncio.gather(*(request(asyncio.open_connection('127.0.0.1', port), 'POST', '/score',
+                                                   {'comment': comment}) for comment in comments))
+        listed = await request(asyncio.open_connection('127.0.0.1', port), 'POST', '/score',
+                               [{'comment': comment} for comment in comments[:2]])
+        invalid = await request(asyncio.open_connection('127.0.0.1', port), 'POST', '/score', {'rating': 5})
+        stats = await request(asyncio.open_connection('127.0.0.1', port), 'GET', '/stats')
+
+        server.close()
+        await server.wait_closed()
+        await service.close()
+
+        return responses, listed, invalid, stats
+
+    responses, listed, invalid, (_, stats) = asyncio.run(run())
+
+    assert [status for status, _ in responses] == [200] * len(comments)
+    assert [scores['compound'] for _, scores in responses] == expected['compound'].tolist()
+    assert [[tuple(pair) for pair in scores['aspects_sentiments']] for _, scores in responses] == \
+           expected_aspects['aspects_sentiments'].tolist()
+    assert listed[0] == 200 and [scores['compound'] for scores in listed[1]] == expected['compound'].tolist()[:2]
+    assert invalid[0] == 400
+    assert stats['requests'] == len(comments) + 2
+    assert stats['batches'] < stats['requests']
+    assert stats['queue_depth'] == 0
+    assert 0 < stats['p50_ms'] <= stats['p99_ms']
+
+
+def test_service_assigns_topics_over_a_unix_socket(mock_reviews, tmp_path):
+    preprocessor = ReviewsPreprocessor(mock_reviews[['posting_time', 'rating', 'comment']].copy(), vectorized=True)
+    preprocessor.execute()
+    ExtractDominantTopicsStrategy(model_dir=str(tmp_path)).execute(dataset=preprocessor.dataset,
+                                                                   text_column='comment', num_topics=2)
+
+    async def run():
+        service = ScoringService(topics=ExtractDominantTopicsStrategy(model_dir=str(tmp_path)),
+                                 minimum_probability=0.)
+        await service.start()
+        path = str(tmp_path / 'scoring.sock')
+        server = await service.serve(path=path)
+
+        health = await request(asyncio.open_unix_connection(path), 'GET', '/health')
+        scored = await request(asyncio.open_unix_connection(path), 'POST', '/score',
+                               {'comment': mock_reviews['comment'][0]})
+
+        server.close()
+        await server.wait_closed()
+        await service.close()
+
+        return health, scored
+
+    health, (status, scores) = asyncio.run(run())
+
+    assert health == (200, {'status': 'ok'})
+    assert status == 200
+    assert scores['topic'] in (0, 1)
+    assert 0 < scores['topic_probability'] <= 1
+
+
+def test_service_rejects_a_list_it_cannot_queue_whole(mock_reviews):
+    reviews = [{'comment': comment} for comment in mock_reviews['comment'].tolist()[:3]]
+
+    async def run():
+        service = ScoringService(max_pending=2)
+        await service.start()
+        server = await service.serve(port=0)
+        port = server.sockets[0].getsockname()[1]
+
+        rejected = await request(asyncio.open_connection('127.0.0.1', port), 'POST', '/score', reviews)
+        stats = await request(asyncio.open_connection('127.0.0.1', port), 'GET', '/stats')
+        accepted = await request(asyncio.open_connection('127.0.0.1', port), 'POST', '/score', reviews[:2])
+
+        server.close()
+        await server.wait_closed()
+        await service.close()
+
+        return rejected, stats, accepted
+
+    rejected, (_, stats), accepted = asyncio.run(run())
+
+    assert rejected[0] == 503
+    assert (stats['requests'], stats['rejected'], stats['batches']) == (0, 3, 0)
+    assert accepted[0] == 200 and 2 == len(accepted[1])
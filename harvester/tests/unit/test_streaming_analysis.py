@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+import pandas as pd
+
+from harvester.services.ml_algorithms.ml_appliances import CreateSentimentAnalysisStrategy
+from harvester.services.preprocessor.reviews_preprocessor import ReviewsPreprocessor
+from harvester.services.streaming_analysis import StreamingAnalyzer
+
+
+def test_streaming_analyzer_matches_batch_analysis(mock_reviews):
+    batches = []
+    analyzer = StreamingAnalyzer(batches.append, batch_size=2, max_pending=3)
+
+    async def stream():
+        await analyzer.start()
+        for record in mock_reviews[['posting_time', 'rating', 'comment']].to_dict('records'):
+            if not analyzer.offer(record):
+                await analyzer.put(record)
+        await analyzer.close()
+
+    asyncio.run(stream())
+
+    preprocessor = ReviewsPreprocessor(mock_reviews[['posting_time', 'rating', 'comment']].copy(), vectorized=True)
+    preprocessor.execute()
+    expected = CreateSentimentAnalysisStrategy().execute(dataset=preprocessor.dataset, text_column='comment')
+    streamed = pd.concat(batches, ignore_index=True)
+
+    assert all(len(batch) <= 2 for batch in batches)
+    assert len(mock_reviews) == analyzer.rows_in == analyzer.rows_out
+    assert expected['comment'].tolist() == streamed['comment'].tolist()
+    assert expected['compound'].tolist() == streamed['compound'].tolist()
+
+
+def test_streaming_analyzer_applies_backpressure(mock_reviews):
+    release = threading.Event()
+    analyzer = StreamingAnalyzer(lambda analyzed: release.wait(), batch_size=1, max_pending=2)
+    records = mock_reviews[['posting_time', 'rating', 'comment']].to_dict('records')
+
+    async def stream():
+        await analyzer.start()
+        accepted = [analyzer.offer(record) for record in records[:2]]
+        # the consumer takes the first record and blocks in the sink
+        await asyncio.sleep(0.5)
+        accepted += [analyzer.offer(record) for record in records[2:4]]
+
+        release.set()
+        await analyzer.close()
+
+        return accepted
+
+    assert [True, True, True, False] == asyncio.run(stream())
@@ -0,0 +1,38 @@
+import numpy as np
+
+from harvester.services.ml_algorithms.ml_appliances import ExtractDominantTopicsStrategy
+from harvester.services.ml_algorithms.topic_sweep import CsrCorpus
+
+
+def test_csr_corpus_round_trip(tmp_path):
+    doc_bows = [[(0, 2), (3, 1)], [], [(1, 1)]]
+    corpus = CsrCorpus.serialize(str(tmp_path / 'corpus'), doc_bows)
+
+    assert len(corpus) == 3
+    assert list(corpus) == doc_bows
+    assert isinstance(corpus.arrays[0], np.memmap)
+
+
+def test_sweep_ranks_topic_counts_and_keeps_the_best_model(mock_reviews, tmp_path):
+    reviews = mock_reviews[['comment']].copy()
+    strategy = ExtractDominantTopicsStrategy(model_dir=str(tmp_path))
+    table = strategy.sweep(reviews, text_column='comment', topic_counts=[2, 3, 4], n_workers=2)
+
+    assert sorted(table['num_topics']) == [2, 3, 4]
+    assert table['coherence'].is_monotonic_decreasing
+
+    expected = ExtractDominantTopicsStrategy()
+    expected.execute(dataset=reviews, text_column='comment', num_topics=int(table['num_topics'][0]))
+    assert np.allclose(strategy.lda_model.get_topics(), expected.lda_model.get_topics())
+
+    scored = ExtractDominantTopicsStrategy(model_dir=str(tmp_path)).execute(
+        dataset=reviews, text_column='comment', num_topics=int(table['num_topics'][0]), mode='score')
+    assert scored['Count'].sum() <= len(reviews)
+
+
+def test_sweep_stops_when_coherence_stops_improving(mock_reviews):
+    reviews = mock_reviews[['comment']].copy()
+    table = ExtractDominantTopicsStrategy().sweep(reviews, text_column='comment', topic_counts=range(2, 12),
+                                                  n_workers=1, patience=1, min_delta=np.inf)
+
+    assert sorted(table['num_topics']) == [2, 3]